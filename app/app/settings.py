@@ -12,6 +12,9 @@ https://docs.djangoproject.com/en/2.1/ref/settings/
 
 import os
 
+from core.db.config import database_settings
+from core.db.config import replica_settings
+
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -78,20 +81,35 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.1/ref/settings/#databases
 
+# Persistent connections, health checks and the optional connection pool
+# are configured from the environment, see core.db.config
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'HOST': os.environ.get('DB_HOST'),
-        'NAME': os.environ.get('DB_NAME'),
-        'USER': os.environ.get('DB_USER'),
-        'PASSWORD': os.environ.get('DB_PASS'),
-    }
+    'default': database_settings(os.environ),
 }
+DATABASES.update(replica_settings(os.environ, DATABASES['default']))
+
+# Safe recipe API requests read from a replica, except for users whose
+# data changed within the last REPLICA_STICKY_SECONDS, see recipe.replicas.
+# The time of the last change is kept in the response cache, which must
+# then be shared by every process, see CACHE_LOCATION
+
+DATABASE_ROUTERS = ['core.db.routers.ReplicaRouter']
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+REPLICA_STICKY_SECONDS = int(os.environ.get('DB_REPLICA_STICKY_SECONDS', 5))
 
 
 # Password validation
 # https://docs.djangoproject.com/en/2.1/ref/settings/#auth-password-validators
 
+PASSWORD_HASHERS = [
+    'core.hashers.ConfiguredPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -132,3 +150,152 @@ STATIC_ROOT = 'vol/web/static'
 MEDIA_ROOT = 'vol/web/media'
 
 AUTH_USER_MODEL = 'core.User'
+
+
+# Default number of results per page on the list endpoints, clients can
+# ask for a different size with the page_size query parameter
+
+API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', 100))
+
+
+# Cache shared by the worker processes. Data versions, cached responses
+# and read-your-writes markers must be seen by every process, so set
+# CACHE_LOCATION to the memcached servers in production. The local memory
+# fallback is only correct with a single process
+
+CACHE_LOCATION = os.environ.get('CACHE_LOCATION')
+if CACHE_LOCATION:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': CACHE_LOCATION.split(','),
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
+
+
+# Token authentication cache used by user.authentication. It uses the
+# shared cache when CACHE_LOCATION is set, so tokens are invalidated
+# across worker processes. Without it, each process caches tokens
+# locally and the other processes keep accepting a deleted token or a
+# deactivated user for up to the TTL
+
+TOKEN_CACHE_ALIAS = os.environ.get(
+    'TOKEN_CACHE_ALIAS',
+    'default' if CACHE_LOCATION else '',
+) or None
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 10000))
+TOKEN_CACHE_TTL = int(os.environ.get('TOKEN_CACHE_TTL', 60))
+
+
+# Cache of serialized recipe API responses, see recipe.cache. Responses
+# are only cached with a shared cache, a process local one would keep
+# serving data another process changed
+
+RESPONSE_CACHE_ALIAS = os.environ.get('RESPONSE_CACHE_ALIAS', 'default')
+RESPONSE_CACHE_ENABLED = os.environ.get(
+    'RESPONSE_CACHE_ENABLED',
+    '1' if CACHE_LOCATION else '0',
+) == '1'
+RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 300))
+
+
+# Limits of the bulk create, update and delete endpoints, see recipe.bulk
+
+BULK_MAX_ITEMS = int(os.environ.get('BULK_MAX_ITEMS', 1000))
+BULK_BATCH_SIZE = int(os.environ.get('BULK_BATCH_SIZE', 500))
+
+
+# Number of recipes read per round trip when exporting, see recipe.export
+
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 2000))
+
+
+# Resized copies of recipe images generated after upload, see recipe.images
+
+IMAGE_DERIVATIVE_SIZES = {
+    'thumbnail': 150,
+    'card': 600,
+    'full': 1600,
+}
+IMAGE_DERIVATIVE_FORMAT = os.environ.get('IMAGE_DERIVATIVE_FORMAT', 'WEBP')
+IMAGE_DERIVATIVE_QUALITY = int(os.environ.get('IMAGE_DERIVATIVE_QUALITY', 80))
+IMAGE_PIPELINE_WORKERS = int(os.environ.get('IMAGE_PIPELINE_WORKERS', 2))
+
+
+# Limits checked while recipe images are uploaded, see recipe.uploads
+
+IMAGE_UPLOAD_MAX_BYTES = int(os.environ.get('IMAGE_UPLOAD_MAX_BYTES', 10485760))
+IMAGE_UPLOAD_MAX_DIMENSION = int(
+    os.environ.get('IMAGE_UPLOAD_MAX_DIMENSION', 8000),
+)
+IMAGE_UPLOAD_SNIFF_BYTES = 256 * 1024
+IMAGE_UPLOAD_FORMATS = ('JPEG', 'PNG', 'WEBP', 'GIF')
+
+
+# Recipe images are served by the web server when it supports it, set to
+# x-sendfile (Apache, lighttpd) or x-accel-redirect (nginx). The prefix
+# is the internal nginx location aliased to MEDIA_ROOT
+
+MEDIA_SENDFILE_BACKEND = os.environ.get('MEDIA_SENDFILE_BACKEND', '')
+MEDIA_SENDFILE_PREFIX = os.environ.get(
+    'MEDIA_SENDFILE_PREFIX',
+    '/protected-media/',
+)
+
+# Full text search of recipes, see recipe.search. Postgres uses the text
+# search configuration, other databases an in-process index per user,
+# of which only the best ranked matches are queried, as each one is a
+# bound parameter and SQLite allows 999 per query before version 3.32
+
+SEARCH_CONFIG = os.environ.get('SEARCH_CONFIG', 'english')
+SEARCH_INDEX_CACHE_SIZE = int(os.environ.get('SEARCH_INDEX_CACHE_SIZE', 100))
+SEARCH_FALLBACK_LIMIT = int(os.environ.get('SEARCH_FALLBACK_LIMIT', 250))
+
+
+# Suggestions returned by the tag and ingredient prefix autocomplete, see
+# recipe.autocomplete, the number of users whose tries are cached, and
+# the seconds after which a trie is rebuilt to follow usage changes
+
+AUTOCOMPLETE_LIMIT = int(os.environ.get('AUTOCOMPLETE_LIMIT', 10))
+AUTOCOMPLETE_TRIE_CACHE_SIZE = int(
+    os.environ.get('AUTOCOMPLETE_TRIE_CACHE_SIZE', 1000),
+)
+AUTOCOMPLETE_TRIE_TTL = int(os.environ.get('AUTOCOMPLETE_TRIE_TTL', 300))
+
+
+# Default number of recipes ranked by the "what can I cook" and similar
+# recipes endpoints, and the candidates scored per relation for the latter
+
+COVERAGE_LIMIT = int(os.environ.get('COVERAGE_LIMIT', 20))
+SIMILAR_CANDIDATES = int(os.environ.get('SIMILAR_CANDIDATES', 1000))
+
+
+# Recipe statistics served from the tables maintained by core.stats
+
+STATS_PERCENTILES = (50, 90)
+STATS_TOP_ITEMS = int(os.environ.get('STATS_TOP_ITEMS', 5))
+
+
+# Password hashing cost and the process pool running it, see core.hashers.
+# Changing the iterations rehashes each password on its next login. By
+# default passwords are hashed on the request thread, which suits sync
+# workers already running one process per core. Workers help threaded
+# or async servers with few processes, where hashing holds the GIL, and
+# every server process starts its own, so keep workers times processes
+# within the cores
+
+PASSWORD_HASH_ITERATIONS = int(
+    os.environ.get('PASSWORD_HASH_ITERATIONS', 120000),
+)
+PASSWORD_HASHING_WORKERS = int(
+    os.environ.get('PASSWORD_HASHING_WORKERS', 0),
+)
+PASSWORD_HASHING_MAX_PENDING = int(
+    os.environ.get('PASSWORD_HASHING_MAX_PENDING', 64),
+)
@@ -0,0 +1,65 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def is_process_local(cache):
+    """Return whether a Django cache backend is only seen by this process"""
+    return isinstance(cache, LocMemCache)
+
+
+class LRUCache:
+    """Thread safe in-process LRU cache with an optional time to live
+
+    Entries past their TTL are dropped when read, and the least recently
+    used entry is evicted once max_size is reached. Hits and misses are
+    counted so callers can report the cache effectiveness.
+    """
+
+    def __init__(self, max_size=1024, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """Return the value cached for key or default"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires is None or expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        """Cache value under key, evicting the oldest entry if full"""
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """Drop the entry for key if there is one"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop every entry and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
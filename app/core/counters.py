@@ -0,0 +1,106 @@
+from django.db.models import Count
+from django.db.models import F
+from django.db.models import IntegerField
+from django.db.models import OuterRef
+from django.db.models import Subquery
+from django.db.models.functions import Coalesce
+
+from core.models import Recipe
+
+
+# Recipe relations whose targets keep a denormalized recipe_count
+COUNTED_FIELDS = ('tags', 'ingredients')
+
+
+def counted_relations():
+    """Yield the through model and column names of each counted field"""
+    for field_name in COUNTED_FIELDS:
+        field = Recipe._meta.get_field(field_name)
+        yield (
+            field.remote_field.through,
+            field.related_model,
+            field.m2m_field_name(),
+            field.m2m_reverse_field_name(),
+        )
+
+
+def adjust_counts(item_model, deltas):
+    """Apply a mapping of item ID to recipe_count change
+
+    Items sharing the same change are updated together, so the common
+    case of adding or removing one recipe costs a single UPDATE.
+    """
+    by_delta = {}
+    for item_id, delta in deltas.items():
+        if delta:
+            by_delta.setdefault(delta, []).append(item_id)
+    for delta, item_ids in by_delta.items():
+        item_model.objects.filter(pk__in=item_ids).update(
+            recipe_count=F('recipe_count') + delta,
+        )
+
+
+def release_links(links, item_model, item_field):
+    """Decrement the counts of the items referenced by some through rows"""
+    removed = links.order_by().values(item_field).annotate(links=Count('pk'))
+    adjust_counts(
+        item_model,
+        {row[item_field]: -row['links'] for row in removed},
+    )
+
+
+def bulk_link(field_name, links, batch_size=None):
+    """Insert (recipe ID, item ID) pairs into a recipe through table
+
+    bulk_create sends no m2m_changed signal, so the recipe counts of the
+    linked items are adjusted here in the same transaction.
+    """
+    field = Recipe._meta.get_field(field_name)
+    through = field.remote_field.through
+    recipe_column = f'{field.m2m_field_name()}_id'
+    item_column = f'{field.m2m_reverse_field_name()}_id'
+
+    deltas = {}
+    rows = []
+    for recipe_id, item_id in links:
+        deltas[item_id] = deltas.get(item_id, 0) + 1
+        rows.append(through(**{
+            recipe_column: recipe_id,
+            item_column: item_id,
+        }))
+    through.objects.bulk_create(rows, batch_size=batch_size)
+    adjust_counts(field.related_model, deltas)
+
+
+def bulk_unlink(field_name, recipe_ids):
+    """Delete every through row of the given recipes for one relation"""
+    field = Recipe._meta.get_field(field_name)
+    links = field.remote_field.through.objects.filter(
+        **{f'{field.m2m_field_name()}__in': recipe_ids},
+    )
+    release_links(links, field.related_model, field.m2m_reverse_field_name())
+    links.delete()
+
+
+def rebuild_recipe_counts(users=None):
+    """Recompute every recipe_count from the through tables
+
+    Each kind of item is fixed with one UPDATE, optionally limited to the
+    items of the given users. Returns the number of items updated.
+    """
+    updated = 0
+    for through, item_model, recipe_field, item_field in counted_relations():
+        usage = through.objects.filter(
+            **{item_field: OuterRef('pk')},
+        ).order_by().values(item_field).annotate(
+            count=Count('pk'),
+        ).values('count')
+
+        items = item_model.objects.all()
+        if users is not None:
+            items = items.filter(user__in=users)
+        updated += items.update(recipe_count=Coalesce(
+            Subquery(usage, output_field=IntegerField()),
+            0,
+        ))
+    return updated
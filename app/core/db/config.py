@@ -0,0 +1,49 @@
+def database_settings(environ):
+    """Return the settings of the default database from the environment
+
+    Connections persist for DB_CONN_MAX_AGE seconds and are checked
+    before their first use in a request. With DB_POOL_SIZE set, the
+    threads of a process share a pool of at most that many connections
+    instead, each request returning its connection to the pool.
+    """
+    engine = environ.get('DB_ENGINE', 'postgresql')
+    database = {
+        'ENGINE': f'core.db.backends.{engine}',
+        'HOST': environ.get('DB_HOST'),
+        'NAME': environ.get('DB_NAME'),
+        'USER': environ.get('DB_USER'),
+        'PASSWORD': environ.get('DB_PASS'),
+        'CONN_MAX_AGE': int(environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': bool(
+            int(environ.get('DB_CONN_HEALTH_CHECKS', 1)),
+        ),
+    }
+    pool_size = int(environ.get('DB_POOL_SIZE', 0))
+    if pool_size:
+        # Requests give their connection back to the pool when they end
+        database['CONN_MAX_AGE'] = 0
+        database['POOL'] = {
+            'MAX_SIZE': pool_size,
+            'TIMEOUT': float(environ.get('DB_POOL_TIMEOUT', 10)),
+        }
+    return database
+
+
+def replica_settings(environ, primary):
+    """Return the settings of the read replicas named by DB_REPLICA_HOSTS
+
+    Replicas share the credentials and connection options of the primary
+    and mirror it in tests, so test runs create no replica databases.
+    """
+    hosts = environ.get('DB_REPLICA_HOSTS', '')
+    return {
+        f'replica_{number}': {
+            **primary,
+            'HOST': host.strip(),
+            'TEST': {'MIRROR': 'default'},
+        }
+        for number, host in enumerate(
+            (host for host in hosts.split(',') if host.strip()),
+            1,
+        )
+    }
@@ -0,0 +1,62 @@
+import random
+import time
+
+from django.db import DEFAULT_DB_ALIAS
+from django.db import connections
+from django.db.migrations.executor import MigrationExecutor
+
+
+# Aliases whose migrations were seen fully applied, they stay applied
+_migrated = set()
+
+
+def check_database(alias=DEFAULT_DB_ALIAS):
+    """Run a trivial query on a database, raising if it cannot answer"""
+    with connections[alias].cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+
+
+def pending_migrations(alias=DEFAULT_DB_ALIAS):
+    """Return the migrations not applied to a database yet"""
+    if alias in _migrated:
+        return []
+    executor = MigrationExecutor(connections[alias])
+    plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    if not plan:
+        _migrated.add(alias)
+    return [migration for migration, _ in plan]
+
+
+def backoff_delays(base, maximum):
+    """Yield exponentially growing retry delays with full jitter
+
+    Each delay is drawn between zero and a cap doubling from base up to
+    maximum, so the replicas of a service starting together spread
+    their retries instead of hitting the database in lockstep.
+    """
+    cap = base
+    while True:
+        yield random.uniform(0, cap)
+        cap = min(cap * 2, maximum)
+
+
+def retry(check, exceptions, timeout, base_delay, max_delay,
+          on_failure=None):
+    """Call check until it raises none of exceptions, backing off
+
+    The error of the last attempt is raised once another wait would
+    end past timeout seconds from the first attempt.
+    """
+    deadline = time.monotonic() + timeout
+    delays = backoff_delays(base_delay, max_delay)
+    while True:
+        try:
+            return check()
+        except exceptions as error:
+            delay = next(delays)
+            if time.monotonic() + delay > deadline:
+                raise
+            if on_failure is not None:
+                on_failure(error, delay)
+            time.sleep(delay)
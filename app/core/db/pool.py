@@ -0,0 +1,206 @@
+import threading
+import time
+from functools import partial
+
+from django.db import DatabaseError
+from django.db.utils import OperationalError
+
+
+class PoolTimeout(OperationalError):
+    """No pooled connection was released within the pool timeout"""
+
+
+class ConnectionPool:
+    """Database connections shared by the threads of a process
+
+    At most max_size connections are open, idle or checked out. Callers
+    finding none idle and the pool full wait up to timeout seconds for
+    one to be released. The waits and the time spent connecting are
+    counted, so the pool size can be tuned from the stats.
+    """
+
+    def __init__(self, max_size, timeout):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.size = 0
+        self.checked_out = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.timeouts = 0
+        self.connects = 0
+        self.connect_time = 0.0
+        self._idle = []
+        self._condition = threading.Condition()
+
+    def _checkout(self):
+        """Take an idle connection, or None after reserving a new one"""
+        with self._condition:
+            if not self._idle and self.size >= self.max_size:
+                self.waits += 1
+                start = time.monotonic()
+                available = self._condition.wait_for(
+                    lambda: self._idle or self.size < self.max_size,
+                    self.timeout,
+                )
+                self.wait_time += time.monotonic() - start
+                if not available:
+                    self.timeouts += 1
+                    raise PoolTimeout(
+                        f'No database connection released within '
+                        f'{self.timeout} seconds.'
+                    )
+            self.checked_out += 1
+            if self._idle:
+                # The most recently used connection is the likeliest alive
+                return self._idle.pop()
+            self.size += 1
+            return None
+
+    def acquire(self, connect, check=None):
+        """Return an idle connection passing check or a new connection"""
+        while True:
+            connection = self._checkout()
+            if connection is None:
+                break
+            if check is None or check(connection):
+                return connection
+            self.discard(connection)
+
+        start = time.monotonic()
+        try:
+            connection = connect()
+        except Exception:
+            with self._condition:
+                self.size -= 1
+                self.checked_out -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self.connects += 1
+            self.connect_time += time.monotonic() - start
+        return connection
+
+    def release(self, connection):
+        """Give a checked out connection back to the pool"""
+        with self._condition:
+            self.checked_out -= 1
+            self._idle.append(connection)
+            self._condition.notify()
+
+    def discard(self, connection):
+        """Close a checked out connection and free its place"""
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self._condition:
+            self.checked_out -= 1
+            self.size -= 1
+            self._condition.notify()
+
+    def stats(self):
+        """Return the pool occupancy and counters"""
+        with self._condition:
+            return {
+                'size': self.size,
+                'idle': len(self._idle),
+                'checked_out': self.checked_out,
+                'waits': self.waits,
+                'wait_time': self.wait_time,
+                'timeouts': self.timeouts,
+                'connects': self.connects,
+                'connect_time': self.connect_time,
+            }
+
+
+pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, options):
+    """Return the pool of a database alias, created on first use"""
+    with _pools_lock:
+        pool = pools.get(alias)
+        if pool is None:
+            pool = ConnectionPool(
+                max_size=options['MAX_SIZE'],
+                timeout=options.get('TIMEOUT', 10),
+            )
+            pools[alias] = pool
+        return pool
+
+
+def pool_stats():
+    """Return the stats of every connection pool of the process by alias"""
+    with _pools_lock:
+        return {alias: pool.stats() for alias, pool in pools.items()}
+
+
+class PooledDatabaseWrapperMixin:
+    """Database wrapper mixin adding health checks and connection pooling
+
+    With CONN_HEALTH_CHECKS, a persistent connection is checked before
+    its first use in a request and replaced if the server dropped it.
+    With a POOL setting, closing the connection gives it back to the
+    pool of the alias, and opening one takes it from there.
+    """
+
+    def __init__(self, settings_dict, *args, **kwargs):
+        super().__init__(settings_dict, *args, **kwargs)
+        self.health_checks = settings_dict.get('CONN_HEALTH_CHECKS', False)
+        self.health_check_done = False
+        self.pool = None
+        if settings_dict.get('POOL'):
+            self.pool = get_pool(self.alias, settings_dict['POOL'])
+
+    def check_connection(self, connection):
+        """Return whether a raw connection still answers queries"""
+        try:
+            connection.cursor().execute('SELECT 1')
+        except self.Database.Error:
+            return False
+        return True
+
+    def get_new_connection(self, conn_params):
+        connect = partial(super().get_new_connection, conn_params)
+        if self.pool is None:
+            return connect()
+        check = self.check_connection if self.health_checks else None
+        return self.pool.acquire(connect, check)
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def ensure_connection(self):
+        if (
+            self.connection is not None
+            and self.health_checks
+            and not self.health_check_done
+            and not self.in_atomic_block
+        ):
+            self.health_check_done = True
+            if not self.check_connection(self.connection):
+                self.errors_occurred = True
+                try:
+                    self.close()
+                except DatabaseError:
+                    pass
+        super().ensure_connection()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def _close(self):
+        if self.pool is None or self.connection is None:
+            return super()._close()
+        reusable = (
+            not self.errors_occurred
+            and not self.in_atomic_block
+            and self.get_autocommit() == self.settings_dict['AUTOCOMMIT']
+        )
+        if reusable:
+            self.pool.release(self.connection)
+        else:
+            self.pool.discard(self.connection)
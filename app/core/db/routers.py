@@ -0,0 +1,58 @@
+import random
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+_state = threading.local()
+
+
+def choose_replica():
+    """Return a random replica alias, or None when there are none"""
+    if not settings.DATABASE_REPLICAS:
+        return None
+    return random.choice(settings.DATABASE_REPLICAS)
+
+
+def set_read_database(alias):
+    """Send the reads of the current thread to alias, None for the primary"""
+    _state.alias = alias
+
+
+def get_read_database():
+    """Return the alias reads of the current thread go to, if set"""
+    return getattr(_state, 'alias', None)
+
+
+class ReplicaRouter:
+    """Route reads to the replica chosen for the current request
+
+    Views opt in with set_read_database, picking one replica for the
+    whole request so its queries see a single consistent snapshot.
+    Writes, and reads outside such requests, go to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        return get_read_database()
+
+    def db_for_write(self, model, **hints):
+        instance = hints.get('instance')
+        if (
+            instance is not None
+            and instance._state.db in settings.DATABASE_REPLICAS
+        ):
+            # Objects read from a replica are saved to the primary
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
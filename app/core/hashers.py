@@ -0,0 +1,126 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfiguredPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2 hasher whose iteration count is set per deployment
+
+    Hashes keep the pbkdf2_sha256 prefix, so existing passwords verify
+    with either hasher. A password stored with another iteration count
+    is rehashed by Django the next time its owner logs in.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS
+
+
+def _setup_worker():
+    """Load the Django settings in a worker process that was not forked"""
+    from django.apps import apps
+    if not apps.ready:
+        import django
+        django.setup()
+
+
+def _check_password(password, encoded):
+    """Return whether password matches and whether it must be rehashed"""
+    if encoded is None or not hashers.is_password_usable(encoded):
+        return False, False
+    preferred = hashers.get_hasher('default')
+    try:
+        hasher = hashers.identify_hasher(encoded)
+    except ValueError:
+        return False, False
+    hasher_changed = hasher.algorithm != preferred.algorithm
+    must_update = hasher_changed or preferred.must_update(encoded)
+    if not hasher.verify(password, encoded):
+        # Take as long as a hash with the current work factor would, like
+        # django.contrib.auth.hashers.check_password, so old hashes do not
+        # stand out by timing. Both hashers share the algorithm, but only
+        # the preferred one knows the configured iterations
+        if not hasher_changed and must_update:
+            preferred.harden_runtime(password, encoded)
+        return False, False
+    return True, must_update
+
+
+class PasswordHashingPool:
+    """Bounded process pool running the CPU bound password hashing
+
+    Hashing holds the GIL for the whole key derivation, so running it in
+    worker processes keeps request threads responsive and spreads bursts
+    of logins over every core. At most max_pending hashes are queued, the
+    callers beyond that wait, which bounds the CPU a burst can take. With
+    no workers, passwords are hashed in the calling thread.
+
+    Workers are spawned rather than forked, forking a threaded server can
+    copy locks held by other threads into the child and deadlock it.
+    """
+
+    def __init__(self, max_workers, max_pending):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = threading.BoundedSemaphore(max(max_pending, 1))
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_setup_worker,
+                )
+            return self._executor
+
+    def _run(self, function, *args):
+        if not self.max_workers:
+            return function(*args)
+        executor = self._get_executor()
+        with self._pending:
+            return executor.submit(function, *args).result()
+
+    def make_password(self, password):
+        """Return the password hashed with the default hasher"""
+        return self._run(hashers.make_password, password)
+
+    def make_passwords(self, passwords):
+        """Return many passwords hashed in parallel, in the same order
+
+        The passwords are sent to the workers in chunks, so the whole
+        list costs a few round trips and keeps every worker busy.
+        """
+        passwords = list(passwords)
+        if not self.max_workers:
+            return [hashers.make_password(password) for password in passwords]
+        executor = self._get_executor()
+        chunk_size = max(len(passwords) // (self.max_workers * 4), 1)
+        with self._pending:
+            return list(executor.map(
+                hashers.make_password,
+                passwords,
+                chunksize=chunk_size,
+            ))
+
+    def check_password(self, password, encoded):
+        """Return (matches, must be rehashed) for a password and its hash"""
+        return self._run(_check_password, password, encoded)
+
+    def shutdown(self):
+        """Stop the worker processes, they start again when next needed"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+hashing_pool = PasswordHashingPool(
+    max_workers=settings.PASSWORD_HASHING_WORKERS,
+    max_pending=settings.PASSWORD_HASHING_MAX_PENDING,
+)
@@ -0,0 +1,56 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.hashers import PasswordHashingPool
+
+
+class Command(BaseCommand):
+    """Django command to measure login throughput of the hashing pool
+
+    Each login verifies one password, so the password checks per second
+    the pool sustains bound the logins per second of a deployment.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=100,
+            help='Number of password checks to time',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.PASSWORD_HASHING_WORKERS,
+            help='Worker processes, 0 to hash on the calling thread',
+        )
+
+    def handle(self, *args, **options):
+        count = options['count']
+        workers = options['workers']
+        pool = PasswordHashingPool(workers, max_pending=max(workers, 1) * 2)
+        encoded = pool.make_password('benchmark-password')
+
+        self.stdout.write(
+            f'Checking {count} passwords with '
+            f'{settings.PASSWORD_HASH_ITERATIONS} iterations '
+            f'on {workers} workers...'
+        )
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=max(workers, 1) * 2) as callers:
+            list(callers.map(
+                lambda _: pool.check_password('benchmark-password', encoded),
+                range(count),
+            ))
+        elapsed = time.monotonic() - start
+        pool.shutdown()
+
+        rate = count / elapsed
+        cores = min(max(workers, 1), os.cpu_count() or 1)
+        self.stdout.write(self.style.SUCCESS(
+            f'{rate:.1f} logins/s, {rate / cores:.1f} logins/s per core.'
+        ))
@@ -0,0 +1,73 @@
+import csv
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+
+# CSV columns copied to the users, other columns are ignored
+USER_COLUMNS = ('email', 'password', 'name')
+
+
+def read_users(stream):
+    """Yield the user fields of every row of a CSV stream with a header"""
+    for row in csv.DictReader(stream):
+        yield {
+            column: (row.get(column) or '').strip() or None
+            for column in USER_COLUMNS
+            if column != 'name' or row.get(column)
+        }
+
+
+class Command(BaseCommand):
+    """Django command to create many users from a CSV file"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='CSV file with email, password and name columns, '
+                 '- for stdin',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of users hashed and inserted together',
+        )
+        parser.add_argument(
+            '--no-tokens',
+            action='store_false',
+            dest='create_tokens',
+            help='Do not create API tokens for the new users',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        stream = sys.stdin if path == '-' else open(
+            path,
+            newline='',
+            encoding='utf-8',
+        )
+        start = time.monotonic()
+        try:
+            result = get_user_model().objects.bulk_create_users(
+                read_users(stream),
+                batch_size=options['batch_size'],
+                create_tokens=options['create_tokens'],
+            )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        elapsed = max(time.monotonic() - start, 1e-6)
+
+        for index in result.invalid:
+            self.stderr.write(f'Record {index + 1}: an email is required')
+        for email in result.duplicates:
+            self.stderr.write(f'{email} already exists, skipped')
+        created = len(result.created)
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {created} users ({created / elapsed:.0f} users/s), '
+            f'{len(result.duplicates)} duplicates, '
+            f'{len(result.invalid)} invalid.'
+        ))
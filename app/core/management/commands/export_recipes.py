@@ -0,0 +1,26 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from recipe.export import export_recipes
+
+
+class Command(BaseCommand):
+    """Django command to export the recipes of a user as NDJSON"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Email of the user to export')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            help='Number of recipes read per database round trip',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'User {options["email"]} does not exist.')
+
+        for lines in export_recipes(user, options['chunk_size']):
+            self.stdout.write(lines, ending='')
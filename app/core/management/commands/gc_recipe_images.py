@@ -0,0 +1,104 @@
+import os
+import shutil
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from core.models import Recipe
+from core.storage import is_content_addressed
+from core.storage import recipe_image_storage
+
+
+# Directory of the recipe images, see recipe_image_file_path
+IMAGE_DIRECTORY = os.path.join('uploads', 'recipe')
+
+
+class Command(BaseCommand):
+    """Django command to delete recipe images no recipe refers to
+
+    Images are shared between recipes with the same content, so replacing
+    or deleting a recipe image leaves the blob in place and it is only
+    removed here, together with its derivatives.
+
+    Uploads reusing a blob refresh its modification time under the
+    storage lock. Each deletion takes the same lock and checks the time
+    and the recipes again, so a blob reused during the run is kept.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace',
+            type=int,
+            default=3600,
+            help='Keep files modified less than this many seconds ago',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='List the files that would be deleted without deleting',
+        )
+
+    def referenced_images(self):
+        """Return the names of the images recipes refer to"""
+        return set(
+            Recipe.objects.exclude(image='').exclude(image=None)
+            .values_list('image', flat=True).iterator()
+        )
+
+    def handle(self, *args, **options):
+        referenced = self.referenced_images()
+        referenced_stems = {os.path.splitext(name)[0] for name in referenced}
+        cutoff = time.time() - options['grace']
+        location = recipe_image_storage.location
+        root = recipe_image_storage.path(IMAGE_DIRECTORY)
+        deleted = 0
+
+        for directory, dir_names, file_names in os.walk(root):
+            name_dir = os.path.relpath(directory, location)
+            for file_name in file_names:
+                path = os.path.join(directory, file_name)
+                name = os.path.join(name_dir, file_name).replace('\\', '/')
+                # Temporary files of interrupted uploads go once stale
+                if not file_name.startswith('.upload-') and (
+                    not is_content_addressed(name) or name in referenced
+                ):
+                    continue
+                in_use = Q(image=name)
+                if self._delete(path, cutoff, options['dry_run'], in_use):
+                    deleted += 1
+
+            for dir_name in list(dir_names):
+                # Derivative directories are named after their original
+                path = os.path.join(directory, dir_name)
+                stem = os.path.join(name_dir, dir_name).replace('\\', '/')
+                if not is_content_addressed(stem):
+                    continue
+                dir_names.remove(dir_name)
+                if stem in referenced_stems:
+                    continue
+                in_use = Q(image__startswith=f'{stem}.')
+                if self._delete(path, cutoff, options['dry_run'], in_use):
+                    deleted += 1
+
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {deleted} files.'))
+
+    def _delete(self, path, cutoff, dry_run, in_use):
+        """Delete a file or directory unless recent or used by a recipe
+
+        Returns whether the path was, or would be, deleted.
+        """
+        with recipe_image_storage.lock():
+            if os.path.getmtime(path) > cutoff:
+                return False
+            if Recipe.objects.filter(in_use).exists():
+                return False
+            self.stdout.write(path)
+            if dry_run:
+                return True
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+        return True
@@ -0,0 +1,227 @@
+import csv
+import json
+import os
+import sys
+import time
+from itertools import chain
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import transaction
+
+from core.counters import bulk_link
+from core.models import Ingredient
+from core.models import Recipe
+from core.models import Tag
+from core.stats import add_recipes
+from recipe.bulk import bulk_insert
+from recipe.cache import bump_item_version
+from recipe.cache import bump_version
+from recipe.search import update_search_vectors
+from recipe.serializers import RecipeImportSerializer
+
+
+# Separator of the tag and ingredient names in a CSV cell
+CSV_LIST_SEPARATOR = ';'
+
+RELATED_MODELS = {'tags': Tag, 'ingredients': Ingredient}
+
+
+def read_ndjson(stream):
+    """Yield one record per non blank line of a NDJSON stream
+
+    Tags and ingredients may be names or objects with a name, so files
+    written by export_recipes can be imported as they are.
+    """
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as error:
+            yield {'__error__': str(error)}
+            continue
+        if isinstance(record, dict):
+            for field_name in RELATED_MODELS:
+                record[field_name] = [
+                    item.get('name') if isinstance(item, dict) else item
+                    for item in record.get(field_name) or ()
+                ]
+        yield record
+
+
+def read_csv(stream):
+    """Yield one record per row of a CSV stream with a header row"""
+    for row in csv.DictReader(stream):
+        for field_name in RELATED_MODELS:
+            names = row.get(field_name) or ''
+            row[field_name] = [
+                name.strip() for name in names.split(CSV_LIST_SEPARATOR)
+                if name.strip()
+            ]
+        yield row
+
+
+class NameMap:
+    """Name to ID map of a user's tags or ingredients
+
+    Seeded with a single query, then the names missing from a batch are
+    created together so each new name costs one row in a bulk insert.
+    """
+
+    def __init__(self, model, user, batch_size):
+        self.model = model
+        self.user = user
+        self.batch_size = batch_size
+        self.ids = dict(
+            model.objects.filter(user=user).values_list('name', 'id'),
+        )
+
+    def create_missing(self, names):
+        """Create the objects for the names that are not known yet"""
+        missing = {name for name in names if name not in self.ids}
+        objs = [self.model(user=self.user, name=name) for name in missing]
+        bulk_insert(self.model, objs, self.batch_size)
+        for obj in objs:
+            self.ids[obj.name] = obj.id
+        if objs:
+            bump_item_version(self.user.pk)
+
+
+class Command(BaseCommand):
+    """Django command to import recipes of a user from NDJSON or CSV"""
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Email of the user to import to')
+        parser.add_argument('path', help='File to import, - for stdin')
+        parser.add_argument(
+            '--format',
+            choices=('ndjson', 'csv'),
+            help='Input format, by default guessed from the file extension',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of recipes written per transaction',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='File recording progress, an import resumes from it',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'User {options["email"]} does not exist.')
+
+        path = options['path']
+        input_format = options['format']
+        if input_format is None:
+            input_format = 'csv' if path.endswith('.csv') else 'ndjson'
+        reader = read_csv if input_format == 'csv' else read_ndjson
+
+        checkpoint = options['checkpoint']
+        done = self._read_checkpoint(checkpoint)
+        if done:
+            self.stdout.write(f'Resuming after {done} records...')
+
+        batch_size = options['batch_size']
+        self.name_maps = {
+            field_name: NameMap(model, user, batch_size)
+            for field_name, model in RELATED_MODELS.items()
+        }
+
+        stream = sys.stdin if path == '-' else open(
+            path,
+            newline='',
+            encoding='utf-8',
+        )
+        try:
+            records = islice(enumerate(reader(stream), 1), done, None)
+            self._import(user, records, batch_size, checkpoint)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+    def _read_checkpoint(self, checkpoint):
+        """Return the number of records an earlier run already handled"""
+        if not checkpoint or not os.path.exists(checkpoint):
+            return 0
+        with open(checkpoint) as checkpoint_file:
+            return int(checkpoint_file.read().strip() or 0)
+
+    def _write_checkpoint(self, checkpoint, done):
+        """Atomically record the number of records handled so far"""
+        if not checkpoint:
+            return
+        with open(f'{checkpoint}.tmp', 'w') as checkpoint_file:
+            checkpoint_file.write(str(done))
+        os.replace(f'{checkpoint}.tmp', checkpoint)
+
+    def _import(self, user, records, batch_size, checkpoint):
+        imported = failed = 0
+        start = time.monotonic()
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                break
+
+            valid = []
+            for number, record in batch:
+                serializer = RecipeImportSerializer(data=record)
+                if serializer.is_valid():
+                    valid.append(serializer.validated_data)
+                else:
+                    failed += 1
+                    errors = serializer.errors
+                    if isinstance(record, dict) and '__error__' in record:
+                        errors = record['__error__']
+                    self.stderr.write(f'Record {number}: {errors}')
+
+            with transaction.atomic():
+                self._write_batch(user, valid, batch_size)
+            self._write_checkpoint(checkpoint, batch[-1][0])
+
+            imported += len(valid)
+            rate = imported / max(time.monotonic() - start, 1e-6)
+            self.stdout.write(
+                f'Imported {imported} recipes ({rate:.0f} rows/s), '
+                f'{failed} failed'
+            )
+
+        bump_version(user.pk)
+        self.stdout.write(self.style.SUCCESS(
+            f'Import finished: {imported} recipes, {failed} failed.'
+        ))
+
+    def _write_batch(self, user, valid, batch_size):
+        """Write the recipes of a batch with their tags and ingredients"""
+        recipes = [
+            Recipe(user=user, **{
+                name: value for name, value in data.items()
+                if name not in RELATED_MODELS
+            })
+            for data in valid
+        ]
+        bulk_insert(Recipe, recipes, batch_size)
+        add_recipes(recipes)
+
+        for field_name, name_map in self.name_maps.items():
+            names = [
+                list(dict.fromkeys(data.get(field_name, ()))) for data in valid
+            ]
+            name_map.create_missing(chain.from_iterable(names))
+            bulk_link(
+                field_name,
+                [
+                    (recipe.id, name_map.ids[name])
+                    for recipe, recipe_names in zip(recipes, names)
+                    for name in recipe_names
+                ],
+                batch_size,
+            )
+        update_search_vectors(recipe.id for recipe in recipes)
@@ -0,0 +1,28 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.counters import rebuild_recipe_counts
+
+
+class Command(BaseCommand):
+    """Django command to recompute tag and ingredient recipe counts"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--email',
+            action='append',
+            dest='emails',
+            help='Only rebuild the counts of this user, can be repeated',
+        )
+
+    def handle(self, *args, **options):
+        users = None
+        if options['emails']:
+            users = get_user_model().objects.filter(
+                email__in=options['emails'],
+            )
+        self.stdout.write('Rebuilding recipe counts...')
+        with transaction.atomic():
+            updated = rebuild_recipe_counts(users)
+        self.stdout.write(self.style.SUCCESS(f'Updated {updated} items.'))
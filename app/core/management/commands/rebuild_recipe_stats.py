@@ -0,0 +1,28 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    """Django command to recompute the recipe statistics of users"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--email',
+            action='append',
+            dest='emails',
+            help='Only rebuild the statistics of this user, can be repeated',
+        )
+
+    def handle(self, *args, **options):
+        users = None
+        if options['emails']:
+            users = get_user_model().objects.filter(
+                email__in=options['emails'],
+            )
+        self.stdout.write('Rebuilding recipe statistics...')
+        with transaction.atomic():
+            rebuilt = rebuild_stats(users)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rebuilt} users.'))
@@ -1,20 +1,74 @@
-import time
-
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import DEFAULT_DB_ALIAS
 from django.db import connections
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+
+from core.db import health
+
+
+class MigrationsPending(Exception):
+    """Raised while migrations remain to be applied"""
 
 
 class Command(BaseCommand):
     """Django command to pause execution until database is available"""
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='Alias of the database to wait for',
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=60,
+            help='Seconds to wait in total before failing',
+        )
+        parser.add_argument(
+            '--max-delay',
+            type=float,
+            default=5,
+            help='Longest wait in seconds between two attempts',
+        )
+        parser.add_argument(
+            '--check-migrations',
+            action='store_true',
+            help='Also wait until every migration is applied',
+        )
+
     def handle(self, *args, **options):
+        alias = options['database']
+        self.connection = connections[alias]
+        self.check_migrations = options['check_migrations']
+
         self.stdout.write('Waiting for database...')
-        db_conn = None
-        while not db_conn:
-            try:
-                db_conn = connections['default']
-            except OperationalError:
-                self.stdout.write('Database unavailable. Wait 1 second...')
-                time.sleep(1)
+        try:
+            health.retry(
+                self.check,
+                (OperationalError, MigrationsPending),
+                timeout=options['timeout'],
+                base_delay=0.1,
+                max_delay=options['max_delay'],
+                on_failure=self.report,
+            )
+        except (OperationalError, MigrationsPending) as error:
+            raise CommandError(f'Database unavailable: {error}')
         self.stdout.write(self.style.SUCCESS('DB is available.'))
+
+    def check(self):
+        """Open a connection and look for pending migrations if asked"""
+        self.connection.ensure_connection()
+        if self.check_migrations:
+            pending = health.pending_migrations(self.connection.alias)
+            if pending:
+                raise MigrationsPending(
+                    f'{len(pending)} migrations not applied'
+                )
+
+    def report(self, error, delay):
+        """Print why an attempt failed and how long until the next one"""
+        self.stdout.write(
+            f'Database unavailable ({error}). Retrying in {delay:.1f}s...'
+        )
@@ -0,0 +1,30 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """Index the recipe through tables from the tag/ingredient side
+
+    The unique constraints Django creates lead with recipe_id, so lookups
+    by tag or ingredient could only use the single column index and had
+    to visit the table for recipe_id. These composite indexes answer the
+    recipe filters from the index alone.
+    """
+
+    dependencies = [
+        ('core', '0006_pagination_indexes'),
+    ]
+
+    operations = [
+        # Statements are given as lists, Django only needs sqlparse to
+        # split a string of SQL
+        migrations.RunSQL(
+            ['CREATE INDEX core_recipe_tags_tag_recipe_idx '
+             'ON core_recipe_tags (tag_id, recipe_id)'],
+            ['DROP INDEX core_recipe_tags_tag_recipe_idx'],
+        ),
+        migrations.RunSQL(
+            ['CREATE INDEX core_recipe_ingredients_ingredient_recipe_idx '
+             'ON core_recipe_ingredients (ingredient_id, recipe_id)'],
+            ['DROP INDEX core_recipe_ingredients_ingredient_recipe_idx'],
+        ),
+    ]
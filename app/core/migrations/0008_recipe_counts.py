@@ -0,0 +1,57 @@
+# Generated by Django 2.1.15 on 2026-10-17 04:10
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models import IntegerField
+from django.db.models import OuterRef
+from django.db.models import Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_recipe_counts(apps, schema_editor):
+    """Count the recipes already using each tag and ingredient"""
+    Recipe = apps.get_model('core', 'Recipe')
+    for field_name in ('tags', 'ingredients'):
+        field = Recipe._meta.get_field(field_name)
+        item_field = field.m2m_reverse_field_name()
+        usage = field.remote_field.through.objects.filter(
+            **{item_field: OuterRef('pk')},
+        ).order_by().values(item_field).annotate(
+            count=Count('pk'),
+        ).values('count')
+        field.related_model.objects.update(recipe_count=Coalesce(
+            Subquery(usage, output_field=IntegerField()),
+            0,
+        ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_recipe_m2m_reverse_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='recipe_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='recipe_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['user', '-recipe_count'], name='core_ingred_user_id_dbfae2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['user', '-recipe_count'], name='core_tag_user_id_a7d271_idx'),
+        ),
+        migrations.RunPython(
+            populate_recipe_counts,
+            migrations.RunPython.noop,
+        ),
+    ]
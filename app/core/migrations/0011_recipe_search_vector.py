@@ -0,0 +1,61 @@
+# Generated by Django 2.1.15 on 2026-10-17 04:25
+
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+
+POPULATE_SEARCH_VECTORS = '''
+    UPDATE core_recipe AS recipe
+    SET search_vector =
+        setweight(to_tsvector(%(config)s, recipe.name), 'A') ||
+        setweight(to_tsvector(%(config)s, coalesce((
+            SELECT string_agg(tag.name, ' ')
+            FROM core_recipe_tags AS link
+            JOIN core_tag AS tag ON tag.id = link.tag_id
+            WHERE link.recipe_id = recipe.id
+        ), '')), 'B') ||
+        setweight(to_tsvector(%(config)s, coalesce((
+            SELECT string_agg(ingredient.name, ' ')
+            FROM core_recipe_ingredients AS link
+            JOIN core_ingredient AS ingredient
+                ON ingredient.id = link.ingredient_id
+            WHERE link.recipe_id = recipe.id
+        ), '')), 'B')
+'''
+
+
+def create_search_index(apps, schema_editor):
+    """Index and populate the search vectors, only used on Postgres"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX core_recipe_search_vector_idx '
+        'ON core_recipe USING gin (search_vector)'
+    )
+    schema_editor.execute(
+        POPULATE_SEARCH_VECTORS,
+        {'config': settings.SEARCH_CONFIG},
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX core_recipe_search_vector_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_recipe_image_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
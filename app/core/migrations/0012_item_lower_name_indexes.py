@@ -0,0 +1,40 @@
+from django.db import migrations
+
+
+ITEM_TABLES = ('core_tag', 'core_ingredient')
+
+
+def create_lower_name_indexes(apps, schema_editor):
+    """Index the lowercase names of tags and ingredients per user
+
+    Only Postgres can answer LIKE 'prefix%' from a B-tree, with the
+    text_pattern_ops operator class, other databases are left as is.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table in ITEM_TABLES:
+        schema_editor.execute(
+            f'CREATE INDEX {table}_user_lower_name_idx '
+            f'ON {table} (user_id, lower(name) text_pattern_ops)'
+        )
+
+
+def drop_lower_name_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table in ITEM_TABLES:
+        schema_editor.execute(f'DROP INDEX {table}_user_lower_name_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            create_lower_name_indexes,
+            drop_lower_name_indexes,
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 2.1.15 on 2026-10-17 04:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count
+from django.db.models import Sum
+
+
+def populate_recipe_stats(apps, schema_editor):
+    """Summarize the recipes already stored for every user"""
+    Recipe = apps.get_model('core', 'Recipe')
+    RecipeStats = apps.get_model('core', 'RecipeStats')
+    RecipeValueCount = apps.get_model('core', 'RecipeValueCount')
+
+    totals = Recipe.objects.order_by().values('user').annotate(
+        recipe_count=Count('pk'),
+        time_minutes_total=Sum('time_minutes'),
+        price_total=Sum('price'),
+    )
+    RecipeStats.objects.bulk_create([
+        RecipeStats(
+            user_id=row['user'],
+            recipe_count=row['recipe_count'],
+            time_minutes_total=row['time_minutes_total'],
+            price_total=row['price_total'],
+        )
+        for row in totals
+    ])
+    for field in ('time_minutes', 'price'):
+        rows = Recipe.objects.order_by().values('user', field).annotate(
+            count=Count('pk'),
+        )
+        RecipeValueCount.objects.bulk_create(
+            (
+                RecipeValueCount(
+                    user_id=row['user'],
+                    field=field,
+                    value=row[field],
+                    count=row['count'],
+                )
+                for row in rows.iterator()
+            ),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_item_lower_name_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('recipe_count', models.IntegerField(default=0)),
+                ('time_minutes_total', models.BigIntegerField(default=0)),
+                ('price_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RecipeValueCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(choices=[('time_minutes', 'Time in minutes'), ('price', 'Price')], max_length=20)),
+                ('value', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='recipevaluecount',
+            unique_together={('user', 'field', 'value')},
+        ),
+        migrations.RunPython(
+            populate_recipe_stats,
+            migrations.RunPython.noop,
+        ),
+    ]
@@ -5,7 +5,14 @@ from django.conf import settings
 from django.contrib.auth.models import AbstractBaseUser
 from django.contrib.auth.models import BaseUserManager
 from django.contrib.auth.models import PermissionsMixin
+from django.contrib.postgres.search import SearchVectorField
+from django.db import IntegrityError
 from django.db import models
+from django.db import transaction
+from rest_framework.authtoken.models import Token
+
+from core.hashers import hashing_pool
+from core.storage import recipe_image_storage
 
 
 def recipe_image_file_path(instance, file_name):
@@ -15,6 +22,15 @@ def recipe_image_file_path(instance, file_name):
     return os.path.join('uploads/recipe/', file_name)
 
 
+class BulkUserResult:
+    """Outcome of UserManager.bulk_create_users"""
+
+    def __init__(self):
+        self.created = []
+        self.duplicates = []
+        self.invalid = []
+
+
 class UserManager(BaseUserManager):
 
     def __create_user(self, email, password=None, **extra_fields):
@@ -33,6 +49,85 @@ class UserManager(BaseUserManager):
 
         return user
 
+    def bulk_create_users(self, rows, batch_size=1000, create_tokens=True):
+        """Create users from dicts of email, password and other fields
+
+        Passwords of a batch are hashed in parallel by the hashing pool
+        and its users inserted with one bulk insert, along with their
+        API tokens when create_tokens is set. Emails already taken or
+        repeated in rows are reported in the result's duplicates and
+        rows without an email in invalid, by index, the others are
+        created regardless.
+        """
+        result = BulkUserResult()
+        seen = set()
+        batch = []
+        for index, row in enumerate(rows):
+            row = dict(row)
+            email = self.normalize_email(row.pop('email', None) or '')
+            if not email:
+                result.invalid.append(index)
+            elif email in seen:
+                result.duplicates.append(email)
+            else:
+                seen.add(email)
+                batch.append((email, row))
+            if len(batch) >= batch_size:
+                self._bulk_create_batch(batch, create_tokens, result)
+                batch = []
+        if batch:
+            self._bulk_create_batch(batch, create_tokens, result)
+        return result
+
+    def _taken_emails(self, emails):
+        """Return the emails of a list already used by a user"""
+        return set(self.using(self._db).filter(
+            email__in=emails,
+        ).values_list('email', flat=True))
+
+    def _bulk_create_batch(self, batch, create_tokens, result):
+        taken = self._taken_emails([email for email, _ in batch])
+        result.duplicates.extend(
+            email for email, _ in batch if email in taken
+        )
+        batch = [(email, row) for email, row in batch if email not in taken]
+        passwords = hashing_pool.make_passwords(
+            row.pop('password', None) for _, row in batch
+        )
+        users = [
+            self.model(email=email, password=password, **row)
+            for (email, row), password in zip(batch, passwords)
+        ]
+
+        try:
+            with transaction.atomic(using=self._db):
+                self.using(self._db).bulk_create(users)
+        except IntegrityError:
+            # An email was taken in between, fall back to one row at a
+            # time so that only the conflicting users are skipped
+            created = []
+            for user in users:
+                try:
+                    with transaction.atomic(using=self._db):
+                        user.save(using=self._db)
+                    created.append(user)
+                except IntegrityError:
+                    result.duplicates.append(user.email)
+            users = created
+
+        # Bulk inserts do not set primary keys on every database
+        ids = dict(self.using(self._db).filter(
+            email__in=[user.email for user in users],
+        ).values_list('email', 'id'))
+        for user in users:
+            user.pk = ids[user.email]
+        if create_tokens:
+            tokens = [Token(user=user) for user in users]
+            for token in tokens:
+                token.key = token.generate_key()
+            Token.objects.using(self._db).bulk_create(tokens)
+        result.created.extend(users)
+
     def create_superuser(self, email, password):
         user = self.__create_user(email, password)
         user.is_staff = True
@@ -53,6 +148,23 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     USERNAME_FIELD = 'email'
 
+    def set_password(self, raw_password):
+        """Hash the password in the password hashing pool"""
+        self.password = hashing_pool.make_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        """Check the password in the pool, rehashing outdated hashes"""
+        valid, must_update = hashing_pool.check_password(
+            raw_password,
+            self.password,
+        )
+        if valid and must_update:
+            self.set_password(raw_password)
+            self._password = None
+            self.save(update_fields=['password'])
+        return valid
+
 
 class Tag(models.Model):
     """Tag to be used for a recipe"""
@@ -61,6 +173,14 @@ class Tag(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    # Number of recipes using this tag, maintained by core.signals
+    recipe_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'name']),
+            models.Index(fields=['user', '-recipe_count']),
+        ]
 
     def __str__(self):
         return self.name
@@ -73,6 +193,14 @@ class Ingredient(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    # Number of recipes using this ingredient, maintained by core.signals
+    recipe_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'name']),
+            models.Index(fields=['user', '-recipe_count']),
+        ]
 
     def __str__(self):
         return self.name
@@ -90,7 +218,64 @@ class Recipe(models.Model):
     link = models.CharField(max_length=255, blank=True)
     ingredients = models.ManyToManyField('Ingredient')
     tags = models.ManyToManyField('Tag')
-    image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    image = models.ImageField(
+        null=True,
+        upload_to=recipe_image_file_path,
+        storage=recipe_image_storage,
+        db_index=True,
+    )
+    # Weighted words of the name, tag names and ingredient names, kept up
+    # to date by recipe.search on Postgres and unused elsewhere
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id']),
+        ]
 
     def __str__(self):
         return self.name
+
+
+class RecipeStats(models.Model):
+    """Running totals of the recipes of a user, maintained by core.stats"""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    recipe_count = models.IntegerField(default=0)
+    time_minutes_total = models.BigIntegerField(default=0)
+    price_total = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+    )
+
+    def __str__(self):
+        return f'{self.user_id}: {self.recipe_count} recipes'
+
+
+class RecipeValueCount(models.Model):
+    """Number of recipes of a user with a given time or price
+
+    The per value counts are the histogram the percentiles are read from,
+    users have far fewer distinct values than recipes.
+    """
+    FIELD_CHOICES = (
+        ('time_minutes', 'Time in minutes'),
+        ('price', 'Price'),
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    field = models.CharField(max_length=20, choices=FIELD_CHOICES)
+    value = models.DecimalField(max_digits=14, decimal_places=2)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = (('user', 'field', 'value'),)
+
+    def __str__(self):
+        return f'{self.user_id}: {self.field}={self.value} x{self.count}'
@@ -0,0 +1,107 @@
+from functools import partial
+
+from django.db.models.signals import m2m_changed
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.db.models.signals import pre_delete
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+
+from core.counters import adjust_counts
+from core.counters import counted_relations
+from core.counters import release_links
+from core.models import Recipe
+from core.stats import adjust_stats
+from core.stats import recipe_values
+
+
+def _recipe_links_changed(
+    sender, instance, action, reverse, pk_set, item_model, recipe_field,
+    item_field, **kwargs
+):
+    """Keep item counts in step with a change to a recipe relation"""
+    if action not in ('post_add', 'pre_remove', 'pre_clear'):
+        return
+
+    if action == 'post_add':
+        if reverse:
+            adjust_counts(item_model, {instance.pk: len(pk_set)})
+        else:
+            adjust_counts(item_model, dict.fromkeys(pk_set, 1))
+        return
+
+    # Links are counted before they are deleted and inside the same
+    # transaction, so IDs that were never linked are not decremented
+    if reverse:
+        links = sender.objects.filter(**{item_field: instance.pk})
+        if pk_set is not None:
+            links = links.filter(**{f'{recipe_field}__in': pk_set})
+    else:
+        links = sender.objects.filter(**{recipe_field: instance.pk})
+        if pk_set is not None:
+            links = links.filter(**{f'{item_field}__in': pk_set})
+    release_links(links, item_model, item_field)
+
+
+def _connect_counted_relations():
+    """Connect a counter receiver to each counted through model"""
+    for through, item_model, recipe_field, item_field in counted_relations():
+        m2m_changed.connect(
+            partial(
+                _recipe_links_changed,
+                item_model=item_model,
+                recipe_field=recipe_field,
+                item_field=item_field,
+            ),
+            sender=through,
+            weak=False,
+            dispatch_uid=f'recipe_count_{item_model._meta.model_name}',
+        )
+
+
+_connect_counted_relations()
+
+
+@receiver(pre_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    """Release the counts held by a recipe before its links cascade"""
+    for through, item_model, recipe_field, item_field in counted_relations():
+        links = through.objects.filter(**{recipe_field: instance.pk})
+        release_links(links, item_model, item_field)
+
+
+STATS_COLUMNS = ('user', 'user_id', 'time_minutes', 'price')
+
+
+@receiver(pre_save, sender=Recipe)
+def recipe_stats_pre_save(sender, instance, update_fields=None, **kwargs):
+    """Remember the stored values of a recipe about to be updated"""
+    instance._stats_previous = None
+    if instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & set(
+        STATS_COLUMNS,
+    ):
+        return
+    instance._stats_previous = Recipe.objects.filter(
+        pk=instance.pk,
+    ).values_list('user_id', 'time_minutes', 'price').first()
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_stats_saved(sender, instance, created, **kwargs):
+    """Apply a created or updated recipe to the statistics of its user"""
+    current = recipe_values(instance)
+    if created:
+        adjust_stats(added=[current])
+        instance._stats_counted = True
+        return
+    previous = instance.__dict__.pop('_stats_previous', None)
+    if previous is not None and tuple(previous) != current:
+        adjust_stats(added=[current], removed=[previous])
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_stats_deleted(sender, instance, **kwargs):
+    """Remove a deleted recipe from the statistics of its user"""
+    adjust_stats(removed=[recipe_values(instance)])
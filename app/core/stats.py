@@ -0,0 +1,229 @@
+import math
+from collections import Counter
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.db import transaction
+from django.db.models import Count
+from django.db.models import F
+from django.db.models import Sum
+
+from core.models import Ingredient
+from core.models import Recipe
+from core.models import RecipeStats
+from core.models import RecipeValueCount
+from core.models import Tag
+
+
+# Recipe columns summarized by average and percentiles
+STATS_FIELDS = ('time_minutes', 'price')
+
+
+# Prices are rounded as the price column stores them
+PRICE_QUANTUM = Decimal('0.01')
+
+
+def recipe_values(recipe):
+    """Return the (user ID, time, price) a recipe contributes"""
+    return (
+        recipe.user_id,
+        int(recipe.time_minutes),
+        Decimal(str(recipe.price)).quantize(PRICE_QUANTUM),
+    )
+
+
+def _upsert(model, lookup, changes, create):
+    """Add changes to the row matching lookup, creating it if allowed
+
+    Rows are only created for additions, so removals running while a
+    user is being deleted cannot recreate the rows of that user.
+    """
+    updated = model.objects.filter(**lookup).update(**{
+        name: F(name) + delta for name, delta in changes.items()
+    })
+    if updated or not create:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **changes)
+    except IntegrityError:
+        # Created by a concurrent transaction in between
+        model.objects.filter(**lookup).update(**{
+            name: F(name) + delta for name, delta in changes.items()
+        })
+
+
+def adjust_stats(added=(), removed=()):
+    """Apply the recipes added and removed, as (user, time, price) rows
+
+    Totals and value counts are changed with one UPDATE per user and per
+    distinct value, whatever the number of recipes.
+    """
+    totals = {}
+    buckets = Counter()
+    for rows, sign in ((added, 1), (removed, -1)):
+        for user_id, time_minutes, price in rows:
+            count, time_total, price_total = totals.get(user_id, (0, 0, 0))
+            totals[user_id] = (
+                count + sign,
+                time_total + sign * time_minutes,
+                price_total + sign * price,
+            )
+            buckets[user_id, 'time_minutes', time_minutes] += sign
+            buckets[user_id, 'price', price] += sign
+
+    for user_id, (count, time_total, price_total) in totals.items():
+        if count or time_total or price_total:
+            _upsert(
+                RecipeStats,
+                {'user_id': user_id},
+                {
+                    'recipe_count': count,
+                    'time_minutes_total': time_total,
+                    'price_total': price_total,
+                },
+                create=count > 0,
+            )
+    for (user_id, field, value), count in buckets.items():
+        if count:
+            _upsert(
+                RecipeValueCount,
+                {'user_id': user_id, 'field': field, 'value': value},
+                {'count': count},
+                create=count > 0,
+            )
+
+
+def add_recipes(recipes):
+    """Count recipes created without a post_save signal, like bulk inserts
+
+    Recipes already counted by the signal receivers are skipped, so this
+    is safe to call whichever way the recipes were saved.
+    """
+    adjust_stats(added=[
+        recipe_values(recipe) for recipe in recipes
+        if not getattr(recipe, '_stats_counted', False)
+    ])
+
+
+def rebuild_stats(users=None):
+    """Recompute the totals and value counts from the recipes
+
+    Returns the number of users whose statistics were rebuilt.
+    """
+    recipes = Recipe.objects.all()
+    stats = RecipeStats.objects.all()
+    value_counts = RecipeValueCount.objects.all()
+    if users is not None:
+        recipes = recipes.filter(user__in=users)
+        stats = stats.filter(user__in=users)
+        value_counts = value_counts.filter(user__in=users)
+    stats.delete()
+    value_counts.delete()
+
+    totals = recipes.order_by().values('user').annotate(
+        recipe_count=Count('pk'),
+        time_minutes_total=Sum('time_minutes'),
+        price_total=Sum('price'),
+    )
+    RecipeStats.objects.bulk_create([
+        RecipeStats(
+            user_id=row['user'],
+            recipe_count=row['recipe_count'],
+            time_minutes_total=row['time_minutes_total'],
+            price_total=row['price_total'],
+        )
+        for row in totals
+    ])
+    for field in STATS_FIELDS:
+        rows = recipes.order_by().values('user', field).annotate(
+            count=Count('pk'),
+        )
+        RecipeValueCount.objects.bulk_create(
+            (
+                RecipeValueCount(
+                    user_id=row['user'],
+                    field=field,
+                    value=row[field],
+                    count=row['count'],
+                )
+                for row in rows.iterator()
+            ),
+            batch_size=1000,
+        )
+    return len(totals)
+
+
+def percentiles(value_counts, total):
+    """Return the nearest rank percentiles of a sorted (value, count) list"""
+    result = {}
+    ranks = sorted(
+        (max(math.ceil(percent / 100 * total), 1), percent)
+        for percent in settings.STATS_PERCENTILES
+    )
+    seen = 0
+    value_counts = iter(value_counts)
+    value = None
+    for rank, percent in ranks:
+        for value, count in value_counts:
+            seen += count
+            if seen >= rank:
+                break
+        result[f'p{percent}'] = value
+    return result
+
+
+def _summary(total, count, value_counts):
+    """Return the average and percentiles of one field"""
+    if not count:
+        return {'average': None, **{
+            f'p{percent}': None for percent in settings.STATS_PERCENTILES
+        }}
+    return {
+        'average': round(Decimal(total) / count, 2),
+        **percentiles(value_counts, count),
+    }
+
+
+def _top_items(model, user):
+    return list(
+        model.objects.filter(user=user, recipe_count__gt=0)
+        .order_by('-recipe_count', 'id')
+        .values('id', 'name', 'recipe_count')[:settings.STATS_TOP_ITEMS]
+    )
+
+
+def get_user_stats(user):
+    """Return the recipe statistics of a user from the maintained tables
+
+    Costs four indexed queries, none of them reading the recipes.
+    """
+    stats = RecipeStats.objects.filter(user=user).first()
+    if stats is None:
+        stats = RecipeStats(user=user)
+
+    value_counts = {field: [] for field in STATS_FIELDS}
+    rows = RecipeValueCount.objects.filter(
+        user=user,
+        count__gt=0,
+    ).order_by('field', 'value').values_list('field', 'value', 'count')
+    for field, value, count in rows:
+        value_counts[field].append((value, count))
+
+    return {
+        'recipe_count': stats.recipe_count,
+        'time_minutes': _summary(
+            stats.time_minutes_total,
+            stats.recipe_count,
+            [(int(value), count) for value, count
+             in value_counts['time_minutes']],
+        ),
+        'price': _summary(
+            stats.price_total,
+            stats.recipe_count,
+            value_counts['price'],
+        ),
+        'top_tags': _top_items(Tag, user),
+        'top_ingredients': _top_items(Ingredient, user),
+    }
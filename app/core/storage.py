@@ -0,0 +1,110 @@
+import fcntl
+import hashlib
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+# Content addressed names, and the derivatives stored next to them, never
+# change content so they can be cached by clients and CDNs forever
+CONTENT_ADDRESSED_NAME = re.compile(
+    r'(^|/)[0-9a-f]{2}/(?P<hash>[0-9a-f]{64})([./]|$)',
+)
+
+
+# Lock file in the storage root, held while a blob is reused or deleted
+LOCK_NAME = '.content-addressed.lock'
+
+
+def is_content_addressed(name):
+    """Return whether a stored file name is derived from its content"""
+    return bool(CONTENT_ADDRESSED_NAME.search(name))
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage naming files by the SHA-256 of their content
+
+    The directory and extension of the requested name are kept, and the
+    base name is replaced by <hash[:2]>/<hash>. The content is hashed as
+    it is written to a temporary file, which is then moved to its hash
+    name. Saving a file whose content is already stored only refreshes
+    the modification time of the existing blob, so an image attached to
+    many recipes is stored once and gc_recipe_images sees it in use.
+
+    Names already under a content addressed name, like the derivatives
+    of an image, are written as they are.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        """Return the name as is, the same name means the same content"""
+        return name
+
+    @contextmanager
+    def lock(self):
+        """Hold the lock serializing blob reuse and garbage collection"""
+        os.makedirs(self.location, exist_ok=True)
+        with open(os.path.join(self.location, LOCK_NAME), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write_temp(self, directory, content, digest=None):
+        """Write content to a temporary file in directory, return its path
+
+        The file is moved into place by the caller, so that concurrent
+        uploads of the same content cannot corrupt the blob.
+        """
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                for chunk in content.chunks():
+                    if digest is not None:
+                        digest.update(chunk)
+                    temp_file.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        return temp_path
+
+    def _save(self, name, content):
+        if is_content_addressed(name):
+            full_path = self.path(name)
+            temp_path = self._write_temp(os.path.dirname(full_path), content)
+            os.replace(temp_path, full_path)
+            return name
+
+        directory, base_name = os.path.split(name)
+        extension = os.path.splitext(base_name)[1].lower()
+        digest = hashlib.sha256()
+        temp_path = self._write_temp(self.path(directory), content, digest)
+        try:
+            content_hash = digest.hexdigest()
+            name = os.path.join(
+                directory,
+                content_hash[:2],
+                f'{content_hash}{extension}',
+            ).replace('\\', '/')
+            full_path = self.path(name)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with self.lock():
+                if os.path.exists(full_path):
+                    os.utime(full_path)
+                else:
+                    os.replace(temp_path, full_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return name
+
+
+recipe_image_storage = ContentAddressedStorage()
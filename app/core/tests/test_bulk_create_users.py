@@ -0,0 +1,108 @@
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+
+from core.hashers import hashing_pool
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class TestBulkCreateUsers(TestCase):
+
+    def setUp(self):
+        patcher = patch.object(hashing_pool, 'max_workers', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        get_user_model().objects.create_user('taken@gmail.com', 'password')
+
+    def test_create_users(self):
+        """Test users are created with hashed passwords and tokens"""
+        result = get_user_model().objects.bulk_create_users([
+            {'email': 'one@GMAIL.com', 'password': 'first', 'name': 'One'},
+            {'email': 'two@gmail.com', 'password': 'second'},
+            {'email': 'three@gmail.com'},
+        ], batch_size=2)
+
+        self.assertEqual(len(result.created), 3)
+        self.assertEqual(result.duplicates, [])
+        user = get_user_model().objects.get(email='one@gmail.com')
+        self.assertEqual(user.name, 'One')
+        self.assertTrue(user.check_password('first'))
+        self.assertTrue(
+            get_user_model().objects.get(email='two@gmail.com')
+            .check_password('second')
+        )
+        self.assertFalse(
+            get_user_model().objects.get(email='three@gmail.com')
+            .has_usable_password()
+        )
+        self.assertEqual(
+            Token.objects.filter(
+                user__in=[user.pk for user in result.created],
+            ).count(),
+            3,
+        )
+
+    def test_duplicates_reported(self):
+        """Test duplicate and missing emails do not abort the batch"""
+        result = get_user_model().objects.bulk_create_users([
+            {'email': 'taken@gmail.com', 'password': 'password'},
+            {'email': 'new@gmail.com', 'password': 'password'},
+            {'email': 'new@gmail.com', 'password': 'password'},
+            {'password': 'password'},
+        ], create_tokens=False)
+
+        self.assertEqual(
+            [user.email for user in result.created],
+            ['new@gmail.com'],
+        )
+        self.assertEqual(
+            sorted(result.duplicates),
+            ['new@gmail.com', 'taken@gmail.com'],
+        )
+        self.assertEqual(result.invalid, [3])
+        self.assertFalse(Token.objects.exists())
+
+    def test_concurrent_duplicate(self):
+        """Test an email taken during the insert only skips that user"""
+        manager = get_user_model().objects
+        taken = manager.filter(email='taken@gmail.com')
+        # Hide the existing user from the duplicate check
+        with patch.object(type(manager), '_taken_emails', return_value=set()):
+            result = manager.bulk_create_users([
+                {'email': 'taken@gmail.com', 'password': 'password'},
+                {'email': 'new@gmail.com', 'password': 'password'},
+            ], create_tokens=False)
+
+        self.assertEqual(result.duplicates, ['taken@gmail.com'])
+        self.assertEqual(
+            [user.email for user in result.created],
+            ['new@gmail.com'],
+        )
+        self.assertEqual(taken.count(), 1)
+
+    def test_command(self):
+        """Test the command creates the users of a CSV file"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'users.csv')
+            with open(path, 'w') as stream:
+                stream.write(
+                    'email,password,name\n'
+                    'one@gmail.com,first,One\n'
+                    'taken@gmail.com,password,Taken\n'
+                )
+            out = StringIO()
+            err = StringIO()
+            call_command('bulk_create_users', path, stdout=out, stderr=err)
+
+        self.assertIn('Created 1 users', out.getvalue())
+        self.assertIn('taken@gmail.com already exists', err.getvalue())
+        user = get_user_model().objects.get(email='one@gmail.com')
+        self.assertTrue(user.check_password('first'))
+        self.assertTrue(Token.objects.filter(user=user).exists())
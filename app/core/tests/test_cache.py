@@ -0,0 +1,33 @@
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from core.cache import LRUCache
+
+
+class TestLRUCache(SimpleTestCase):
+
+    def test_evicts_least_recently_used(self):
+        """Test the oldest unused entry is evicted when full"""
+        cache = LRUCache(max_size=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    @patch('time.monotonic')
+    def test_expires_after_ttl(self, monotonic):
+        """Test entries are not returned after their time to live"""
+        monotonic.return_value = 100
+        cache = LRUCache(ttl=10)
+        cache.set('a', 1)
+
+        monotonic.return_value = 105
+        self.assertEqual(cache.get('a'), 1)
+        monotonic.return_value = 111
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
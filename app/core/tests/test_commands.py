@@ -1,23 +1,69 @@
+from io import StringIO
 from unittest.mock import patch
 
 from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connections
 from django.db.utils import OperationalError
 from django.test import TestCase
 
+from core.db import health
+
 
 class TestCommand(TestCase):
 
+    def setUp(self):
+        patcher = patch.object(connections['default'], 'ensure_connection')
+        self.ensure_connection = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def wait_for_db(self, *args):
+        """Run the wait_for_db command and return its output"""
+        out = StringIO()
+        call_command('wait_for_db', *args, stdout=out)
+        return out.getvalue()
+
     def test_wait_for_db_ready(self):
         """Test waiting for DB when DB is available"""
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.return_value = True
-            call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 1)
+        self.wait_for_db()
+        self.assertEqual(self.ensure_connection.call_count, 1)
 
     @patch('time.sleep', return_value=True)
     def test_wait_for_db_coming_up(self, ts):
         """Test waiting for DB when it's still coming up"""
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.side_effect = [OperationalError] * 5 + [True]
-            call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 6)
+        self.ensure_connection.side_effect = [OperationalError] * 5 + [None]
+        self.wait_for_db()
+        self.assertEqual(self.ensure_connection.call_count, 6)
+
+        delays = [call[0][0] for call in ts.call_args_list]
+        self.assertEqual(len(delays), 5)
+        for attempt, delay in enumerate(delays):
+            self.assertLessEqual(delay, 0.1 * 2 ** attempt)
+
+    @patch('time.sleep', return_value=True)
+    def test_wait_for_db_timeout(self, ts):
+        """Test the command fails once the timeout is reached"""
+        self.ensure_connection.side_effect = OperationalError('refused')
+        with self.assertRaises(CommandError):
+            self.wait_for_db('--timeout', '0')
+        self.assertEqual(self.ensure_connection.call_count, 1)
+
+    @patch('time.sleep', return_value=True)
+    def test_wait_for_migrations(self, ts):
+        """Test waiting until the migrations are applied"""
+        with patch.object(
+            health,
+            'pending_migrations',
+            side_effect=[['core.0001_initial'], []],
+        ) as pending:
+            self.wait_for_db('--check-migrations')
+        self.assertEqual(pending.call_count, 2)
+
+    def test_backoff_delays(self):
+        """Test retry delays double up to the maximum"""
+        with patch('random.uniform', side_effect=lambda low, high: high):
+            delays = health.backoff_delays(0.5, 3)
+            self.assertEqual(
+                [next(delays) for _ in range(5)],
+                [0.5, 1, 2, 3, 3],
+            )
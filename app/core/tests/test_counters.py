@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from core import models
+
+
+class TestRecipeCounts(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'somepassword',
+        )
+        self.tag1 = models.Tag.objects.create(user=self.user, name='Vegan')
+        self.tag2 = models.Tag.objects.create(user=self.user, name='Quick')
+        self.ingredient = models.Ingredient.objects.create(
+            user=self.user,
+            name='Salt',
+        )
+        self.recipe = self.create_recipe()
+
+    def create_recipe(self):
+        """Create and return a sample recipe"""
+        return models.Recipe.objects.create(
+            user=self.user,
+            name='Sample recipe',
+            time_minutes=10,
+            price=5.0,
+        )
+
+    def assertCounts(self, tag1, tag2, ingredient):
+        """Assert the stored recipe counts of the sample items"""
+        for item, count in (
+            (self.tag1, tag1),
+            (self.tag2, tag2),
+            (self.ingredient, ingredient),
+        ):
+            item.refresh_from_db()
+            self.assertEqual(item.recipe_count, count)
+
+    def test_add_and_remove(self):
+        """Test counts follow tags and ingredients added and removed"""
+        self.recipe.tags.add(self.tag1, self.tag2)
+        self.recipe.ingredients.add(self.ingredient)
+        self.recipe.tags.add(self.tag1)
+        self.assertCounts(1, 1, 1)
+
+        self.recipe.tags.remove(self.tag1)
+        self.recipe.tags.remove(self.tag1)
+        self.assertCounts(0, 1, 1)
+
+    def test_set_and_clear(self):
+        """Test counts follow a recipe's relations being replaced"""
+        self.recipe.tags.set([self.tag1])
+        self.recipe.tags.set([self.tag2])
+        self.assertCounts(0, 1, 0)
+
+        self.recipe.tags.clear()
+        self.assertCounts(0, 0, 0)
+
+    def test_reverse_relation(self):
+        """Test counts follow recipes added from the item side"""
+        other = self.create_recipe()
+        self.tag1.recipe_set.add(self.recipe, other)
+        self.assertCounts(2, 0, 0)
+
+        self.tag1.recipe_set.clear()
+        self.assertCounts(0, 0, 0)
+
+    def test_delete_recipe(self):
+        """Test deleting recipes releases their counts"""
+        other = self.create_recipe()
+        for recipe in (self.recipe, other):
+            recipe.tags.add(self.tag1)
+            recipe.ingredients.add(self.ingredient)
+
+        self.recipe.delete()
+        self.assertCounts(1, 0, 1)
+
+        models.Recipe.objects.all().delete()
+        self.assertCounts(0, 0, 0)
+
+    def test_rebuild_recipe_counts(self):
+        """Test the rebuild command fixes counts that drifted"""
+        self.recipe.tags.add(self.tag1)
+        models.Tag.objects.update(recipe_count=7)
+
+        call_command('rebuild_recipe_counts')
+        self.assertCounts(1, 0, 0)
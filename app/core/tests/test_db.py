@@ -0,0 +1,127 @@
+import os
+import tempfile
+import threading
+
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase
+
+from core.db import pool
+from core.db.config import database_settings
+from core.db.pool import PoolTimeout
+
+
+class TestDatabaseSettings(SimpleTestCase):
+
+    def test_persistent_connections(self):
+        """Test connections persist and are health checked by default"""
+        database = database_settings({'DB_HOST': 'db', 'DB_NAME': 'app'})
+
+        self.assertEqual(database['ENGINE'], 'core.db.backends.postgresql')
+        self.assertEqual(database['HOST'], 'db')
+        self.assertEqual(database['CONN_MAX_AGE'], 60)
+        self.assertTrue(database['CONN_HEALTH_CHECKS'])
+        self.assertNotIn('POOL', database)
+
+    def test_pool(self):
+        """Test a pool size enables the pool and per request connections"""
+        database = database_settings({
+            'DB_ENGINE': 'sqlite3',
+            'DB_CONN_MAX_AGE': '600',
+            'DB_POOL_SIZE': '5',
+            'DB_POOL_TIMEOUT': '2.5',
+        })
+
+        self.assertEqual(database['ENGINE'], 'core.db.backends.sqlite3')
+        self.assertEqual(database['CONN_MAX_AGE'], 0)
+        self.assertEqual(database['POOL'], {'MAX_SIZE': 5, 'TIMEOUT': 2.5})
+
+
+class TestConnectionPool(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(pool.pools.clear)
+        self.connections = ConnectionHandler({
+            'default': {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': ':memory:',
+            },
+            'pooled': {
+                'ENGINE': 'core.db.backends.sqlite3',
+                'NAME': os.path.join(directory.name, 'pooled.sqlite3'),
+                'CONN_HEALTH_CHECKS': True,
+                'POOL': {'MAX_SIZE': 1, 'TIMEOUT': 0.05},
+            },
+            'persistent': {
+                'ENGINE': 'core.db.backends.sqlite3',
+                'NAME': os.path.join(directory.name, 'persistent.sqlite3'),
+                'CONN_MAX_AGE': None,
+                'CONN_HEALTH_CHECKS': True,
+            },
+        })
+        self.addCleanup(self.connections.close_all)
+
+    def query(self, alias):
+        """Run a query on a connection of the handler"""
+        with self.connections[alias].cursor() as cursor:
+            cursor.execute('SELECT 1')
+            return cursor.fetchone()[0]
+
+    def test_connection_reused(self):
+        """Test a closed connection goes back to the pool and is reused"""
+        self.query('pooled')
+        self.connections['pooled'].close()
+        self.assertEqual(pool.pool_stats()['pooled']['idle'], 1)
+        self.query('pooled')
+
+        stats = pool.pool_stats()['pooled']
+        self.assertEqual(stats['connects'], 1)
+        self.assertEqual(stats['checked_out'], 1)
+        self.assertEqual(stats['idle'], 0)
+
+    def test_pool_exhausted(self):
+        """Test waiting for a connection times out when the pool is full"""
+        self.query('pooled')
+        errors = []
+
+        def query_in_thread():
+            try:
+                self.query('pooled')
+            except PoolTimeout as error:
+                errors.append(error)
+            finally:
+                self.connections['pooled'].close()
+
+        thread = threading.Thread(target=query_in_thread)
+        thread.start()
+        thread.join()
+
+        self.assertEqual(len(errors), 1)
+        stats = pool.pool_stats()['pooled']
+        self.assertEqual(stats['waits'], 1)
+        self.assertEqual(stats['timeouts'], 1)
+        self.assertEqual(stats['size'], 1)
+
+    def test_dead_pooled_connection_replaced(self):
+        """Test an idle connection failing its health check is replaced"""
+        self.query('pooled')
+        raw_connection = self.connections['pooled'].connection
+        self.connections['pooled'].close()
+        raw_connection.close()
+
+        self.assertEqual(self.query('pooled'), 1)
+        stats = pool.pool_stats()['pooled']
+        self.assertEqual(stats['connects'], 2)
+        self.assertEqual(stats['size'], 1)
+
+    def test_dead_persistent_connection_replaced(self):
+        """Test a persistent connection is checked when a request starts"""
+        self.query('persistent')
+        connection = self.connections['persistent']
+        raw_connection = connection.connection
+        raw_connection.close()
+        connection.close_if_unusable_or_obsolete()
+
+        self.assertEqual(self.query('persistent'), 1)
+        self.assertIsNot(connection.connection, raw_connection)
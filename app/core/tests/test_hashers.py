@@ -0,0 +1,105 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.test import override_settings
+
+from core.hashers import ConfiguredPBKDF2PasswordHasher
+from core.hashers import PasswordHashingPool
+from core.hashers import hashing_pool
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class TestPasswordHashing(TestCase):
+
+    def setUp(self):
+        # Hash in the test process, so the overridden settings apply
+        patcher = patch.object(hashing_pool, 'max_workers', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'somepassword',
+        )
+
+    def test_iterations_from_settings(self):
+        """Test passwords are hashed with the configured iterations"""
+        self.assertTrue(
+            self.user.password.startswith('pbkdf2_sha256$1000$'),
+        )
+        self.assertTrue(self.user.check_password('somepassword'))
+        self.assertFalse(self.user.check_password('wrongpassword'))
+
+    def test_rehash_on_login(self):
+        """Test a password with outdated iterations is rehashed on login"""
+        with override_settings(PASSWORD_HASH_ITERATIONS=2000):
+            self.assertFalse(self.user.check_password('wrongpassword'))
+            self.user.refresh_from_db()
+            self.assertIn('$1000$', self.user.password)
+
+            response = self.client.post(
+                '/api/user/token/',
+                {'email': 'test@gmail.com', 'password': 'somepassword'},
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(
+            self.user.password.startswith('pbkdf2_sha256$2000$'),
+        )
+
+    def test_wrong_password_hardens_runtime(self):
+        """Test mismatches on outdated hashes take the current hash time"""
+        encoded = self.user.password
+        with override_settings(PASSWORD_HASH_ITERATIONS=2000), \
+                patch.object(
+                    ConfiguredPBKDF2PasswordHasher,
+                    'harden_runtime',
+                ) as harden_runtime:
+            self.assertFalse(self.user.check_password('wrongpassword'))
+
+        harden_runtime.assert_called_once_with('wrongpassword', encoded)
+
+    def test_unusable_password(self):
+        """Test users without a password cannot log in"""
+        user = get_user_model().objects.create_user('other@gmail.com')
+
+        self.assertFalse(user.has_usable_password())
+        self.assertFalse(user.check_password(''))
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class TestPasswordHashingPool(TestCase):
+
+    def test_pool_hashes_in_worker_processes(self):
+        """Test a pool with workers hashes and checks passwords"""
+        pool = PasswordHashingPool(max_workers=1, max_pending=2)
+        try:
+            encoded = pool.make_password('somepassword')
+
+            # Spawned workers read the settings module, not the overrides
+            self.assertTrue(encoded.startswith('pbkdf2_sha256$'))
+            self.assertEqual(
+                pool.check_password('somepassword', encoded),
+                (True, False),
+            )
+            self.assertEqual(
+                pool.check_password('wrongpassword', encoded),
+                (False, False),
+            )
+        finally:
+            pool.shutdown()
+
+    def test_benchmark_password_hashing(self):
+        """Test the benchmark reports the login throughput"""
+        out = StringIO()
+        call_command(
+            'benchmark_password_hashing',
+            count=4,
+            workers=0,
+            stdout=out,
+        )
+
+        self.assertIn('logins/s per core', out.getvalue())
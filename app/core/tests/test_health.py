@@ -0,0 +1,61 @@
+from unittest.mock import patch
+
+from django.db.utils import OperationalError
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+
+from core.db import health
+
+
+class TestHealthEndpoints(TestCase):
+
+    def test_healthz(self):
+        """Test the liveness probe runs no query"""
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('healthz'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, b'ok')
+
+    def test_readyz(self):
+        """Test the readiness probe when the database is migrated"""
+        response = self.client.get(reverse('readyz'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json()['checks'],
+            {'database': 'ok', 'migrations': 'ok'},
+        )
+
+    def test_readyz_database_unavailable(self):
+        """Test the readiness probe fails when the database is down"""
+        with patch.object(
+            health,
+            'check_database',
+            side_effect=OperationalError('refused'),
+        ):
+            response = self.client.get(reverse('readyz'))
+
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+        self.assertEqual(
+            response.json()['checks'],
+            {'database': 'unavailable'},
+        )
+
+    def test_readyz_migrations_pending(self):
+        """Test the readiness probe fails with migrations pending"""
+        with patch.object(
+            health,
+            'pending_migrations',
+            return_value=['core.0014_example'],
+        ):
+            response = self.client.get(reverse('readyz'))
+
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+        self.assertEqual(response.json()['checks']['migrations'], '1 pending')
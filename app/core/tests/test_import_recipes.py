@@ -0,0 +1,105 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.models import Ingredient
+from core.models import Recipe
+from core.models import Tag
+
+
+class TestImportRecipes(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'somepassword',
+        )
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_file(self, name, content):
+        """Write content to a file in the temporary directory"""
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as stream:
+            stream.write(content)
+        return path
+
+    def import_recipes(self, path, *args):
+        """Run the import command and return its output"""
+        out = StringIO()
+        call_command(
+            'import_recipes',
+            self.user.email,
+            path,
+            *args,
+            stdout=out,
+            stderr=StringIO(),
+        )
+        return out.getvalue()
+
+    def test_import_ndjson(self):
+        """Test importing recipes, reusing and creating tags by name"""
+        records = [
+            {'name': 'Tofu scramble', 'time_minutes': 10, 'price': '4.50',
+             'tags': ['Vegan', 'Breakfast'], 'ingredients': ['Tofu']},
+            {'name': 'Stir fry', 'time_minutes': 20, 'price': '6.00',
+             'tags': [{'id': 99, 'name': 'Vegan'}]},
+            {'name': '', 'time_minutes': 5, 'price': '1.00'},
+        ]
+        path = self.write_file(
+            'recipes.ndjson',
+            '\n'.join(json.dumps(record) for record in records),
+        )
+
+        output = self.import_recipes(path, '--batch-size', '2')
+        self.assertIn('Import finished: 2 recipes, 1 failed.', output)
+        self.assertIn('rows/s', output)
+
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(
+            sorted(Tag.objects.values_list('name', flat=True)),
+            ['Breakfast', 'Vegan'],
+        )
+        self.tag.refresh_from_db()
+        self.assertEqual(self.tag.recipe_count, 2)
+        self.assertTrue(Ingredient.objects.filter(name='Tofu').exists())
+
+    def test_import_csv(self):
+        """Test importing recipes from a CSV file"""
+        path = self.write_file(
+            'recipes.csv',
+            'name,time_minutes,price,link,tags,ingredients\n'
+            'Hummus,15,3.00,,Vegan;Dip,Chickpeas;Tahini\n',
+        )
+
+        self.import_recipes(path)
+        recipe = Recipe.objects.get(name='Hummus')
+        self.assertEqual(
+            sorted(recipe.ingredients.values_list('name', flat=True)),
+            ['Chickpeas', 'Tahini'],
+        )
+        self.assertEqual(recipe.tags.count(), 2)
+
+    def test_import_resumes_from_checkpoint(self):
+        """Test records before the checkpoint are not imported again"""
+        path = self.write_file('recipes.ndjson', '\n'.join(
+            json.dumps({'name': name, 'time_minutes': 5, 'price': '1.00'})
+            for name in ('Soup', 'Salad', 'Stew')
+        ))
+        checkpoint = self.write_file('checkpoint', '2')
+
+        self.import_recipes(path, '--checkpoint', checkpoint)
+        self.assertEqual(
+            list(Recipe.objects.values_list('name', flat=True)),
+            ['Stew'],
+        )
+        with open(checkpoint) as stream:
+            self.assertEqual(stream.read(), '3')
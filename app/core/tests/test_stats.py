@@ -0,0 +1,118 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from core import models
+from core.stats import add_recipes
+from core.stats import get_user_stats
+from core.stats import percentiles
+
+
+class TestRecipeStats(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'somepassword',
+        )
+
+    def create_recipe(self, time_minutes, price):
+        """Create and return a recipe with the given time and price"""
+        return models.Recipe.objects.create(
+            user=self.user,
+            name='Sample recipe',
+            time_minutes=time_minutes,
+            price=price,
+        )
+
+    def value_counts(self, field):
+        """Return the stored non zero value counts of a field"""
+        return dict(models.RecipeValueCount.objects.filter(
+            user=self.user,
+            field=field,
+            count__gt=0,
+        ).values_list('value', 'count'))
+
+    def test_stats_follow_recipe_changes(self):
+        """Test creating, updating and deleting recipes updates the stats"""
+        first = self.create_recipe(10, 5.0)
+        second = self.create_recipe(30, '2.50')
+        second.time_minutes = 10
+        second.save()
+        first.delete()
+
+        stats = models.RecipeStats.objects.get(user=self.user)
+        self.assertEqual(stats.recipe_count, 1)
+        self.assertEqual(stats.time_minutes_total, 10)
+        self.assertEqual(stats.price_total, Decimal('2.50'))
+        self.assertEqual(self.value_counts('time_minutes'), {10: 1})
+        self.assertEqual(self.value_counts('price'), {Decimal('2.50'): 1})
+
+    def test_add_recipes_skips_counted(self):
+        """Test recipes already counted by the signals are not counted twice"""
+        counted = self.create_recipe(10, 5.0)
+        uncounted = models.Recipe(
+            user=self.user,
+            name='Bulk recipe',
+            time_minutes=20,
+            price=1.0,
+        )
+        models.Recipe.objects.bulk_create([uncounted])
+
+        add_recipes([counted, uncounted])
+
+        stats = models.RecipeStats.objects.get(user=self.user)
+        self.assertEqual(stats.recipe_count, 2)
+        self.assertEqual(stats.time_minutes_total, 30)
+
+    def test_percentiles(self):
+        """Test nearest rank percentiles are read from value counts"""
+        value_counts = [(5, 4), (10, 4), (60, 2)]
+
+        self.assertEqual(
+            percentiles(value_counts, 10),
+            {'p50': 10, 'p90': 60},
+        )
+
+    def test_get_user_stats(self):
+        """Test the summary of a user's recipes"""
+        for time_minutes in (10, 20, 30, 40):
+            self.create_recipe(time_minutes, 4.0)
+        tag = models.Tag.objects.create(user=self.user, name='Quick')
+        models.Recipe.objects.first().tags.add(tag)
+
+        stats = get_user_stats(self.user)
+
+        self.assertEqual(stats['recipe_count'], 4)
+        self.assertEqual(stats['time_minutes'], {
+            'average': 25,
+            'p50': 20,
+            'p90': 40,
+        })
+        self.assertEqual(stats['price']['average'], Decimal('4.00'))
+        self.assertEqual(
+            stats['top_tags'],
+            [{'id': tag.id, 'name': 'Quick', 'recipe_count': 1}],
+        )
+        self.assertEqual(stats['top_ingredients'], [])
+
+    def test_rebuild_recipe_stats(self):
+        """Test the rebuild command fixes drifted statistics"""
+        self.create_recipe(10, 5.0)
+        self.create_recipe(20, 5.0)
+        models.RecipeStats.objects.update(recipe_count=7)
+        models.RecipeValueCount.objects.update(count=3)
+
+        out = StringIO()
+        call_command('rebuild_recipe_stats', stdout=out)
+
+        self.assertIn('Rebuilt 1 users', out.getvalue())
+        self.assertEqual(
+            models.RecipeStats.objects.get(user=self.user).recipe_count,
+            2,
+        )
+        self.assertEqual(self.value_counts('time_minutes'), {10: 1, 20: 1})
+        self.assertEqual(self.value_counts('price'), {Decimal('5.00'): 2})
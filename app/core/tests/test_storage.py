@@ -0,0 +1,291 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.http import Http404
+from django.test import RequestFactory
+from django.test import TestCase
+from django.test import override_settings
+
+from core import models
+from core.management.commands.gc_recipe_images import Command
+from core.storage import ContentAddressedStorage
+from core.storage import is_content_addressed
+from core.views import IMMUTABLE_CACHE_CONTROL
+from core.views import serve_media
+
+
+class TestMediaRoot(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+        self.storage = ContentAddressedStorage()
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root)
+
+
+class TestContentAddressedStorage(TestMediaRoot):
+
+    def test_save_names_file_by_content(self):
+        """Test files are named by the hash of their content"""
+        name = self.storage.save('uploads/recipe/a.JPG', ContentFile(b'one'))
+
+        self.assertRegex(
+            name,
+            r'^uploads/recipe/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$',
+        )
+        self.assertTrue(is_content_addressed(name))
+        with self.storage.open(name) as stored:
+            self.assertEqual(stored.read(), b'one')
+
+    def test_save_same_content_once(self):
+        """Test saving the same content twice stores a single file"""
+        name1 = self.storage.save('uploads/recipe/a.jpg', ContentFile(b'one'))
+        name2 = self.storage.save('uploads/recipe/b.jpg', ContentFile(b'one'))
+        name3 = self.storage.save('uploads/recipe/c.jpg', ContentFile(b'two'))
+
+        self.assertEqual(name1, name2)
+        self.assertNotEqual(name1, name3)
+        self.assertEqual(
+            len(os.listdir(os.path.dirname(self.storage.path(name1)))),
+            1,
+        )
+
+    def test_save_same_content_refreshes_mtime(self):
+        """Test saving existing content marks the stored file as recent"""
+        name = self.storage.save('uploads/recipe/a.jpg', ContentFile(b'one'))
+        path = self.storage.path(name)
+        os.utime(path, (0, 0))
+
+        self.storage.save('uploads/recipe/b.jpg', ContentFile(b'one'))
+
+        self.assertGreater(os.path.getmtime(path), 0)
+
+    def test_save_derivative_keeps_name(self):
+        """Test files under a content addressed name keep their name"""
+        name = self.storage.save('uploads/recipe/a.jpg', ContentFile(b'one'))
+        derivative = f'{os.path.splitext(name)[0]}/thumbnail.webp'
+
+        self.assertEqual(
+            self.storage.save(derivative, ContentFile(b'small')),
+            derivative,
+        )
+        with self.storage.open(derivative) as stored:
+            self.assertEqual(stored.read(), b'small')
+
+    def test_is_content_addressed(self):
+        """Test derivatives of content addressed files are recognized"""
+        stem = 'uploads/recipe/ab/' + 'ab' * 32
+        self.assertTrue(is_content_addressed(f'{stem}.jpg'))
+        self.assertTrue(is_content_addressed(f'{stem}/thumbnail.webp'))
+        self.assertFalse(is_content_addressed('uploads/recipe/some-uuid.jpg'))
+
+    def test_serve_media_immutable(self):
+        """Test content addressed files are served with long cache headers"""
+        name = self.storage.save('uploads/recipe/a.jpg', ContentFile(b'one'))
+        self.storage.save('uploads/recipe/b.jpg', ContentFile(b'two'))
+        legacy = self.storage.path('uploads/recipe/legacy.jpg')
+        with open(legacy, 'wb') as legacy_file:
+            legacy_file.write(b'three')
+        request = RequestFactory().get('/')
+
+        response = serve_media(request, name)
+        legacy_response = serve_media(request, 'uploads/recipe/legacy.jpg')
+
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+        self.assertNotEqual(
+            legacy_response['Cache-Control'],
+            IMMUTABLE_CACHE_CONTROL,
+        )
+
+
+class TestGcRecipeImages(TestMediaRoot):
+
+    def setUp(self):
+        super().setUp()
+        user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'somepassword',
+        )
+        self.recipe = models.Recipe.objects.create(
+            user=user,
+            name='Sample recipe',
+            time_minutes=10,
+            price=5.0,
+        )
+
+    def save_image(self, content):
+        """Save an image with a derivative and return its name"""
+        name = self.storage.save('uploads/recipe/a.jpg', ContentFile(content))
+        self.storage.save(
+            f'{os.path.splitext(name)[0]}/thumbnail.webp',
+            ContentFile(content),
+        )
+        return name
+
+    def test_gc_deletes_orphans_only(self):
+        """Test unreferenced images and their derivatives are deleted"""
+        kept = self.save_image(b'kept')
+        orphan = self.save_image(b'orphan')
+        self.recipe.image = kept
+        self.recipe.save()
+
+        out = StringIO()
+        call_command('gc_recipe_images', grace=0, stdout=out)
+
+        self.assertIn('Deleted 2 files', out.getvalue())
+        self.assertTrue(self.storage.exists(kept))
+        self.assertTrue(self.storage.exists(os.path.splitext(kept)[0]))
+        self.assertFalse(self.storage.exists(orphan))
+        self.assertFalse(self.storage.exists(os.path.splitext(orphan)[0]))
+
+    def test_gc_keeps_recent_and_dry_run(self):
+        """Test recent orphans and dry runs delete nothing"""
+        orphan = self.save_image(b'orphan')
+
+        call_command('gc_recipe_images', stdout=StringIO())
+        call_command('gc_recipe_images', grace=0, dry_run=True,
+                     stdout=StringIO())
+
+        self.assertTrue(self.storage.exists(orphan))
+
+    def test_gc_keeps_images_referenced_during_run(self):
+        """Test images referenced after the scan started are kept"""
+        image = self.save_image(b'reused')
+        self.recipe.image = image
+        self.recipe.save()
+        stale = (0, 0)
+        os.utime(self.storage.path(image), stale)
+        os.utime(self.storage.path(os.path.splitext(image)[0]), stale)
+
+        with patch.object(Command, 'referenced_images', return_value=set()):
+            call_command('gc_recipe_images', grace=0, stdout=StringIO())
+
+        self.assertTrue(self.storage.exists(image))
+        self.assertTrue(self.storage.exists(os.path.splitext(image)[0]))
+
+
+class TestServeMedia(TestMediaRoot):
+
+    def setUp(self):
+        super().setUp()
+        self.name = self.storage.save(
+            'uploads/recipe/a.jpg',
+            ContentFile(b'0123456789'),
+        )
+        self.factory = RequestFactory()
+
+    def serve(self, **headers):
+        """Serve the sample file with the given request headers"""
+        return serve_media(self.factory.get('/', **headers), self.name)
+
+    def test_serve_whole_file(self):
+        """Test a file is streamed with validators and its type"""
+        response = self.serve()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertTrue(response.has_header('ETag'))
+        self.assertTrue(response.has_header('Last-Modified'))
+
+    def test_serve_range(self):
+        """Test a byte range of a file is served"""
+        response = self.serve(HTTP_RANGE='bytes=2-4')
+        suffix = self.serve(HTTP_RANGE='bytes=-3')
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'234')
+        self.assertEqual(response['Content-Range'], 'bytes 2-4/10')
+        self.assertEqual(response['Content-Length'], '3')
+        self.assertEqual(b''.join(suffix.streaming_content), b'789')
+
+    def test_serve_range_not_satisfiable(self):
+        """Test a range past the end of the file is refused"""
+        response = self.serve(HTTP_RANGE='bytes=20-')
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+
+    def test_serve_range_stale_if_range(self):
+        """Test the whole file is served when If-Range does not match"""
+        response = self.serve(HTTP_RANGE='bytes=2-4', HTTP_IF_RANGE='"old"')
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_serve_not_modified(self):
+        """Test conditional requests are answered without the file"""
+        response = self.serve()
+
+        by_etag = self.serve(HTTP_IF_NONE_MATCH=response['ETag'])
+        by_date = self.serve(HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+
+        self.assertEqual(by_etag.status_code, 304)
+        self.assertEqual(by_date.status_code, 304)
+
+    def test_serve_derivative_etag(self):
+        """Test derivatives of different originals have different ETags"""
+        other = self.storage.save('uploads/recipe/b.jpg', ContentFile(b'two'))
+        request = self.factory.get('/')
+        etags = set()
+        for name in (self.name, other):
+            stem = os.path.splitext(name)[0]
+            self.storage.save(f'{stem}/thumbnail.webp', ContentFile(b'small'))
+            self.storage.save(f'{stem}/large.webp', ContentFile(b'large'))
+            for size in ('thumbnail', 'large'):
+                response = serve_media(request, f'{stem}/{size}.webp')
+                etags.add(response['ETag'])
+
+        self.assertEqual(len(etags), 4)
+
+    def test_serve_missing_file(self):
+        """Test missing files are not found"""
+        request = self.factory.get('/')
+        with self.assertRaises(Http404):
+            serve_media(request, 'uploads/recipe/missing.jpg')
+        with self.assertRaises(Http404):
+            serve_media(request, 'uploads/recipe')
+
+    @override_settings(MEDIA_SENDFILE_BACKEND='x-accel-redirect')
+    def test_serve_x_accel_redirect(self):
+        """Test the file is handed to nginx when it is configured"""
+        response = self.serve()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            f'/protected-media/{self.name}',
+        )
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+
+    @override_settings(MEDIA_SENDFILE_BACKEND='x-accel-redirect')
+    def test_serve_x_accel_redirect_quoted(self):
+        """Test names are URL quoted in the redirect to nginx"""
+        name = 'uploads/recipe/my recipe.jpg'
+        with open(self.storage.path(name), 'wb') as image_file:
+            image_file.write(b'legacy')
+
+        response = serve_media(self.factory.get('/'), name)
+
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            '/protected-media/uploads/recipe/my%20recipe.jpg',
+        )
+
+    @override_settings(MEDIA_SENDFILE_BACKEND='x-sendfile')
+    def test_serve_x_sendfile(self):
+        """Test the file is handed to the server by its absolute path"""
+        response = self.serve()
+
+        self.assertEqual(response['X-Sendfile'], self.storage.path(self.name))
@@ -0,0 +1,202 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import DatabaseError
+from django.http import FileResponse
+from django.http import Http404
+from django.http import HttpResponse
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.utils.http import quote_etag
+from django.views.decorators.cache import never_cache
+
+from core.db import health
+from core.db.pool import pool_stats
+from core.storage import CONTENT_ADDRESSED_NAME
+from core.storage import is_content_addressed
+
+
+# Content addressed files never change, a year is the longest max-age
+# that caches are expected to honor. Media is only served to its owner,
+# so shared caches must not keep it
+IMMUTABLE_CACHE_CONTROL = 'private, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'private, no-cache'
+
+RANGE_HEADER = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeFile:
+    """Read only file object limited to a byte range of another file"""
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """Return the (start, end) bytes of a single range header, inclusive
+
+    None is returned for headers this view does not handle, like multiple
+    ranges, which are answered with the whole file as HTTP allows.
+    ValueError is raised for ranges outside of the file.
+    """
+    match = RANGE_HEADER.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if not start:
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError('Range not satisfiable')
+    return start, end
+
+
+def sendfile_response(name, path, content_type):
+    """Return a response handing the file to the web server, if enabled
+
+    With X-Sendfile (Apache, lighttpd) the server reads the absolute path,
+    with X-Accel-Redirect (nginx) it serves the internal location mapped
+    to MEDIA_SENDFILE_PREFIX. Range requests are then handled there too.
+    """
+    backend = settings.MEDIA_SENDFILE_BACKEND
+    if not backend:
+        return None
+    response = HttpResponse(content_type=content_type)
+    if backend == 'x-sendfile':
+        response['X-Sendfile'] = path
+    elif backend == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = quote(
+            settings.MEDIA_SENDFILE_PREFIX + name,
+        )
+    else:
+        raise ValueError(f'Unknown media sendfile backend {backend}')
+    return response
+
+
+def content_etag(name):
+    """Return the ETag of a content addressed file, stable across moves
+
+    It is the name from the hash on, like <hash>.jpg for an original and
+    <hash>/thumbnail.webp for one of its derivatives.
+    """
+    match = CONTENT_ADDRESSED_NAME.search(name)
+    return quote_etag(name[match.start('hash'):])
+
+
+def serve_media(request, name, storage=default_storage):
+    """Serve a stored file, supporting conditional and range requests"""
+    try:
+        path = storage.path(name)
+        stat = os.stat(path)
+    except (OSError, ValueError):
+        raise Http404('File not found')
+    if not os.path.isfile(path):
+        raise Http404('File not found')
+
+    content_addressed = is_content_addressed(name)
+    if content_addressed:
+        etag = content_etag(name)
+    else:
+        etag = quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(stat.st_mtime),
+    )
+    if response is None:
+        content_type = mimetypes.guess_type(path)[0]
+        content_type = content_type or 'application/octet-stream'
+        response = sendfile_response(name, path, content_type)
+    if response is None:
+        response = _file_response(
+            request,
+            path,
+            stat.st_size,
+            etag,
+            content_type,
+        )
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = (
+        IMMUTABLE_CACHE_CONTROL if content_addressed
+        else REVALIDATE_CACHE_CONTROL
+    )
+    return response
+
+
+def _file_response(request, path, size, etag, content_type):
+    """Return a streamed response with the requested range of a file"""
+    byte_range = None
+    header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if header and (not if_range or if_range == etag):
+        try:
+            byte_range = parse_range(header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    if byte_range is None:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = FileResponse(
+            RangeFile(open(path, 'rb'), start, end - start + 1),
+            status=206,
+            content_type=content_type,
+        )
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+@never_cache
+def healthz(request):
+    """Report the process is alive, without touching the database"""
+    return HttpResponse('ok', content_type='text/plain')
+
+
+@never_cache
+def readyz(request):
+    """Report whether the database answers and is fully migrated
+
+    The database is probed with a raw SELECT 1, and the migrations are
+    only read until they were once seen applied, so probes stay cheap.
+    """
+    try:
+        health.check_database()
+        pending = health.pending_migrations()
+    except DatabaseError:
+        checks = {'database': 'unavailable'}
+    else:
+        checks = {
+            'database': 'ok',
+            'migrations': f'{len(pending)} pending' if pending else 'ok',
+        }
+    ready = all(value == 'ok' for value in checks.values())
+    return JsonResponse(
+        {'ready': ready, 'checks': checks, 'pools': pool_stats()},
+        status=200 if ready else 503,
+    )
@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.db.models.functions import Lower
+
+from core.cache import LRUCache
+from recipe.cache import get_item_version
+
+
+tries = LRUCache(
+    max_size=settings.AUTOCOMPLETE_TRIE_CACHE_SIZE,
+    ttl=settings.AUTOCOMPLETE_TRIE_TTL,
+)
+
+
+def get_prefix(query_params):
+    """Return the lowercase prefix of an autocomplete request, or None"""
+    prefix = query_params.get('prefix')
+    if prefix is None:
+        return None
+    return prefix.strip().lower()
+
+
+def ranked(queryset):
+    """Order items by usage, the order autocomplete suggestions come in"""
+    return queryset.order_by('-recipe_count', 'name', 'id')
+
+
+class PrefixTrie:
+    """Trie of item names keeping the top suggestions at every node
+
+    Items are inserted by decreasing usage, so each node keeps the first
+    limit items passing through it and a lookup is a walk down the prefix
+    with no sorting. Memory is bounded by limit items per node.
+    """
+
+    def __init__(self, items, limit):
+        self.root = ({}, [])
+        for item in items:
+            children, top = self.root
+            if len(top) < limit:
+                top.append(item)
+            for char in item.name.lower():
+                children, top = children.setdefault(char, ({}, []))
+                if len(top) < limit:
+                    top.append(item)
+
+    def complete(self, prefix):
+        """Return the most used items whose name starts with prefix"""
+        children, top = self.root
+        for char in prefix:
+            node = children.get(char)
+            if node is None:
+                return []
+            children, top = node
+        return top
+
+
+def get_trie(model, user_id):
+    """Return the cached trie of a user's items for the current version
+
+    The trie is keyed on the item version, so recipe writes do not
+    rebuild it. The usage ranking they change is picked up once the trie
+    expires after AUTOCOMPLETE_TRIE_TTL seconds.
+    """
+    key = (model._meta.label, user_id, get_item_version(user_id))
+    trie = tries.get(key)
+    if trie is None:
+        items = ranked(model.objects.filter(user_id=user_id)).only(
+            'id',
+            'name',
+            'recipe_count',
+        )
+        trie = PrefixTrie(items, settings.AUTOCOMPLETE_LIMIT)
+        tries.set(key, trie)
+    return trie
+
+
+def complete(model, user_id, prefix):
+    """Return a user's most used items whose name starts with prefix"""
+    return get_trie(model, user_id).complete(prefix)
+
+
+def complete_queryset(queryset, prefix):
+    """Return the most used items of a queryset starting with prefix
+
+    The lowercase name comparison is answered by the (user_id,
+    lower(name)) index, used for filtered lists the trie cannot answer.
+    """
+    queryset = queryset.annotate(name_lower=Lower('name')).filter(
+        name_lower__startswith=prefix,
+    )
+    return list(ranked(queryset)[:settings.AUTOCOMPLETE_LIMIT])
@@ -0,0 +1,284 @@
+from django.conf import settings
+from django.db import connections
+from django.db import transaction
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from core.counters import bulk_link
+from core.counters import bulk_unlink
+from core.models import Ingredient
+from core.models import Tag
+from core.stats import add_recipes
+from recipe.cache import bump_item_version
+from recipe.cache import bump_version
+from recipe.search import update_search_vectors
+
+
+class BulkResult:
+    """Outcome of a bulk request, listing each item by its input index"""
+
+    def __init__(self):
+        self.succeeded = []
+        self.errors = []
+
+    def add_success(self, index, obj):
+        self.succeeded.append({'index': index, 'id': obj.pk})
+
+    def add_error(self, index, errors):
+        self.errors.append({'index': index, 'errors': errors})
+
+    @property
+    def data(self):
+        return {
+            'succeeded': sorted(self.succeeded, key=lambda row: row['index']),
+            'errors': sorted(self.errors, key=lambda row: row['index']),
+        }
+
+
+def get_items(data):
+    """Return the list of items of a bulk request body"""
+    if not isinstance(data, list):
+        raise ValidationError({'non_field_errors': ['Expected a list.']})
+    if len(data) > settings.BULK_MAX_ITEMS:
+        raise ValidationError({'non_field_errors': [
+            f'At most {settings.BULK_MAX_ITEMS} items can be sent at once.',
+        ]})
+    return data
+
+
+def bulk_insert(model, objs, batch_size=None):
+    """Insert new objects, setting their primary keys
+
+    Backends that cannot return the IDs of a bulk insert, like SQLite
+    before Django 2.2, fall back to saving the objects one by one.
+    """
+    connection = connections[model.objects.db]
+    if connection.features.can_return_ids_from_bulk_insert:
+        model.objects.bulk_create(objs, batch_size=batch_size)
+    else:
+        for obj in objs:
+            obj.save()
+
+
+def _parse_id(value):
+    """Return value as an object ID, or None if it is not one"""
+    if isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class BulkWriter:
+    """Create, update and delete many objects of a user at once
+
+    Every item is validated on its own and the invalid ones are reported
+    by index, the valid ones are written together in one transaction.
+    """
+    related_fields = ()
+
+    def __init__(self, model, serializer_class, user):
+        self.model = model
+        self.serializer_class = serializer_class
+        self.user = user
+
+    @property
+    def batch_size(self):
+        return settings.BULK_BATCH_SIZE
+
+    def get_queryset(self):
+        return self.model.objects.filter(user=self.user)
+
+    def check_related(self, valid, result):
+        """Drop the valid items referencing objects the user cannot use"""
+        return valid
+
+    def save_related(self, saved, partial=False):
+        """Store the related objects of (object, validated data) pairs"""
+
+    def invalidate(self):
+        """Invalidate the caches of the user once the objects are written
+
+        Bulk inserts send no signals, so the tag and ingredient names
+        cached for autocomplete are invalidated here too.
+        """
+        bump_version(self.user.pk)
+        bump_item_version(self.user.pk)
+
+    def _validate(self, items, instances=None):
+        """Return (index, instance, validated data) of the valid items"""
+        result = BulkResult()
+        valid = []
+        for index, item in enumerate(items):
+            instance = None
+            if instances is not None:
+                instance = instances.get(index)
+                if instance is None:
+                    result.add_error(index, {'id': ['Not found.']})
+                    continue
+            serializer = self.serializer_class(
+                instance,
+                data=item,
+                partial=instance is not None,
+            )
+            if serializer.is_valid():
+                valid.append((index, instance, serializer.validated_data))
+            else:
+                result.add_error(index, serializer.errors)
+        return self.check_related(valid, result), result
+
+    def _fields(self, data):
+        """Return the validated data that maps to the object's own columns"""
+        return {
+            name: value for name, value in data.items()
+            if name not in self.related_fields
+        }
+
+    def create(self, items):
+        """Create an object for every valid item"""
+        valid, result = self._validate(items)
+        with transaction.atomic():
+            objs = [
+                self.model(user=self.user, **self._fields(data))
+                for _, _, data in valid
+            ]
+            bulk_insert(self.model, objs, self.batch_size)
+            self.save_related(
+                [(obj, data) for obj, (_, _, data) in zip(objs, valid)],
+            )
+        for obj, (index, _, _) in zip(objs, valid):
+            result.add_success(index, obj)
+        self.invalidate()
+        return result
+
+    def update(self, items):
+        """Apply the changes of every valid item to the object it names"""
+        ids = {
+            index: _parse_id(item.get('id')) if isinstance(item, dict)
+            else None
+            for index, item in enumerate(items)
+        }
+        found = self.get_queryset().in_bulk(
+            [obj_id for obj_id in ids.values() if obj_id is not None],
+        )
+        instances = {
+            index: found[obj_id] for index, obj_id in ids.items()
+            if obj_id in found
+        }
+        valid, result = self._validate(items, instances)
+        with transaction.atomic():
+            for index, obj, data in valid:
+                fields = self._fields(data)
+                for name, value in fields.items():
+                    setattr(obj, name, value)
+                if fields:
+                    obj.save(update_fields=list(fields))
+                result.add_success(index, obj)
+            self.save_related(
+                [(obj, data) for _, obj, data in valid],
+                partial=True,
+            )
+        self.invalidate()
+        return result
+
+    def delete(self, items):
+        """Delete the objects whose IDs are given"""
+        result = BulkResult()
+        ids = {index: _parse_id(item) for index, item in enumerate(items)}
+        with transaction.atomic():
+            found = self.get_queryset().in_bulk(
+                [obj_id for obj_id in ids.values() if obj_id is not None],
+            )
+            for index, obj_id in ids.items():
+                if obj_id in found:
+                    result.add_success(index, found[obj_id])
+                else:
+                    result.add_error(index, {'id': ['Not found.']})
+            self.get_queryset().filter(pk__in=list(found)).delete()
+        self.invalidate()
+        return result
+
+
+class RecipeBulkWriter(BulkWriter):
+    """Bulk writer that also links recipes to their tags and ingredients"""
+    related_fields = ('tags', 'ingredients')
+    related_models = {'tags': Tag, 'ingredients': Ingredient}
+
+    def check_related(self, valid, result):
+        """Check the referenced tags and ingredients with one query each"""
+        owned = {}
+        for field_name, model in self.related_models.items():
+            ids = {
+                obj_id for _, _, data in valid
+                for obj_id in data.get(field_name, ())
+            }
+            owned[field_name] = set(model.objects.filter(
+                user=self.user,
+                pk__in=ids,
+            ).values_list('pk', flat=True)) if ids else set()
+
+        checked = []
+        for index, instance, data in valid:
+            errors = {}
+            for field_name in self.related_fields:
+                missing = set(data.get(field_name, ())) - owned[field_name]
+                if missing:
+                    errors[field_name] = [
+                        f'Invalid pk "{obj_id}" - object does not exist.'
+                        for obj_id in sorted(missing)
+                    ]
+            if errors:
+                result.add_error(index, errors)
+            else:
+                checked.append((index, instance, data))
+        return checked
+
+    def save_related(self, saved, partial=False):
+        """Replace the links of the saved recipes in a few bulk queries
+
+        Bulk inserts send no signals, so the search vectors of the saved
+        recipes are refreshed here once their links are written, and new
+        recipes are added to the statistics of the user.
+        """
+        if not partial:
+            add_recipes(obj for obj, _ in saved)
+        for field_name in self.related_fields:
+            changed = [
+                (obj, data[field_name]) for obj, data in saved
+                if field_name in data
+            ]
+            if partial and changed:
+                bulk_unlink(field_name, [obj.pk for obj, _ in changed])
+            bulk_link(
+                field_name,
+                [
+                    (obj.pk, obj_id) for obj, ids in changed
+                    for obj_id in ids
+                ],
+                batch_size=self.batch_size,
+            )
+        update_search_vectors(obj.pk for obj, _ in saved)
+
+    def invalidate(self):
+        """Invalidate the cached responses, items are left unchanged"""
+        bump_version(self.user.pk)
+
+
+def respond(writer, request):
+    """Run a bulk request with the writer method matching its HTTP method"""
+    items = get_items(request.data)
+    if request.method == 'POST':
+        result = writer.create(items)
+        success_status = status.HTTP_201_CREATED
+    elif request.method == 'PATCH':
+        result = writer.update(items)
+        success_status = status.HTTP_200_OK
+    else:
+        result = writer.delete(items)
+        success_status = status.HTTP_200_OK
+
+    if result.errors and not result.succeeded:
+        return Response(result.data, status=status.HTTP_400_BAD_REQUEST)
+    return Response(result.data, status=success_status)
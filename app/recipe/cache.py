@@ -0,0 +1,255 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.utils.http import parse_etags
+from django.utils.http import quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+# Query parameters holding comma separated IDs, normalized so that the
+# same filter written in a different order shares one cache entry
+ID_LIST_PARAMS = ('tags', 'ingredients')
+
+
+class CacheStats:
+    """Hit and miss counters of the response cache in this process"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def record(self, hit):
+        """Count one cache lookup"""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def reset(self):
+        """Reset both counters to zero"""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+stats = CacheStats()
+
+
+def get_cache():
+    """Return the cache backend holding responses and versions"""
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def _version_key(user_id):
+    return f'recipe-version:{user_id}'
+
+
+def get_version(user_id):
+    """Return the current version of a user's recipe data
+
+    The first version is seeded from the clock rather than 1, so that if
+    the version key is ever evicted it cannot come back to a number that
+    older cached responses were stored under.
+    """
+    cache = get_cache()
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def _modified_key(user_id):
+    return f'recipe-modified:{user_id}'
+
+
+def get_last_modified(user_id):
+    """Return the time in seconds a user's recipe data last changed
+
+    If the marker was never set or has been evicted, the current time is
+    recorded instead, which can only make clients revalidate sooner.
+    """
+    cache = get_cache()
+    key = _modified_key(user_id)
+    modified = cache.get(key)
+    if modified is None:
+        cache.add(key, int(time.time()), None)
+        modified = cache.get(key)
+    return modified
+
+
+def _bump_version(user_id):
+    cache = get_cache()
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        cache.add(_version_key(user_id), time.time_ns(), None)
+    cache.set(_modified_key(user_id), int(time.time()), None)
+
+
+def bump_version(user_id):
+    """Invalidate every cached response of a user in O(1)
+
+    The version is bumped straight away and again once the transaction
+    commits, so a response built from data read before the commit and
+    cached in between is never served.
+    """
+    _bump_version(user_id)
+    transaction.on_commit(lambda: _bump_version(user_id))
+
+
+def _item_version_key(user_id):
+    return f'recipe-item-version:{user_id}'
+
+
+def get_item_version(user_id):
+    """Return the current version of a user's tag and ingredient names
+
+    Unlike get_version it only changes when an item is created, renamed
+    or deleted, so caches of the item names survive recipe writes.
+    """
+    cache = get_cache()
+    key = _item_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def _bump_item_version(user_id):
+    cache = get_cache()
+    try:
+        cache.incr(_item_version_key(user_id))
+    except ValueError:
+        cache.add(_item_version_key(user_id), time.time_ns(), None)
+
+
+def bump_item_version(user_id):
+    """Invalidate the caches of a user's tag and ingredient names"""
+    _bump_item_version(user_id)
+    transaction.on_commit(lambda: _bump_item_version(user_id))
+
+
+def _normalize_ids(value):
+    try:
+        ids = sorted({int(item_id) for item_id in value.split(',')})
+    except ValueError:
+        return value
+    return ','.join(map(str, ids))
+
+
+def normalize_params(query_params):
+    """Return a canonical string for the query parameters of a request"""
+    params = []
+    for name in sorted(query_params):
+        value = query_params.get(name)
+        if name in ID_LIST_PARAMS:
+            value = _normalize_ids(value)
+        params.append(f'{name}={value}')
+    return '&'.join(params)
+
+
+def build_key(request, action, pk=None):
+    """Return the cache key of a read request for the current version"""
+    user_id = request.user.pk
+    digest = hashlib.md5(
+        f'{request.get_host()}{request.path}?'
+        f'{normalize_params(request.query_params)}'.encode(),
+    ).hexdigest()
+    # Responses are cached as data, but each format renders differently
+    renderer = request.accepted_renderer.format
+    return (
+        f'recipe-response:{user_id}:{get_version(user_id)}:'
+        f'{action}:{pk}:{renderer}:{digest}'
+    )
+
+
+def is_not_modified(request, etag):
+    """Return whether the client copy matches the current ETag
+
+    If-Modified-Since is not honored: Last-Modified only has a one second
+    resolution, so a change made in the same second as the client read
+    would still get a 304.
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if not if_none_match:
+        return False
+    etags = parse_etags(if_none_match)
+    return '*' in etags or etag in etags
+
+
+class CachedResponseMixin:
+    """Serve list responses from the per-user cache
+
+    Entries are keyed by user, data version, action, response format and
+    the normalized query parameters. They are never invalidated one by
+    one, bumping the version makes all of a user's entries unreachable at
+    once.
+
+    The same key doubles as the ETag, which changes with the format as
+    the body does and is sent with Vary: Accept. Conditional requests
+    from clients that already hold the current version get a 304 before
+    any queryset or serializer runs.
+
+    Nothing is cached unless RESPONSE_CACHE_ENABLED is set, which needs
+    a cache shared by every process, see recipe.checks.
+    """
+
+    def _cached(self, render, request, *args, **kwargs):
+        if not settings.RESPONSE_CACHE_ENABLED:
+            return render(request, *args, **kwargs)
+        key = build_key(request, self.action, kwargs.get(self.lookup_field))
+        etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+        last_modified = get_last_modified(request.user.pk)
+
+        if is_not_modified(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = self._cached_response(
+                key, render, request, *args, **kwargs
+            )
+
+        if response.status_code in (
+            status.HTTP_200_OK,
+            status.HTTP_304_NOT_MODIFIED,
+        ):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            patch_vary_headers(response, ('Accept',))
+        return response
+
+    def _cached_response(self, key, render, request, *args, **kwargs):
+        cache = get_cache()
+        data = cache.get(key)
+        stats.record(data is not None)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        response = render(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, settings.RESPONSE_CACHE_TTL)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached(super().list, request, *args, **kwargs)
+
+
+class CachedDetailResponseMixin(CachedResponseMixin):
+    """Serve list and retrieve responses from the per-user cache"""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached(super().retrieve, request, *args, **kwargs)
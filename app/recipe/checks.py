@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.checks import Error
+from django.core.checks import register
+
+from core.cache import is_process_local
+from recipe.cache import get_cache
+
+
+@register()
+def check_response_cache(app_configs, **kwargs):
+    """Reject response caching in a cache other processes do not see
+
+    A version bump in one worker would not reach the caches of the
+    others, which would keep serving responses for changed data.
+    """
+    if settings.RESPONSE_CACHE_ENABLED and is_process_local(get_cache()):
+        return [Error(
+            'RESPONSE_CACHE_ENABLED needs a cache shared by every process.',
+            hint='Set CACHE_LOCATION or point RESPONSE_CACHE_ALIAS at a '
+                 'memcached cache.',
+            id='recipe.E001',
+        )]
+    return []
+
+
+@register()
+def check_replica_marker(app_configs, **kwargs):
+    """Reject read replicas when the last write time is kept per process
+
+    recipe.replicas keeps the reads of a user on the primary for a while
+    after a write, which only works if every process sees that write.
+    """
+    if settings.DATABASE_REPLICAS and is_process_local(get_cache()):
+        return [Error(
+            'DATABASE_REPLICAS needs a cache shared by every process.',
+            hint='Set CACHE_LOCATION or point RESPONSE_CACHE_ALIAS at a '
+                 'memcached cache.',
+            id='recipe.E002',
+        )]
+    return []
@@ -0,0 +1,62 @@
+from itertools import islice
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from core.models import Recipe
+
+
+RECIPE_FIELDS = ('id', 'name', 'time_minutes', 'price', 'link', 'image')
+
+
+def _chunks(iterable, size):
+    """Yield lists of up to size items from an iterable"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _related(field_name, recipe_ids):
+    """Return recipe ID to [{id, name}] for one relation of some recipes"""
+    field = Recipe._meta.get_field(field_name)
+    recipe_field = field.m2m_field_name()
+    item_field = field.m2m_reverse_field_name()
+    links = field.remote_field.through.objects.filter(
+        **{f'{recipe_field}__in': recipe_ids},
+    ).order_by(f'{item_field}__name').values_list(
+        f'{recipe_field}_id',
+        f'{item_field}_id',
+        f'{item_field}__name',
+    )
+    related = {}
+    for recipe_id, item_id, name in links:
+        related.setdefault(recipe_id, []).append({'id': item_id, 'name': name})
+    return related
+
+
+def export_recipes(user, chunk_size=None):
+    """Yield the recipes of a user as newline delimited JSON
+
+    Recipes are read through a server side cursor where the database has
+    them, and their tags and ingredients are fetched one chunk of recipes
+    at a time, so memory use does not depend on the size of the library.
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    recipes = Recipe.objects.filter(user=user).order_by('id').values(
+        *RECIPE_FIELDS,
+    ).iterator(chunk_size=chunk_size)
+
+    encoder = DjangoJSONEncoder()
+    for chunk in _chunks(recipes, chunk_size):
+        recipe_ids = [recipe['id'] for recipe in chunk]
+        tags = _related('tags', recipe_ids)
+        ingredients = _related('ingredients', recipe_ids)
+        lines = []
+        for recipe in chunk:
+            recipe['tags'] = tags.get(recipe['id'], [])
+            recipe['ingredients'] = ingredients.get(recipe['id'], [])
+            lines.append(encoder.encode(recipe))
+        yield '\n'.join(lines) + '\n'
@@ -0,0 +1,128 @@
+from django.conf import settings
+from django.db.models import Count
+from django.db.models import Exists
+from django.db.models import F
+from django.db.models import OuterRef
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+from core.models import Recipe
+
+
+MATCH_ANY = 'any'
+MATCH_ALL = 'all'
+MATCH_MODES = (MATCH_ANY, MATCH_ALL)
+
+
+def get_match_mode(query_params):
+    """Return the requested match mode, defaulting to any"""
+    match = query_params.get('match', MATCH_ANY)
+    if match not in MATCH_MODES:
+        raise ValidationError({
+            'match': f'Must be one of: {", ".join(MATCH_MODES)}.',
+        })
+    return match
+
+
+def filter_by_related(queryset, field_name, ids, match=MATCH_ANY):
+    """Filter recipes by the IDs of a many to many relation
+
+    The filter is a single subquery over the through table, so the main
+    query never fans out into one row per matching link and does not
+    need a DISTINCT. For "all" the links are grouped by recipe and only
+    recipes linked to every requested ID are kept, which costs the same
+    whether one or fifty IDs are given.
+    """
+    field = Recipe._meta.get_field(field_name)
+    source = field.m2m_field_name()
+    target = field.m2m_reverse_field_name()
+    ids = set(ids)
+
+    links = field.remote_field.through.objects.filter(
+        **{f'{target}__in': ids},
+    )
+    if match == MATCH_ALL:
+        links = links.values(source).annotate(
+            matched=Count(target),
+        ).filter(matched=len(ids))
+
+    return queryset.filter(pk__in=links.values(source))
+
+
+def _item_links(field_name):
+    """Return the through rows linking recipes to the outer tag/ingredient"""
+    field = Recipe._meta.get_field(field_name)
+    return field.remote_field.through.objects.filter(
+        **{field.m2m_reverse_field_name(): OuterRef('pk')},
+    )
+
+
+def filter_assigned(queryset, field_name):
+    """Keep only the items used by at least one recipe
+
+    A correlated EXISTS stops at the first link found for each item, so
+    items shared by thousands of recipes are as cheap as any other and
+    no DISTINCT over the joined rows is needed.
+    """
+    return queryset.annotate(
+        assigned=Exists(_item_links(field_name)),
+    ).filter(assigned=True)
+
+
+def get_min_usage(query_params):
+    """Return the requested minimum number of recipes, if any"""
+    min_usage = query_params.get('min_usage')
+    if min_usage is None:
+        return None
+    try:
+        return int(min_usage)
+    except ValueError:
+        raise ValidationError({'min_usage': 'A valid integer is required.'})
+
+
+def filter_min_usage(queryset, min_usage):
+    """Keep only the items used by at least min_usage recipes
+
+    Reads the maintained recipe_count column, so the filter is a range
+    scan on the (user, recipe_count) index instead of counting links.
+    """
+    return queryset.filter(recipe_count__gte=min_usage)
+
+
+def get_limit(query_params, maximum=1000):
+    """Return the requested number of results, or the configured default"""
+    limit = query_params.get('limit')
+    if limit is None:
+        return settings.COVERAGE_LIMIT
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise ValidationError({'limit': 'A valid integer is required.'})
+    if not 1 <= limit <= maximum:
+        raise ValidationError({
+            'limit': f'Must be between 1 and {maximum}.',
+        })
+    return limit
+
+
+def rank_by_coverage(queryset, ingredient_ids):
+    """Rank recipes by how much of their ingredients the given ones cover
+
+    Recipes are annotated with their number of ingredients, how many of
+    those are given and how many are missing, and ordered by fewest
+    missing then most matched. Both counts come from a single grouped
+    join on the recipe ingredients table, recipes without any of the
+    given ingredients are left out.
+    """
+    ingredient_ids = set(ingredient_ids)
+    return queryset.annotate(
+        ingredient_count=Count('ingredients'),
+        matched_count=Count(
+            'ingredients',
+            filter=Q(ingredients__in=ingredient_ids),
+        ),
+    ).annotate(
+        missing_count=F('ingredient_count') - F('matched_count'),
+    ).filter(
+        matched_count__gt=0,
+    ).order_by('missing_count', '-matched_count', 'id')
@@ -0,0 +1,149 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import features
+from PIL import Image
+
+from core.storage import recipe_image_storage
+
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {'WEBP': 'webp', 'JPEG': 'jpg'}
+
+
+def derivative_format():
+    """Return the configured derivative format, if this Pillow can write it
+
+    Pillow builds without libwebp cannot encode WebP, JPEG is used then.
+    """
+    image_format = settings.IMAGE_DERIVATIVE_FORMAT
+    if image_format == 'WEBP' and not features.check('webp'):
+        return 'JPEG'
+    return image_format
+
+
+def derivative_name(image_name, size_name):
+    """Return the storage name of one derivative of an original image"""
+    stem, _ = os.path.splitext(image_name)
+    extension = EXTENSIONS[derivative_format()]
+    return f'{stem}/{size_name}.{extension}'
+
+
+def original_stem(name):
+    """Return the stem of the original a derivative name belongs to
+
+    None is returned when the name is not one of a derivative.
+    """
+    directory, base_name = os.path.split(name)
+    size_name = os.path.splitext(base_name)[0]
+    if not directory or size_name not in settings.IMAGE_DERIVATIVE_SIZES:
+        return None
+    return directory
+
+
+def derivative_urls(image_name):
+    """Return size name to URL of the derivatives of an original image
+
+    The names are derived from the original, so building the URLs needs
+    neither a query nor a storage lookup. They resolve once the pipeline
+    has processed the upload, clients fall back to the original before.
+    """
+    if not image_name:
+        return None
+    return {
+        size_name: recipe_image_storage.url(
+            derivative_name(image_name, size_name),
+        )
+        for size_name in settings.IMAGE_DERIVATIVE_SIZES
+    }
+
+
+def generate_derivatives(image_name, storage=recipe_image_storage):
+    """Write the missing resized derivatives of an original image to storage
+
+    Originals are named by their content, so a derivative already stored
+    for a name was made from the same image and is left as it is.
+    """
+    missing = {
+        size_name: size
+        for size_name, size in settings.IMAGE_DERIVATIVE_SIZES.items()
+        if not storage.exists(derivative_name(image_name, size_name))
+    }
+    if not missing:
+        return
+
+    image_format = derivative_format()
+    with storage.open(image_name) as original:
+        image = Image.open(original)
+        image.load()
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+
+    for size_name, size in missing.items():
+        derivative = image.copy()
+        derivative.thumbnail((size, size), Image.LANCZOS)
+        content = BytesIO()
+        derivative.save(
+            content,
+            format=image_format,
+            quality=settings.IMAGE_DERIVATIVE_QUALITY,
+        )
+        storage.save(
+            derivative_name(image_name, size_name),
+            ContentFile(content.getvalue()),
+        )
+
+
+class ImagePipeline:
+    """Worker pool generating image derivatives off the request thread
+
+    This in-process pool stands in for a task queue: uploads return as
+    soon as the original is stored, and resizing happens on a worker.
+    Failures are logged, the original image stays usable regardless.
+    """
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._executor = None
+        self._futures = set()
+        self._lock = threading.Lock()
+
+    def _run(self, image_name):
+        try:
+            generate_derivatives(image_name)
+        except Exception:
+            logger.exception('Could not resize image %s', image_name)
+
+    def submit(self, image_name):
+        """Queue the derivatives of an original image for generation"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='image-pipeline',
+                )
+            future = self._executor.submit(self._run, image_name)
+            self._futures.add(future)
+        # Outside the lock, the callback runs at once if already done
+        future.add_done_callback(self._discard)
+        return future
+
+    def _discard(self, future):
+        with self._lock:
+            self._futures.discard(future)
+
+    def wait(self, timeout=None):
+        """Block until every queued image has been processed"""
+        with self._lock:
+            futures = list(self._futures)
+        wait(futures, timeout=timeout)
+
+
+pipeline = ImagePipeline(max_workers=settings.IMAGE_PIPELINE_WORKERS)
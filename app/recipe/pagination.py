@@ -0,0 +1,140 @@
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+
+from recipe.search import get_query
+
+
+class RecipeAppCursorPagination(CursorPagination):
+    """Keyset pagination with opaque cursors and a client page size
+
+    Every page is fetched with a range condition on the ordering columns
+    rather than an OFFSET, so deep pages cost the same as the first one.
+
+    DRF only keeps the first ordering column in the cursor and falls back
+    to offsets among equal values. Here the cursor holds every ordering
+    column of the boundary item, the last one being unique, so pages
+    follow each other exactly even when the leading column is a shared
+    or changing value like a usage count.
+    """
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            offset, reverse, current_position = 0, False, None
+        else:
+            offset, reverse, current_position = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*(
+                field[1:] if field.startswith('-') else f'-{field}'
+                for field in self.ordering
+            ))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if current_position is not None:
+            queryset = queryset.filter(
+                self._after_position(current_position, reverse),
+            )
+
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        following_position = None
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(
+                results[-1],
+                self.ordering,
+            )
+
+        has_position = current_position is not None or offset > 0
+        if reverse:
+            self.page.reverse()
+            self.has_next = has_position
+            self.has_previous = following_position is not None
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = following_position is not None
+            self.has_previous = has_position
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def _after_position(self, position, reverse):
+        """Return the condition of the rows past a position in row order
+
+        (a, b, c) > (x, y, z) is spelled out as a > x, or a = x and b > y,
+        or a = x and b = y and c > z, each column in its own direction.
+        """
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') != reverse else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            name = field.lstrip('-')
+            if isinstance(instance, dict):
+                value = instance[name]
+            else:
+                value = getattr(instance, name)
+            values.append(str(value))
+        return json.dumps(values)
+
+
+class RecipeItemPagination(RecipeAppCursorPagination):
+    """Paginate tags and ingredients by descending name or popularity"""
+    ordering = ('-name', 'id')
+    orderings = {
+        'name': ordering,
+        'popular': ('-recipe_count', 'id'),
+    }
+
+    def get_ordering(self, request, queryset, view):
+        """Return the ordering selected with the ordering query parameter"""
+        ordering = request.query_params.get('ordering', 'name')
+        if ordering not in self.orderings:
+            raise ValidationError({
+                'ordering': f'Must be one of: {", ".join(self.orderings)}.',
+            })
+        return self.orderings[ordering]
+
+
+class RecipePagination(RecipeAppCursorPagination):
+    """Paginate recipes in creation order, or by rank when searching"""
+    ordering = ('id',)
+    search_ordering = ('-search_rank', 'id')
+
+    def get_ordering(self, request, queryset, view):
+        """Return the search rank ordering for search requests"""
+        if get_query(request.query_params):
+            return self.search_ordering
+        return self.ordering
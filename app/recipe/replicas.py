@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+
+from core.db import routers
+from recipe.cache import get_last_modified
+
+
+def recently_modified(user_id):
+    """Return whether a user's recipe data changed within the sticky window
+
+    The replicas may not have caught up with such a change yet, so the
+    reads of that user stay on the primary until the window is over.
+    """
+    age = time.time() - get_last_modified(user_id)
+    return age < settings.REPLICA_STICKY_SECONDS
+
+
+class ReplicaReadMixin:
+    """Run the queries of safe requests on a read replica
+
+    Users who changed their recipe data within REPLICA_STICKY_SECONDS
+    keep reading from the primary, so they always see their own writes.
+    Every writer bumps the data version, which records the change time
+    in the shared cache, so the request after a write reads from the
+    primary whichever process serves it.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            request.method in SAFE_METHODS
+            and settings.DATABASE_REPLICAS
+            and not recently_modified(request.user.pk)
+        ):
+            routers.set_read_database(routers.choose_replica())
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        routers.set_read_database(None)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,178 @@
+import heapq
+import re
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery
+from django.contrib.postgres.search import SearchRank
+from django.db import connections
+from django.db import router
+from django.db.models import Case
+from django.db.models import F
+from django.db.models import FloatField
+from django.db.models import Value
+from django.db.models import When
+from django.db.models.functions import Cast
+
+from core.cache import LRUCache
+from core.models import Recipe
+from recipe.cache import get_version
+
+
+# Weights of the matched fields, those of the Postgres A and B labels
+NAME_WEIGHT = 1.0
+RELATED_WEIGHT = 0.4
+
+RELATED_FIELDS = ('tags', 'ingredients')
+
+UPDATE_SEARCH_VECTORS = '''
+    UPDATE core_recipe AS recipe
+    SET search_vector =
+        setweight(to_tsvector(%(config)s, recipe.name), 'A') ||
+        setweight(to_tsvector(%(config)s, coalesce((
+            SELECT string_agg(tag.name, ' ')
+            FROM core_recipe_tags AS link
+            JOIN core_tag AS tag ON tag.id = link.tag_id
+            WHERE link.recipe_id = recipe.id
+        ), '')), 'B') ||
+        setweight(to_tsvector(%(config)s, coalesce((
+            SELECT string_agg(ingredient.name, ' ')
+            FROM core_recipe_ingredients AS link
+            JOIN core_ingredient AS ingredient
+                ON ingredient.id = link.ingredient_id
+            WHERE link.recipe_id = recipe.id
+        ), '')), 'B')
+    WHERE recipe.id = ANY(%(ids)s)
+'''
+
+indexes = LRUCache(max_size=settings.SEARCH_INDEX_CACHE_SIZE)
+
+
+def get_query(query_params):
+    """Return the search text of a request, blank if it is not a search"""
+    return query_params.get('search', '').strip()
+
+
+def uses_search_vectors(using=None):
+    """Return whether the database has the indexed search vector column"""
+    return connections[using or Recipe.objects.db].vendor == 'postgresql'
+
+
+def update_search_vectors(recipe_ids):
+    """Recompute the stored search vectors of the given recipes
+
+    The vector covers the recipe name and its tag and ingredient names,
+    so it is refreshed whenever any of them changes. Other databases
+    search an in-process index instead and need no refresh.
+    """
+    using = router.db_for_write(Recipe)
+    if not uses_search_vectors(using):
+        return
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(UPDATE_SEARCH_VECTORS, {
+            'config': settings.SEARCH_CONFIG,
+            'ids': recipe_ids,
+        })
+
+
+def tokenize(text):
+    """Return the lowercase words of a text"""
+    return re.findall(r'\w+', text.lower())
+
+
+class SearchIndex:
+    """In-process inverted index of the recipes of a user
+
+    Maps each word of the recipe names, tag names and ingredient names to
+    the weight of the recipes it occurs in. It stands in for the Postgres
+    search vectors on other databases, built with three queries.
+    """
+
+    def __init__(self, user_id):
+        self.postings = defaultdict(dict)
+        recipes = Recipe.objects.filter(user_id=user_id)
+        for recipe_id, name in recipes.values_list('id', 'name'):
+            self._add(recipe_id, name, NAME_WEIGHT)
+        for field_name in RELATED_FIELDS:
+            field = Recipe._meta.get_field(field_name)
+            links = field.remote_field.through.objects.filter(
+                recipe__user_id=user_id,
+            ).values_list(
+                'recipe_id',
+                f'{field.m2m_reverse_field_name()}__name',
+            )
+            for recipe_id, name in links:
+                self._add(recipe_id, name, RELATED_WEIGHT)
+
+    def _add(self, recipe_id, text, weight):
+        for word in set(tokenize(text)):
+            postings = self.postings[word]
+            postings[recipe_id] = postings.get(recipe_id, 0) + weight
+
+    def search(self, text):
+        """Return recipe ID to rank of the recipes matching every word"""
+        words = set(tokenize(text))
+        if not words:
+            return {}
+        postings = sorted(
+            (self.postings.get(word, {}) for word in words),
+            key=len,
+        )
+        ranks = dict(postings[0])
+        for other in postings[1:]:
+            ranks = {
+                recipe_id: rank + other[recipe_id]
+                for recipe_id, rank in ranks.items()
+                if recipe_id in other
+            }
+        return ranks
+
+
+def get_index(user_id):
+    """Return the search index of a user for the current cache version"""
+    key = (user_id, get_version(user_id))
+    index = indexes.get(key)
+    if index is None:
+        index = SearchIndex(user_id)
+        indexes.set(key, index)
+    return index
+
+
+def search_recipes(queryset, user_id, text):
+    """Filter recipes to those matching text, annotated with search_rank
+
+    Without search vectors the ranks come from the in-process index and
+    are passed to the query, limited to the SEARCH_FALLBACK_LIMIT best
+    matches in the search ordering.
+    """
+    if uses_search_vectors(queryset.db):
+        query = SearchQuery(text, config=settings.SEARCH_CONFIG)
+        # ts_rank returns a real, cast so cursors round trip exactly
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=Cast(
+                SearchRank(F('search_vector'), query),
+                FloatField(),
+            ),
+        )
+
+    ranks = dict(heapq.nsmallest(
+        settings.SEARCH_FALLBACK_LIMIT,
+        get_index(user_id).search(text).items(),
+        key=lambda item: (-item[1], item[0]),
+    ))
+    if not ranks:
+        return queryset.annotate(
+            search_rank=Value(0.0, output_field=FloatField()),
+        ).none()
+    return queryset.filter(pk__in=list(ranks)).annotate(
+        search_rank=Case(
+            *(
+                When(pk=recipe_id, then=Value(rank))
+                for recipe_id, rank in ranks.items()
+            ),
+            output_field=FloatField(),
+        ),
+    )
@@ -3,6 +3,7 @@ from rest_framework import serializers
 from core.models import Ingredient
 from core.models import Recipe
 from core.models import Tag
+from recipe import images
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -50,17 +51,137 @@ class RecipeSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
+class RecipeCoverageSerializer(RecipeSerializer):
+    """Serializer for recipes ranked by the ingredients a user has"""
+
+    matched_count = serializers.IntegerField(read_only=True)
+    missing_count = serializers.IntegerField(read_only=True)
+    coverage = serializers.SerializerMethodField()
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + (
+            'matched_count',
+            'missing_count',
+            'coverage',
+        )
+
+    def get_coverage(self, obj):
+        """Return the share of the recipe ingredients the user has"""
+        return obj.matched_count / obj.ingredient_count
+
+
+class RecipeSimilaritySerializer(RecipeSerializer):
+    """Serializer for recipes ranked by similarity to another recipe"""
+
+    similarity = serializers.FloatField(read_only=True)
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + ('similarity',)
+
+
+class RecipeImagesField(serializers.ReadOnlyField):
+    """Field listing the URLs of the resized copies of a recipe image"""
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = 'image'
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        urls = images.derivative_urls(value.name if value else None)
+        request = self.context.get('request')
+        if urls and request is not None:
+            urls = {
+                size_name: request.build_absolute_uri(url)
+                for size_name, url in urls.items()
+            }
+        return urls
+
+
 class RecipeDetailSerializer(RecipeSerializer):
     """Serializer for recipe detail objects"""
 
     ingredients = IngredientSerializer(many=True, read_only=True)
     tags = TagSerializer(many=True, read_only=True)
+    images = RecipeImagesField()
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + ('image', 'images')
+        read_only_fields = ('id', 'image')
+
+
+class RecipeBulkSerializer(serializers.ModelSerializer):
+    """Serializer for recipes written in bulk
+
+    Related objects are plain lists of IDs here, their ownership is
+    checked for the whole batch at once by recipe.bulk.
+    """
+
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+    )
+
+    tags = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+    )
+
+    class Meta:
+        model = Recipe
+        fields = (
+            'id',
+            'name',
+            'price',
+            'time_minutes',
+            'link',
+            'ingredients',
+            'tags',
+        )
+        read_only_fields = ('id',)
+
+    def validate_ingredients(self, value):
+        """Drop repeated IDs, each item is linked to a recipe once"""
+        return list(dict.fromkeys(value))
+
+    def validate_tags(self, value):
+        """Drop repeated IDs, each item is linked to a recipe once"""
+        return list(dict.fromkeys(value))
+
+
+class RecipeImportSerializer(serializers.ModelSerializer):
+    """Serializer for recipes read by the import_recipes command
+
+    Tags and ingredients are given by name and created when missing.
+    """
+
+    ingredients = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        required=False,
+    )
+
+    tags = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        required=False,
+    )
+
+    class Meta:
+        model = Recipe
+        fields = (
+            'name',
+            'price',
+            'time_minutes',
+            'link',
+            'ingredients',
+            'tags',
+        )
 
 
 class RecipeImageSerializer(serializers.ModelSerializer):
     """Serializer to upload images to recipes"""
 
+    images = RecipeImagesField()
+
     class Meta:
         model = Recipe
-        fields = ('id', 'image')
+        fields = ('id', 'image', 'images')
         read_only_fields = ('id',)
@@ -0,0 +1,90 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from core.models import Ingredient
+from core.models import Recipe
+from core.models import Tag
+from recipe.cache import bump_item_version
+from recipe.cache import bump_version
+from recipe.search import update_search_vectors
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def recipe_data_changed(sender, instance, **kwargs):
+    """Invalidate the cached responses of the owner of a changed object
+
+    Hooking the models rather than the views also covers the admin and
+    management commands, including image uploads saved on a recipe.
+    """
+    bump_version(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def recipe_links_changed(sender, instance, action, **kwargs):
+    """Invalidate cached responses when recipe tags or ingredients change"""
+    if action.startswith('post_'):
+        bump_version(instance.user_id)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def recipe_item_changed(sender, instance, **kwargs):
+    """Invalidate the cached item names of the owner of a changed item"""
+    bump_item_version(instance.user_id)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, update_fields=None, **kwargs):
+    """Refresh the search vector of a recipe whose name may have changed"""
+    if update_fields is None or 'name' in update_fields:
+        update_search_vectors([instance.pk])
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def recipe_item_saved(sender, instance, created, **kwargs):
+    """Refresh the search vectors of the recipes of a renamed item"""
+    if not created:
+        update_search_vectors(
+            instance.recipe_set.values_list('pk', flat=True),
+        )
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def recipe_item_deleted(sender, instance, **kwargs):
+    """Refresh the search vectors of the recipes losing a deleted item
+
+    Deleting an item removes its links without an m2m_changed signal, so
+    the recipes are found before and refreshed once the links are gone.
+    """
+    recipe_ids = list(instance.recipe_set.values_list('pk', flat=True))
+    if recipe_ids:
+        transaction.on_commit(lambda: update_search_vectors(recipe_ids))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def recipe_links_searched(sender, instance, action, reverse, pk_set,
+                          **kwargs):
+    """Refresh the search vectors of recipes whose links changed"""
+    if reverse and action == 'pre_clear':
+        instance._cleared_recipe_ids = list(
+            instance.recipe_set.values_list('pk', flat=True),
+        )
+    elif action == 'post_clear' and reverse:
+        update_search_vectors(instance.__dict__.pop('_cleared_recipe_ids'))
+    elif action.startswith('post_'):
+        update_search_vectors(pk_set if reverse else [instance.pk])
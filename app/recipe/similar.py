@@ -0,0 +1,92 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db.models import Count
+
+from core.models import Recipe
+
+
+RELATED_FIELDS = ('tags', 'ingredients')
+
+# Recipe IDs counted per query, each is a bound parameter and SQLite
+# allows 999 per query before version 3.32
+COUNT_CHUNK_SIZE = 500
+
+
+def _relation(field_name):
+    """Return the through model and its recipe and item column names"""
+    field = Recipe._meta.get_field(field_name)
+    return (
+        field.remote_field.through,
+        field.m2m_column_name(),
+        field.m2m_reverse_name(),
+    )
+
+
+def find_candidates(recipe, limit):
+    """Return recipe ID to number of tags and ingredients shared
+
+    The through tables are the inverted index: their (item, recipe)
+    indexes list the recipes of every tag and ingredient of the recipe,
+    so only recipes sharing at least one of them are ever read. Each
+    relation keeps its limit best candidates, which bounds the scoring
+    work on large accounts.
+    """
+    shared = Counter()
+    for field_name in RELATED_FIELDS:
+        through, recipe_column, item_column = _relation(field_name)
+        item_ids = through.objects.filter(
+            **{recipe_column: recipe.pk},
+        ).values(item_column)
+        links = through.objects.filter(
+            **{f'{item_column}__in': item_ids},
+            recipe__user_id=recipe.user_id,
+        ).exclude(
+            **{recipe_column: recipe.pk},
+        ).values(recipe_column).annotate(
+            shared=Count(item_column),
+        ).order_by('-shared', recipe_column)[:limit]
+        for row in links:
+            shared[row[recipe_column]] += row['shared']
+    return shared
+
+
+def count_features(recipe_ids):
+    """Return recipe ID to number of tags and ingredients
+
+    The IDs are counted COUNT_CHUNK_SIZE at a time, the candidates of
+    both relations together can exceed the parameters of one query.
+    """
+    recipe_ids = list(recipe_ids)
+    sizes = Counter()
+    for start in range(0, len(recipe_ids), COUNT_CHUNK_SIZE):
+        chunk = recipe_ids[start:start + COUNT_CHUNK_SIZE]
+        for field_name in RELATED_FIELDS:
+            through, recipe_column, _ = _relation(field_name)
+            rows = through.objects.filter(
+                **{f'{recipe_column}__in': chunk},
+            ).values(recipe_column).annotate(
+                size=Count(recipe_column),
+            ).order_by()
+            for row in rows:
+                sizes[row[recipe_column]] += row['size']
+    return sizes
+
+
+def similar_recipes(recipe, limit):
+    """Return (recipe ID, similarity) of the recipes most like recipe
+
+    The similarity is the Jaccard index of the tag and ingredient sets,
+    shared items over the items of either recipe.
+    """
+    shared = find_candidates(recipe, settings.SIMILAR_CANDIDATES)
+    if not shared:
+        return []
+    sizes = count_features(list(shared) + [recipe.pk])
+    size = sizes[recipe.pk]
+    scores = [
+        (recipe_id, count / (size + sizes[recipe_id] - count))
+        for recipe_id, count in shared.items()
+    ]
+    scores.sort(key=lambda score: (-score[1], score[0]))
+    return scores[:limit]
@@ -1,8 +1,12 @@
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from recipe import cache
+
 
 class TestPublicApi(TestCase):
     """Test the publicly available API"""
@@ -24,3 +28,18 @@ class TestPrivateApi(TestCase):
             'password123',
         )
         self.client.force_authenticate(self.user)
+        cache.get_cache().clear()
+
+    def _count_queries(self, url, params=None):
+        """Return the number of queries issued by a GET to the given URL"""
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url, params)
+        return len(context.captured_queries)
+
+    def assertConstantQueries(self, url, add_object, params=None):
+        """Assert that GET url costs the same however many objects exist"""
+        add_object()
+        baseline = self._count_queries(url, params)
+        for _ in range(4):
+            add_object()
+        self.assertEqual(self._count_queries(url, params), baseline)
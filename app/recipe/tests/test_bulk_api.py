@@ -0,0 +1,229 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from core.models import Ingredient
+from core.models import Recipe
+from core.models import Tag
+from recipe.tests.test_api_base import TestPrivateApi
+
+
+RECIPE_BULK_URL = reverse('recipe:recipe-bulk')
+TAG_BULK_URL = reverse('recipe:tag-bulk')
+TAG_URL = reverse('recipe:tag-list')
+
+
+def recipe_payload(**params):
+    """Return a valid payload for one recipe"""
+    payload = {
+        'name': 'Sample recipe',
+        'time_minutes': 10,
+        'price': '5.00',
+    }
+    payload.update(params)
+    return payload
+
+
+class TestBulkRecipeApi(TestPrivateApi):
+
+    def setUp(self):
+        super().setUp()
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.ingredient = Ingredient.objects.create(
+            user=self.user,
+            name='Tofu',
+        )
+
+    def test_bulk_create_recipes(self):
+        """Test creating recipes with their tags and ingredients"""
+        payload = [
+            recipe_payload(name='Stir fry', tags=[self.tag.id]),
+            recipe_payload(
+                name='Scramble',
+                tags=[self.tag.id],
+                ingredients=[self.ingredient.id],
+            ),
+        ]
+        response = self.client.post(RECIPE_BULK_URL, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['succeeded']), 2)
+        self.assertEqual(response.data['errors'], [])
+
+        recipe = Recipe.objects.get(id=response.data['succeeded'][1]['id'])
+        self.assertEqual(recipe.name, 'Scramble')
+        self.assertEqual(list(recipe.ingredients.all()), [self.ingredient])
+        self.tag.refresh_from_db()
+        self.assertEqual(self.tag.recipe_count, 2)
+
+    def test_bulk_create_reports_item_errors(self):
+        """Test invalid items are reported without failing the batch"""
+        other_user = get_user_model().objects.create_user(
+            'other@gmail.com',
+            'password123',
+        )
+        other_tag = Tag.objects.create(user=other_user, name='Keto')
+        payload = [
+            recipe_payload(),
+            recipe_payload(name=''),
+            recipe_payload(tags=[other_tag.id]),
+        ]
+        response = self.client.post(RECIPE_BULK_URL, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [row['index'] for row in response.data['succeeded']],
+            [0],
+        )
+        self.assertEqual(
+            [row['index'] for row in response.data['errors']],
+            [1, 2],
+        )
+        self.assertIn('tags', response.data['errors'][1]['errors'])
+        self.assertEqual(Recipe.objects.count(), 1)
+
+    def test_bulk_write_repeated_ids(self):
+        """Test an item listed twice for a recipe is linked once"""
+        payload = [recipe_payload(
+            tags=[self.tag.id, self.tag.id],
+            ingredients=[self.ingredient.id, self.ingredient.id],
+        )]
+        response = self.client.post(RECIPE_BULK_URL, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        recipe_id = response.data['succeeded'][0]['id']
+
+        response = self.client.patch(
+            RECIPE_BULK_URL,
+            [{'id': recipe_id, 'tags': [self.tag.id, self.tag.id]}],
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        recipe = Recipe.objects.get(id=recipe_id)
+        self.assertEqual(list(recipe.tags.all()), [self.tag])
+        self.assertEqual(list(recipe.ingredients.all()), [self.ingredient])
+        self.tag.refresh_from_db()
+        self.assertEqual(self.tag.recipe_count, 1)
+
+    @skipUnlessDBFeature('can_return_ids_from_bulk_insert')
+    def test_bulk_create_constant_queries(self):
+        """Test the queries of a bulk create do not grow with its size"""
+        def count_queries(size):
+            payload = [
+                recipe_payload(tags=[self.tag.id]) for _ in range(size)
+            ]
+            with CaptureQueriesContext(connection) as context:
+                self.client.post(RECIPE_BULK_URL, payload, format='json')
+            return len(context.captured_queries)
+
+        self.assertEqual(count_queries(1), count_queries(50))
+
+    def test_bulk_update_recipes(self):
+        """Test updating several recipes, replacing their tags"""
+        recipes = [
+            Recipe.objects.create(
+                user=self.user,
+                name=name,
+                time_minutes=5,
+                price=2,
+            )
+            for name in ('Toast', 'Salad')
+        ]
+        recipes[0].tags.add(self.tag)
+        new_tag = Tag.objects.create(user=self.user, name='Quick')
+        payload = [
+            {'id': recipes[0].id, 'tags': [new_tag.id]},
+            {'id': recipes[1].id, 'name': 'Green salad'},
+            {'id': 0, 'name': 'Missing'},
+        ]
+        response = self.client.patch(RECIPE_BULK_URL, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['succeeded']), 2)
+        self.assertEqual(response.data['errors'][0]['index'], 2)
+
+        self.assertEqual(list(recipes[0].tags.all()), [new_tag])
+        recipes[1].refresh_from_db()
+        self.assertEqual(recipes[1].name, 'Green salad')
+        self.tag.refresh_from_db()
+        self.assertEqual(self.tag.recipe_count, 0)
+
+    def test_bulk_delete_recipes(self):
+        """Test deleting several recipes by ID"""
+        recipe = Recipe.objects.create(
+            user=self.user,
+            name='Toast',
+            time_minutes=5,
+            price=2,
+        )
+        response = self.client.delete(
+            RECIPE_BULK_URL,
+            [recipe.id, 'x'],
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['succeeded'][0]['id'], recipe.id)
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_requires_list(self):
+        """Test a bulk request body must be a list"""
+        response = self.client.post(
+            RECIPE_BULK_URL,
+            recipe_payload(),
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestBulkTagApi(TestPrivateApi):
+
+    def test_bulk_create_tags(self):
+        """Test creating several tags at once"""
+        payload = [{'name': 'Vegan'}, {'name': 'Quick'}, {'name': ''}]
+        response = self.client.post(TAG_BULK_URL, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            sorted(Tag.objects.filter(user=self.user).values_list(
+                'name', flat=True,
+            )),
+            ['Quick', 'Vegan'],
+        )
+        self.assertEqual(response.data['errors'][0]['index'], 2)
+
+    def test_bulk_create_tags_autocompleted(self):
+        """Test tags inserted without signals are suggested right away"""
+        Tag.objects.create(user=self.user, name='Vegan')
+        self.client.get(TAG_URL, {'prefix': 've'})
+
+        with patch.object(
+            connection.features,
+            'can_return_ids_from_bulk_insert',
+            True,
+        ):
+            response = self.client.post(
+                TAG_BULK_URL,
+                [{'name': 'Veggie'}],
+                format='json',
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.get(TAG_URL, {'prefix': 've'})
+        self.assertEqual(
+            [tag['name'] for tag in response.data['results']],
+            ['Vegan', 'Veggie'],
+        )
+
+    def test_bulk_delete_tags_of_user_only(self):
+        """Test tags of other users cannot be deleted"""
+        other_user = get_user_model().objects.create_user(
+            'other@gmail.com',
+            'password123',
+        )
+        tag = Tag.objects.create(user=other_user, name='Keto')
+
+        response = self.client.delete(TAG_BULK_URL, [tag.id], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(Tag.objects.filter(id=tag.id).exists())
@@ -0,0 +1,153 @@
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from core.models import Recipe
+from core.models import Tag
+from recipe import cache
+from recipe import checks
+from recipe.tests.test_api_base import TestPrivateApi
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=True)
+class TestResponseCache(TestPrivateApi):
+
+    RECIPES_URL = reverse('recipe:recipe-list')
+    TAGS_URL = reverse('recipe:tag-list')
+
+    def setUp(self):
+        super().setUp()
+        cache.stats.reset()
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            name='Avocado toast',
+            price=7.5,
+            time_minutes=5,
+        )
+
+    def test_repeated_list_served_from_cache(self):
+        """Test a repeated list request is answered without queries"""
+        response = self.client.get(self.RECIPES_URL)
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(self.RECIPES_URL)
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached['X-Cache'], 'HIT')
+        self.assertEqual(cached.data, response.data)
+        self.assertEqual((cache.stats.hits, cache.stats.misses), (1, 1))
+
+    @override_settings(RESPONSE_CACHE_ENABLED=False)
+    def test_cache_disabled(self):
+        """Test responses are neither cached nor validated when disabled"""
+        self.client.get(self.RECIPES_URL)
+        response = self.client.get(self.RECIPES_URL)
+
+        self.assertNotIn('X-Cache', response)
+        self.assertNotIn('ETag', response)
+        self.assertEqual(cache.stats.misses, 0)
+
+    def test_process_local_cache_rejected(self):
+        """Test the checks reject caching responses in local memory"""
+        self.assertIsInstance(cache.get_cache(), LocMemCache)
+        errors = checks.check_response_cache(None)
+        self.assertEqual([error.id for error in errors], ['recipe.E001'])
+
+        with override_settings(RESPONSE_CACHE_ENABLED=False):
+            self.assertEqual(checks.check_response_cache(None), [])
+
+    def test_filter_params_normalized(self):
+        """Test the same IDs in another order share a cache entry"""
+        tag1 = Tag.objects.create(user=self.user, name='Vegan')
+        tag2 = Tag.objects.create(user=self.user, name='Quick')
+
+        self.client.get(self.RECIPES_URL, {'tags': f'{tag1.id},{tag2.id}'})
+        response = self.client.get(
+            self.RECIPES_URL,
+            {'tags': f'{tag2.id},{tag1.id}'},
+        )
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    def test_update_invalidates(self):
+        """Test updating a recipe is visible on the next read"""
+        url = reverse('recipe:recipe-detail', args=[self.recipe.id])
+        self.client.get(url)
+
+        self.client.patch(url, {'name': 'Guacamole'})
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['name'], 'Guacamole')
+
+    def test_tag_write_invalidates(self):
+        """Test creating a tag is visible on the next tag list"""
+        self.client.get(self.TAGS_URL)
+
+        self.client.post(self.TAGS_URL, {'name': 'Brunch'})
+        response = self.client.get(self.TAGS_URL)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['results']), 1)
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=True)
+class TestConditionalGet(TestPrivateApi):
+
+    RECIPES_URL = reverse('recipe:recipe-list')
+
+    def setUp(self):
+        super().setUp()
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            name='Avocado toast',
+            price=7.5,
+            time_minutes=5,
+        )
+
+    def test_matching_etag_not_modified(self):
+        """Test a request with the current ETag gets a 304 without queries"""
+        response = self.client.get(self.RECIPES_URL)
+        self.assertIn('Last-Modified', response)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                self.RECIPES_URL,
+                HTTP_IF_NONE_MATCH=response['ETag'],
+            )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_stale_etag_modified(self):
+        """Test an ETag from before a change gets the full response"""
+        etag = self.client.get(self.RECIPES_URL)['ETag']
+        self.recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+
+        response = self.client.get(self.RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_differs_per_query(self):
+        """Test the detail and list responses do not share an ETag"""
+        detail_url = reverse('recipe:recipe-detail', args=[self.recipe.id])
+        etag = self.client.get(self.RECIPES_URL)['ETag']
+
+        response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_if_modified_since_ignored(self):
+        """Test If-Modified-Since alone does not give a 304"""
+        last_modified = self.client.get(self.RECIPES_URL)['Last-Modified']
+
+        response = self.client.get(
+            self.RECIPES_URL,
+            HTTP_IF_MODIFIED_SINCE=last_modified,
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_etag_differs_per_format(self):
+        """Test each response format has its own ETag and cache entry"""
+        response = self.client.get(self.RECIPES_URL)
+        self.assertIn('Accept', response['Vary'])
+
+        api = self.client.get(self.RECIPES_URL, HTTP_ACCEPT='text/html')
+        self.assertEqual(api.status_code, status.HTTP_200_OK)
+        self.assertEqual(api['X-Cache'], 'MISS')
+        self.assertNotEqual(api['ETag'], response['ETag'])
@@ -0,0 +1,99 @@
+from django.urls import reverse
+from rest_framework import status
+
+from recipe.tests.test_api_base import TestPrivateApi
+from recipe.tests.test_recipe import create_ingredient
+from recipe.tests.test_recipe import create_recipe
+
+
+COOKABLE_URL = reverse('recipe:recipe-cookable')
+
+
+class TestCookableApi(TestPrivateApi):
+
+    def setUp(self):
+        super().setUp()
+        self.egg = create_ingredient(self.user, 'Egg')
+        self.flour = create_ingredient(self.user, 'Flour')
+        self.milk = create_ingredient(self.user, 'Milk')
+        self.sugar = create_ingredient(self.user, 'Sugar')
+
+        self.omelette = create_recipe(self.user, name='Omelette')
+        self.omelette.ingredients.add(self.egg)
+        self.pancakes = create_recipe(self.user, name='Pancakes')
+        self.pancakes.ingredients.add(self.egg, self.flour, self.milk)
+        self.cake = create_recipe(self.user, name='Cake')
+        self.cake.ingredients.add(
+            self.egg, self.flour, self.milk, self.sugar,
+        )
+        self.toast = create_recipe(self.user, name='Toast')
+
+    def cookable(self, *ingredients, **params):
+        """Rank the recipes for the given ingredients"""
+        ids = ','.join(str(ingredient.id) for ingredient in ingredients)
+        return self.client.get(COOKABLE_URL, {'ingredients': ids, **params})
+
+    def test_rank_by_missing_ingredients(self):
+        """Test recipes missing the fewest ingredients come first"""
+        response = self.cookable(self.egg, self.flour, self.milk)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual(
+            [recipe['id'] for recipe in results],
+            [self.pancakes.id, self.omelette.id, self.cake.id],
+        )
+        self.assertEqual(
+            [(recipe['matched_count'], recipe['missing_count'])
+             for recipe in results],
+            [(3, 0), (1, 0), (3, 1)],
+        )
+        self.assertEqual(results[2]['coverage'], 0.75)
+
+    def test_rank_excludes_unmatched(self):
+        """Test recipes using none of the ingredients are left out"""
+        response = self.cookable(self.sugar)
+
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data['results']],
+            [self.cake.id],
+        )
+
+    def test_rank_ignores_match_mode(self):
+        """Test recipes using only some ingredients are ranked with match"""
+        response = self.cookable(self.egg, self.flour, match='all')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data['results']],
+            [self.omelette.id, self.pancakes.id, self.cake.id],
+        )
+
+    def test_rank_limit(self):
+        """Test only the requested number of recipes is returned"""
+        response = self.cookable(self.egg, limit=2)
+        invalid = self.cookable(self.egg, limit=0)
+
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data['results']],
+            [self.omelette.id, self.pancakes.id],
+        )
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rank_requires_ingredients(self):
+        """Test the ingredients parameter is required"""
+        response = self.client.get(COOKABLE_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rank_constant_queries(self):
+        """Test ranking costs the same however many recipes match"""
+        def add_recipe():
+            recipe = create_recipe(self.user)
+            recipe.ingredients.add(self.egg, self.sugar)
+
+        self.assertConstantQueries(
+            COOKABLE_URL,
+            add_recipe,
+            {'ingredients': f'{self.egg.id},{self.milk.id}'},
+        )
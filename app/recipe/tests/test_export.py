@@ -0,0 +1,63 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+
+from core.models import Ingredient
+from core.models import Recipe
+from core.models import Tag
+from recipe.export import export_recipes
+from recipe.tests.test_api_base import TestPrivateApi
+
+
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+class TestRecipeExport(TestPrivateApi):
+
+    def setUp(self):
+        super().setUp()
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        ingredient = Ingredient.objects.create(user=self.user, name='Tofu')
+        self.recipes = []
+        for name in ('Stir fry', 'Scramble', 'Salad'):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                name=name,
+                time_minutes=10,
+                price=5,
+            )
+            recipe.tags.add(tag)
+            recipe.ingredients.add(ingredient)
+            self.recipes.append(recipe)
+
+    def test_export_streams_ndjson(self):
+        """Test the export endpoint streams one JSON object per recipe"""
+        response = self.client.get(EXPORT_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        recipes = [json.loads(line) for line in lines]
+        self.assertEqual(
+            [recipe['name'] for recipe in recipes],
+            ['Stir fry', 'Scramble', 'Salad'],
+        )
+        self.assertEqual(recipes[0]['tags'], [{
+            'id': self.recipes[0].tags.get().id,
+            'name': 'Vegan',
+        }])
+        self.assertEqual(recipes[0]['price'], '5.00')
+
+    def test_export_constant_queries_per_chunk(self):
+        """Test each chunk of recipes costs a fixed number of queries"""
+        with self.assertNumQueries(5):
+            list(export_recipes(self.user, chunk_size=2))
+
+    def test_export_command(self):
+        """Test the export command writes the recipes of a user"""
+        out = StringIO()
+        call_command('export_recipes', self.user.email, stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 3)
@@ -40,7 +40,7 @@ class TestPrivateIngredientApi(TestPrivateApi):
         ingredients = Ingredient.objects.all().order_by('-name')
         serializer = IngredientSerializer(ingredients, many=True)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
 
     def test_get_user_ingredients(self):
         user2 = get_user_model().objects.create_user(
@@ -55,8 +55,8 @@ class TestPrivateIngredientApi(TestPrivateApi):
 
         response = self.client.get(self.API_URL)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), len(user_ingredients))
-        for ingredient in response.data:
+        self.assertEqual(len(response.data['results']), len(user_ingredients))
+        for ingredient in response.data['results']:
             self.assertIn(ingredient['name'], user_ingredients)
 
     def test_create_ingredient_successful(self):
@@ -93,8 +93,8 @@ class TestPrivateIngredientApi(TestPrivateApi):
 
         serializer1 = IngredientSerializer(ingredient1)
 
-        self.assertEqual(len(response.data), 1)
-        self.assertIn(serializer1.data, response.data)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIn(serializer1.data, response.data['results'])
 
     def test_retrieve_ingredients_assigned_to_recipe_unique(self):
         """Test that filtering assigned ingredients are unique"""
@@ -122,5 +122,27 @@ class TestPrivateIngredientApi(TestPrivateApi):
 
         serializer1 = IngredientSerializer(ingredient1)
 
-        self.assertEqual(len(response.data), 1)
-        self.assertIn(serializer1.data, response.data)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIn(serializer1.data, response.data['results'])
+
+    def test_retrieve_ingredients_min_usage(self):
+        """Test filtering ingredients used by a minimum number of recipes"""
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+        saffron = Ingredient.objects.create(user=self.user, name='Saffron')
+        Ingredient.objects.create(user=self.user, name='Sumac')
+        for name in ('Paella', 'Fries', 'Risotto'):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                name=name,
+                price=10.0,
+                time_minutes=30,
+            )
+            recipe.ingredients.add(salt)
+        recipe.ingredients.add(saffron)
+
+        response = self.client.get(self.API_URL, {'min_usage': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data['results'],
+            [IngredientSerializer(salt).data],
+        )
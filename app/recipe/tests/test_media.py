@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+from core.storage import recipe_image_storage
+from recipe import images
+from recipe.tests.test_api_base import TestPrivateApi
+
+
+def media_url(name):
+    return reverse('media', args=[name])
+
+
+class TestRecipeMediaApi(TestPrivateApi):
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+
+        self.name = recipe_image_storage.save(
+            'uploads/recipe/a.jpg',
+            ContentFile(b'image'),
+        )
+        self.thumbnail = images.derivative_name(self.name, 'thumbnail')
+        recipe_image_storage.save(
+            self.thumbnail,
+            ContentFile(b'thumbnail'),
+        )
+        Recipe.objects.create(
+            user=self.user,
+            name='Sample recipe',
+            time_minutes=10,
+            price=5.0,
+            image=self.name,
+        )
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root)
+
+    def test_login_required(self):
+        """Test that login is required to retrieve images"""
+        response = APIClient().get(media_url(self.name))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_serve_own_image_and_derivative(self):
+        """Test an owner can retrieve an image and its derivatives"""
+        response = self.client.get(media_url(self.name))
+        derivative = self.client.get(media_url(self.thumbnail))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), b'image')
+        self.assertEqual(derivative.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            b''.join(derivative.streaming_content),
+            b'thumbnail',
+        )
+
+    def test_serve_image_accept(self):
+        """Test images are served to clients only accepting images"""
+        response = self.client.get(
+            media_url(self.thumbnail),
+            HTTP_ACCEPT='image/webp',
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_serve_other_users_image(self):
+        """Test images of other users' recipes are not found"""
+        other_user = get_user_model().objects.create_user(
+            'other@gmail.com',
+            'password123',
+        )
+        self.client.force_authenticate(other_user)
+
+        response = self.client.get(media_url(self.name))
+        derivative = self.client.get(media_url(self.thumbnail))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(derivative.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_serve_unreferenced_file(self):
+        """Test stored files no recipe uses are not found"""
+        name = recipe_image_storage.save(
+            'uploads/recipe/b.jpg',
+            ContentFile(b'other'),
+        )
+        self.assertTrue(os.path.exists(recipe_image_storage.path(name)))
+
+        response = self.client.get(media_url(name))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -1,7 +1,10 @@
 import os
+import shutil
 import tempfile
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.test import override_settings
 from django.urls import reverse
 from PIL import Image
 from rest_framework import status
@@ -9,6 +12,9 @@ from rest_framework import status
 from core.models import Ingredient
 from core.models import Recipe
 from core.models import Tag
+from core.storage import recipe_image_storage
+from recipe import filters
+from recipe import images
 from recipe.serializers import RecipeDetailSerializer
 from recipe.serializers import RecipeSerializer
 from recipe.tests.test_api_base import TestPublicApi
@@ -67,9 +73,9 @@ class TestPrivateTagsApi(TestPrivateApi):
         response = self.client.get(self.API_URL)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        recipes = Recipe.objects.all().order_by('-id')
+        recipes = Recipe.objects.all().order_by('id')
         serializer = RecipeSerializer(recipes, many=True)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
 
     def test_retrieve_user_recipes(self):
         """Test retrieving recipes of a specific user"""
@@ -86,7 +92,25 @@ class TestPrivateTagsApi(TestPrivateApi):
 
         recipes = Recipe.objects.filter(user=self.user)
         serializer = RecipeSerializer(recipes, many=True)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
+
+    def test_retrieve_recipes_paginated(self):
+        """Test that recipes are returned in pages ordered by id"""
+        recipes = [create_recipe(user=self.user) for _ in range(3)]
+
+        response = self.client.get(self.API_URL, {'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data['results']],
+            [recipe.id for recipe in recipes[:2]],
+        )
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data['results']],
+            [recipes[2].id],
+        )
+        self.assertIsNone(response.data['next'])
 
     def test_view_recipe_detail(self):
         """Test viewing a recipe detail"""
@@ -220,9 +244,9 @@ class TestPrivateTagsApi(TestPrivateApi):
         serializer2 = RecipeSerializer(recipe2)
         serializer3 = RecipeSerializer(recipe3)
 
-        self.assertIn(serializer1.data, response.data)
-        self.assertIn(serializer2.data, response.data)
-        self.assertNotIn(serializer3.data, response.data)
+        self.assertIn(serializer1.data, response.data['results'])
+        self.assertIn(serializer2.data, response.data['results'])
+        self.assertNotIn(serializer3.data, response.data['results'])
 
     def test_filter_recipes_by_ingredients(self):
         """Test returning recipes with specific ingredients"""
@@ -252,19 +276,128 @@ class TestPrivateTagsApi(TestPrivateApi):
         serializer2 = RecipeSerializer(recipe2)
         serializer3 = RecipeSerializer(recipe3)
 
-        self.assertIn(serializer1.data, response.data)
-        self.assertIn(serializer2.data, response.data)
-        self.assertNotIn(serializer3.data, response.data)
+        self.assertIn(serializer1.data, response.data['results'])
+        self.assertIn(serializer2.data, response.data['results'])
+        self.assertNotIn(serializer3.data, response.data['results'])
+
+    def test_list_recipes_constant_queries(self):
+        """Test listing recipes does not issue a query per recipe"""
+        def add_recipe():
+            recipe = create_recipe(user=self.user)
+            recipe.tags.add(create_tag(user=self.user))
+            recipe.ingredients.add(create_ingredient(user=self.user))
+
+        self.assertConstantQueries(self.API_URL, add_recipe)
+
+    def test_view_recipe_detail_constant_queries(self):
+        """Test viewing a recipe does not issue a query per related item"""
+        recipe = create_recipe(user=self.user)
+
+        def add_related():
+            recipe.tags.add(create_tag(user=self.user))
+            recipe.ingredients.add(create_ingredient(user=self.user))
+
+        self.assertConstantQueries(self.get_detail_url(recipe.id), add_related)
+
+    def test_filter_recipes_by_tags_unique(self):
+        """Test recipes matching several filter tags are returned once"""
+        recipe = create_recipe(user=self.user)
+        tag1 = create_tag(user=self.user, name='Vegan')
+        tag2 = create_tag(user=self.user, name='Quick')
+        recipe.tags.add(tag1, tag2)
+
+        response = self.client.get(
+            self.API_URL,
+            {'tags': f'{tag1.id},{tag2.id}'},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_filter_recipes_matching_all_tags(self):
+        """Test returning recipes that have every requested tag"""
+        tag1 = create_tag(user=self.user, name='Vegan')
+        tag2 = create_tag(user=self.user, name='Quick')
+        recipe1 = create_recipe(user=self.user, name='Hummus')
+        recipe1.tags.add(tag1, tag2)
+        recipe2 = create_recipe(user=self.user, name='Lentil stew')
+        recipe2.tags.add(tag1)
+
+        response = self.client.get(
+            self.API_URL,
+            {'tags': f'{tag1.id},{tag2.id}', 'match': 'all'},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data['results'],
+            [RecipeSerializer(recipe1).data],
+        )
+
+    def test_filter_recipes_matching_all_tags_and_ingredients(self):
+        """Test match all applies to both tags and ingredients"""
+        tag = create_tag(user=self.user, name='Vegan')
+        ingredient1 = create_ingredient(user=self.user, name='Chickpeas')
+        ingredient2 = create_ingredient(user=self.user, name='Tahini')
+        recipe1 = create_recipe(user=self.user, name='Hummus')
+        recipe1.tags.add(tag)
+        recipe1.ingredients.add(ingredient1, ingredient2)
+        recipe2 = create_recipe(user=self.user, name='Falafel')
+        recipe2.tags.add(tag)
+        recipe2.ingredients.add(ingredient1)
+
+        response = self.client.get(self.API_URL, {
+            'tags': f'{tag.id}',
+            'ingredients': f'{ingredient1.id},{ingredient2.id}',
+            'match': 'all',
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data['results']],
+            [recipe1.id],
+        )
+
+    def test_filter_recipes_invalid_match(self):
+        """Test an unknown match mode is rejected"""
+        response = self.client.get(self.API_URL, {'tags': '1', 'match': 'x'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_match_ignored_outside_list(self):
+        """Test the match mode is only validated when listing recipes"""
+        recipe = create_recipe(user=self.user)
+
+        response = self.client.get(
+            self.get_detail_url(recipe.id),
+            {'match': 'x'},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_filter_recipes_query_does_not_grow(self):
+        """Test the filter query has the same joins for any number of IDs"""
+        queries = [
+            filters.filter_by_related(
+                Recipe.objects.all(), 'tags', range(count), filters.MATCH_ALL,
+            ).query
+            for count in (1, 50)
+        ]
+        self.assertEqual(
+            str(queries[0]).count('JOIN'),
+            str(queries[1]).count('JOIN'),
+        )
 
 
 class TestRecipeImageUpload(TestPrivateApi):
 
     def setUp(self):
         super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
         self.recipe = create_recipe(user=self.user)
 
     def tearDown(self):
-        self.recipe.image.delete()
+        images.pipeline.wait()
+        self.override.disable()
+        shutil.rmtree(self.media_root)
 
     def test_upload_image(self):
         """Test uploading an image to a recipe"""
@@ -293,3 +426,73 @@ class TestRecipeImageUpload(TestPrivateApi):
             format='multipart',
         )
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_upload_image_generates_derivatives(self):
+        """Test resized copies of an uploaded image are generated"""
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            Image.new('RGB', (800, 400)).save(ntf, format='JPEG')
+            ntf.seek(0)
+            response = self.client.post(
+                url,
+                {'image': ntf},
+                format='multipart',
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(response.data['images']),
+            set(settings.IMAGE_DERIVATIVE_SIZES),
+        )
+
+        images.pipeline.wait()
+        self.recipe.refresh_from_db()
+        thumbnail = images.derivative_name(self.recipe.image.name, 'thumbnail')
+        with recipe_image_storage.open(thumbnail) as derivative:
+            self.assertEqual(
+                Image.open(derivative).size,
+                (settings.IMAGE_DERIVATIVE_SIZES['thumbnail'], 75),
+            )
+
+    def upload_image(self, image, image_format='JPEG'):
+        """Upload an image to the sample recipe and return the response"""
+        with tempfile.NamedTemporaryFile() as ntf:
+            image.save(ntf, format=image_format)
+            ntf.seek(0)
+            return self.client.post(
+                image_upload_url(self.recipe.id),
+                {'image': ntf},
+                format='multipart',
+            )
+
+    @override_settings(IMAGE_UPLOAD_MAX_DIMENSION=100)
+    def test_upload_image_too_large_dimensions(self):
+        """Test an image with oversize dimensions is rejected"""
+        response = self.upload_image(Image.new('RGB', (200, 50)))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('200x50', response.data['image'][0])
+
+    @override_settings(IMAGE_UPLOAD_MAX_BYTES=1024)
+    def test_upload_image_too_many_bytes(self):
+        """Test an image larger than the byte limit is rejected"""
+        image = Image.frombytes('L', (100, 100), os.urandom(100 * 100))
+        response = self.upload_image(image, 'PNG')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    def test_upload_image_unsupported_format(self):
+        """Test an image in a format that is not allowed is rejected"""
+        response = self.upload_image(Image.new('RGB', (10, 10)), 'BMP')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_upload_file_not_an_image(self):
+        """Test a file that is not an image is rejected"""
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            ntf.write(b'not an image')
+            ntf.seek(0)
+            response = self.client.post(
+                image_upload_url(self.recipe.id),
+                {'image': ntf},
+                format='multipart',
+            )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
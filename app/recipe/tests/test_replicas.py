@@ -0,0 +1,116 @@
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.db import connections
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from core.db import routers
+from core.models import Recipe
+from recipe import checks
+from recipe.tests.test_api_base import TestPrivateApi
+from recipe.tests.test_recipe import create_recipe
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], REPLICA_STICKY_SECONDS=60)
+class TestReplicaReads(TestPrivateApi):
+    """Test recipe reads against a separate SQLite database as replica"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.TemporaryDirectory()
+        connections.databases['replica'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(cls.directory.name, 'replica.sqlite3'),
+        }
+        connections.ensure_defaults('replica')
+        with override_settings(DATABASE_REPLICAS=[]):
+            call_command('migrate', database='replica', verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        connections['replica'].close()
+        del connections.databases['replica']
+        del connections._connections.replica
+        cls.directory.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.user.save(using='replica', force_insert=True)
+        self.addCleanup(
+            lambda: self.user.delete(using='replica'),
+        )
+        Recipe.objects.using('replica').create(
+            user=self.user,
+            name='Replica recipe',
+            time_minutes=5,
+            price=1.00,
+        )
+
+    def list_names(self):
+        """Return the names of the recipes listed by the API"""
+        response = self.client.get(RECIPES_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [recipe['name'] for recipe in response.data['results']]
+
+    @override_settings(REPLICA_STICKY_SECONDS=0)
+    def test_read_from_replica(self):
+        """Test safe requests read from the replica"""
+        create_recipe(self.user, name='Primary recipe')
+
+        self.assertEqual(self.list_names(), ['Replica recipe'])
+        self.assertIsNone(routers.get_read_database())
+
+    def test_read_your_writes(self):
+        """Test users read from the primary right after a write"""
+        create_recipe(self.user, name='Primary recipe')
+
+        self.assertEqual(self.list_names(), ['Primary recipe'])
+
+    @override_settings(REPLICA_STICKY_SECONDS=0)
+    def test_write_to_primary(self):
+        """Test unsafe requests write to and read from the primary"""
+        response = self.client.post(RECIPES_URL, {
+            'name': 'Created recipe',
+            'time_minutes': 10,
+            'price': 2.00,
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(
+            Recipe.objects.using('default')
+            .filter(name='Created recipe').exists()
+        )
+        self.assertFalse(
+            Recipe.objects.using('replica')
+            .filter(name='Created recipe').exists()
+        )
+
+    @override_settings(DATABASE_REPLICAS=[], REPLICA_STICKY_SECONDS=0)
+    def test_no_replicas(self):
+        """Test reads stay on the primary when no replica is configured"""
+        create_recipe(self.user, name='Primary recipe')
+
+        self.assertEqual(self.list_names(), ['Primary recipe'])
+
+    def test_migrations_skip_replicas(self):
+        """Test migrations are only applied to the primary"""
+        router = routers.ReplicaRouter()
+
+        self.assertFalse(router.allow_migrate('replica', 'core'))
+        self.assertIsNone(router.allow_migrate('default', 'core'))
+
+    def test_process_local_marker_rejected(self):
+        """Test the checks reject replicas with a per process write time"""
+        errors = checks.check_replica_marker(None)
+        self.assertEqual([error.id for error in errors], ['recipe.E002'])
+
+        with override_settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(checks.check_replica_marker(None), [])
@@ -0,0 +1,124 @@
+from unittest.mock import patch
+
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from core.db import routers
+from recipe import search
+from recipe.search import SearchIndex
+from recipe.tests.test_api_base import TestPrivateApi
+from recipe.tests.test_recipe import create_ingredient
+from recipe.tests.test_recipe import create_recipe
+from recipe.tests.test_recipe import create_tag
+
+
+class TestRecipeSearchApi(TestPrivateApi):
+
+    API_URL = reverse('recipe:recipe-list')
+
+    def setUp(self):
+        super().setUp()
+        self.curry = create_recipe(self.user, name='Chickpea curry')
+        self.soup = create_recipe(self.user, name='Tomato soup')
+        self.salad = create_recipe(self.user, name='Summer salad')
+        self.soup.tags.add(create_tag(self.user, 'Curry night'))
+        self.salad.ingredients.add(create_ingredient(self.user, 'Tomato'))
+
+    def search(self, text, **params):
+        """Search the recipes and return the IDs of the results"""
+        response = self.client.get(self.API_URL, {'search': text, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def test_search_names_ranked(self):
+        """Test recipe names rank above tag and ingredient names"""
+        self.assertEqual(self.search('curry'), [self.curry.id, self.soup.id])
+        self.assertEqual(self.search('TOMATO'), [self.soup.id, self.salad.id])
+
+    def test_search_matches_every_word(self):
+        """Test only recipes containing every searched word are returned"""
+        self.assertEqual(self.search('tomato soup'), [self.soup.id])
+        self.assertEqual(self.search('tomato curry'), [self.soup.id])
+        self.assertEqual(self.search('pasta'), [])
+
+    def test_search_only_own_recipes(self):
+        """Test the recipes of other users are not searched"""
+        other_user = self.user.__class__.objects.create_user(
+            'other@gmail.com',
+            'password123',
+        )
+        create_recipe(other_user, name='Green curry')
+
+        self.assertEqual(self.search('curry'), [self.curry.id, self.soup.id])
+
+    def test_search_blank(self):
+        """Test a blank search lists every recipe in creation order"""
+        self.assertEqual(
+            self.search(' '),
+            [self.curry.id, self.soup.id, self.salad.id],
+        )
+
+    def test_search_paginated(self):
+        """Test ranked search results are paginated with cursors"""
+        extra = create_recipe(self.user, name='Tomato curry')
+
+        response = self.client.get(
+            self.API_URL,
+            {'search': 'tomato', 'page_size': 2},
+        )
+        ids = [recipe['id'] for recipe in response.data['results']]
+        response = self.client.get(response.data['next'])
+        ids += [recipe['id'] for recipe in response.data['results']]
+
+        self.assertEqual(ids, [self.soup.id, extra.id, self.salad.id])
+        self.assertIsNone(response.data['next'])
+
+    @override_settings(SEARCH_FALLBACK_LIMIT=2)
+    def test_search_fallback_limit(self):
+        """Test only the best matches are queried without search vectors"""
+        extra = create_recipe(self.user, name='Tomato curry')
+
+        with patch.object(search, 'uses_search_vectors', return_value=False):
+            ids = self.search('tomato')
+
+        self.assertEqual(ids, [self.soup.id, extra.id])
+
+    def test_search_after_rename(self):
+        """Test renamed tags are searched under their new name"""
+        tag = self.soup.tags.get()
+        tag.name = 'Winter'
+        tag.save()
+
+        self.assertEqual(self.search('winter'), [self.soup.id])
+        self.assertEqual(self.search('night'), [])
+
+    def test_search_constant_queries(self):
+        """Test a search costs the same however many recipes match"""
+        self.assertConstantQueries(
+            self.API_URL,
+            lambda: create_recipe(self.user, name='Tomato bake'),
+            {'search': 'tomato'},
+        )
+
+    def test_update_search_vectors_on_primary(self):
+        """Test search vectors are written through the write database"""
+        recipe_ids = iter([self.curry.id])
+        routers.set_read_database('replica')
+        try:
+            search.update_search_vectors(recipe_ids)
+        finally:
+            routers.set_read_database(None)
+
+        if not search.uses_search_vectors():
+            # Without search vectors the IDs are not even read
+            self.assertEqual(list(recipe_ids), [self.curry.id])
+
+    def test_index_weights(self):
+        """Test the index sums the weights of the fields a word is in"""
+        self.curry.ingredients.add(create_ingredient(self.user, 'Curry'))
+
+        ranks = SearchIndex(self.user.pk).search('curry')
+
+        self.assertEqual(set(ranks), {self.curry.id, self.soup.id})
+        self.assertGreater(ranks[self.curry.id], ranks[self.soup.id])
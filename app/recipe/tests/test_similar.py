@@ -0,0 +1,117 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+
+from recipe import similar
+from recipe.tests.test_api_base import TestPrivateApi
+from recipe.tests.test_recipe import create_ingredient
+from recipe.tests.test_recipe import create_recipe
+from recipe.tests.test_recipe import create_tag
+
+
+def similar_url(recipe_id):
+    return reverse('recipe:recipe-similar', args=[recipe_id])
+
+
+class TestSimilarRecipesApi(TestPrivateApi):
+
+    def setUp(self):
+        super().setUp()
+        self.vegan = create_tag(self.user, 'Vegan')
+        self.quick = create_tag(self.user, 'Quick')
+        self.rice = create_ingredient(self.user, 'Rice')
+        self.beans = create_ingredient(self.user, 'Beans')
+
+        self.recipe = self.create_recipe(
+            (self.vegan, self.quick),
+            (self.rice, self.beans),
+        )
+
+    def create_recipe(self, tags=(), ingredients=()):
+        """Create a recipe with the given tags and ingredients"""
+        recipe = create_recipe(self.user)
+        recipe.tags.add(*tags)
+        recipe.ingredients.add(*ingredients)
+        return recipe
+
+    def similar(self, recipe, **params):
+        """Return the IDs and scores of the recipes similar to recipe"""
+        response = self.client.get(similar_url(recipe.id), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [
+            (result['id'], result['similarity'])
+            for result in response.data['results']
+        ]
+
+    def test_similar_ranked_by_jaccard(self):
+        """Test recipes sharing more of the items rank first"""
+        same = self.create_recipe(
+            (self.vegan, self.quick),
+            (self.rice, self.beans),
+        )
+        half = self.create_recipe((self.vegan,), (self.rice,))
+        diluted = self.create_recipe(
+            (self.vegan, create_tag(self.user, 'Dinner')),
+            (self.rice, create_ingredient(self.user, 'Salt')),
+        )
+        self.create_recipe((create_tag(self.user, 'Other'),))
+
+        self.assertEqual(self.similar(self.recipe), [
+            (same.id, 1.0),
+            (half.id, 0.5),
+            (diluted.id, 2 / 6),
+        ])
+
+    def test_similar_chunked_counts(self):
+        """Test the item counts are the same when split over queries"""
+        same = self.create_recipe(
+            (self.vegan, self.quick),
+            (self.rice, self.beans),
+        )
+        half = self.create_recipe((self.vegan,), (self.rice,))
+
+        with patch.object(similar, 'COUNT_CHUNK_SIZE', 1):
+            scores = self.similar(self.recipe)
+
+        self.assertEqual(scores, [(same.id, 1.0), (half.id, 0.5)])
+
+    def test_similar_limit(self):
+        """Test only the requested number of recipes is returned"""
+        first = self.create_recipe((self.vegan, self.quick))
+        self.create_recipe((self.vegan,))
+
+        self.assertEqual(
+            [recipe_id for recipe_id, _ in self.similar(self.recipe, limit=1)],
+            [first.id],
+        )
+
+    def test_similar_other_users(self):
+        """Test recipes of other users are neither used nor returned"""
+        other_user = get_user_model().objects.create_user(
+            'other@gmail.com',
+            'password123',
+        )
+        other_recipe = create_recipe(other_user)
+        other_recipe.tags.add(self.vegan)
+
+        self.assertEqual(self.similar(self.recipe), [])
+        response = self.client.get(similar_url(other_recipe.id))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_similar_refreshed(self):
+        """Test new links are taken into account straight away"""
+        other = self.create_recipe()
+        self.assertEqual(self.similar(self.recipe), [])
+
+        other.ingredients.add(self.beans)
+
+        self.assertEqual(self.similar(self.recipe), [(other.id, 0.25)])
+
+    def test_similar_constant_queries(self):
+        """Test the cost does not grow with the number of similar recipes"""
+        self.assertConstantQueries(
+            similar_url(self.recipe.id),
+            lambda: self.create_recipe((self.vegan,), (self.beans,)),
+        )
@@ -0,0 +1,64 @@
+from django.urls import reverse
+from rest_framework import status
+
+from recipe.tests.test_api_base import TestPrivateApi
+from recipe.tests.test_api_base import TestPublicApi
+from recipe.tests.test_recipe import create_recipe
+
+
+STATS_URL = reverse('recipe:stats')
+
+
+class TestPublicStatsApi(TestPublicApi):
+
+    API_URL = STATS_URL
+
+    def test_login_required(self):
+        """Test that login is required to retrieve statistics"""
+        self._test_login_required()
+
+
+class TestPrivateStatsApi(TestPrivateApi):
+
+    def test_retrieve_stats(self):
+        """Test retrieving the statistics of the user's recipes"""
+        create_recipe(self.user, time_minutes=10, price=2.0)
+        create_recipe(self.user, time_minutes=30, price=4.0)
+
+        response = self.client.get(STATS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['recipe_count'], 2)
+        self.assertEqual(response.data['time_minutes']['average'], 20)
+        self.assertEqual(response.data['time_minutes']['p90'], 30)
+
+    def test_retrieve_stats_empty(self):
+        """Test the statistics of a user without recipes"""
+        response = self.client.get(STATS_URL)
+
+        self.assertEqual(response.data['recipe_count'], 0)
+        self.assertIsNone(response.data['price']['average'])
+
+    def test_retrieve_stats_bulk_created(self):
+        """Test recipes created in bulk are counted once"""
+        response = self.client.post(
+            reverse('recipe:recipe-bulk'),
+            [
+                {'name': 'Soup', 'time_minutes': 10, 'price': '1.00'},
+                {'name': 'Stew', 'time_minutes': 50, 'price': '3.00'},
+            ],
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.get(STATS_URL)
+
+        self.assertEqual(response.data['recipe_count'], 2)
+        self.assertEqual(response.data['time_minutes']['average'], 30)
+
+    def test_retrieve_stats_constant_queries(self):
+        """Test the statistics cost the same however many recipes exist"""
+        self.assertConstantQueries(
+            STATS_URL,
+            lambda: create_recipe(self.user),
+        )
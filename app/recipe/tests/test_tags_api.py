@@ -1,10 +1,16 @@
+from base64 import b64decode
+from urllib.parse import parse_qs
+from urllib.parse import urlparse
+
 from django.contrib.auth import get_user_model
+from django.test import override_settings
 from django.urls import reverse
 
 from rest_framework import status
 
 from core.models import Recipe
 from core.models import Tag
+from recipe import autocomplete
 from recipe.serializers import TagSerializer
 from recipe.tests.test_api_base import TestPublicApi
 from recipe.tests.test_api_base import TestPrivateApi
@@ -35,7 +41,7 @@ class TestPrivateTagsApi(TestPrivateApi):
 
         tags = Tag.objects.all().order_by('-name')
         serializer = TagSerializer(tags, many=True)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
 
     def test_retrieve_user_tags(self):
         """Test that tags returned are for the authenticated user"""
@@ -51,8 +57,8 @@ class TestPrivateTagsApi(TestPrivateApi):
 
         response = self.client.get(self.API_URL)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), len(user_tags))
-        for tag in response.data:
+        self.assertEqual(len(response.data['results']), len(user_tags))
+        for tag in response.data['results']:
             self.assertIn(tag['name'], user_tags)
 
     def test_create_tag_successful(self):
@@ -94,8 +100,8 @@ class TestPrivateTagsApi(TestPrivateApi):
 
         serializer1 = TagSerializer(tag1)
 
-        self.assertEqual(len(response.data), 1)
-        self.assertIn(serializer1.data, response.data)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIn(serializer1.data, response.data['results'])
 
     def test_retrieve_tags_assigned_to_recipe_unique(self):
         """Test that filtering assigned tags are unique"""
@@ -123,5 +129,173 @@ class TestPrivateTagsApi(TestPrivateApi):
 
         serializer1 = TagSerializer(tag1)
 
-        self.assertEqual(len(response.data), 1)
-        self.assertIn(serializer1.data, response.data)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIn(serializer1.data, response.data['results'])
+
+    def test_retrieve_tags_paginated(self):
+        """Test walking the tag list page by page with cursors"""
+        names = ['Vegan', 'Spicy', 'Spicy', 'Quick', 'Dessert']
+        for name in names:
+            Tag.objects.create(user=self.user, name=name)
+
+        response = self.client.get(self.API_URL, {'page_size': 2})
+        seen = []
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 2)
+            seen.extend(tag['name'] for tag in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+
+        self.assertEqual(seen, sorted(names, reverse=True))
+
+    def test_retrieve_tags_by_popularity_paginated(self):
+        """Test popular pages follow each other among equal usage counts"""
+        tags = [
+            Tag.objects.create(user=self.user, name=f'Tag {number}')
+            for number in range(7)
+        ]
+        Tag.objects.filter(pk=tags[3].pk).update(recipe_count=2)
+        Tag.objects.filter(pk=tags[5].pk).update(recipe_count=1)
+        expected = [tags[3].id, tags[5].id] + [
+            tag.id for tag in tags if tag not in (tags[3], tags[5])
+        ]
+
+        params = {'ordering': 'popular', 'page_size': 2}
+        response = self.client.get(self.API_URL, params)
+        pages = []
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append(response)
+            if not response.data['next']:
+                break
+            # Positions are unique, so no page is reached through an OFFSET
+            cursor = parse_qs(urlparse(response.data['next']).query)['cursor']
+            self.assertNotIn('o=', b64decode(cursor[0]).decode())
+            response = self.client.get(response.data['next'])
+
+        seen = [
+            tag['id'] for page in pages for tag in page.data['results']
+        ]
+        self.assertEqual(seen, expected)
+        previous = self.client.get(pages[-1].data['previous'])
+        self.assertEqual(previous.data['results'], pages[-2].data['results'])
+
+    def test_retrieve_tags_invalid_min_usage(self):
+        """Test that a non numeric min_usage is rejected"""
+        response = self.client.get(self.API_URL, {'min_usage': 'many'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_retrieve_tags_by_popularity(self):
+        """Test ordering tags by the number of recipes using them"""
+        tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ('Dinner', 'Quick', 'Vegan')
+        ]
+        for count, tag in enumerate(tags):
+            for _ in range(count):
+                recipe = Recipe.objects.create(
+                    user=self.user,
+                    name='Soup',
+                    price=3.0,
+                    time_minutes=20,
+                )
+                recipe.tags.add(tag)
+
+        response = self.client.get(self.API_URL, {'ordering': 'popular'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [tag['name'] for tag in response.data['results']],
+            ['Vegan', 'Quick', 'Dinner'],
+        )
+
+    def create_used_tags(self, usage):
+        """Create tags used by the given number of recipes"""
+        recipe = Recipe.objects.create(
+            user=self.user,
+            name='Soup',
+            price=3.0,
+            time_minutes=20,
+        )
+        tags = {}
+        for name, count in usage.items():
+            tags[name] = Tag.objects.create(user=self.user, name=name)
+            if count:
+                recipe.tags.add(tags[name])
+            Tag.objects.filter(pk=tags[name].pk).update(recipe_count=count)
+        return tags
+
+    def test_autocomplete_tags(self):
+        """Test completing a prefix returns the most used tags first"""
+        self.create_used_tags({'Vegan': 1, 'Vegetarian': 5, 'Quick': 9})
+
+        response = self.client.get(self.API_URL, {'prefix': 'VEG'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [tag['name'] for tag in response.data['results']],
+            ['Vegetarian', 'Vegan'],
+        )
+        self.assertIsNone(response.data['next'])
+
+        response = self.client.get(self.API_URL, {'prefix': 'vegz'})
+        self.assertEqual(response.data['results'], [])
+
+    @override_settings(AUTOCOMPLETE_LIMIT=2)
+    def test_autocomplete_tags_limit(self):
+        """Test only the configured number of suggestions is returned"""
+        self.create_used_tags({'Bake': 1, 'Barbecue': 3, 'Basil': 2})
+
+        autocomplete.tries.clear()
+        response = self.client.get(self.API_URL, {'prefix': ''})
+        self.assertEqual(
+            [tag['name'] for tag in response.data['results']],
+            ['Barbecue', 'Basil'],
+        )
+
+    def test_autocomplete_tags_refreshed(self):
+        """Test new tags are suggested once created"""
+        self.create_used_tags({'Vegan': 1})
+        self.client.get(self.API_URL, {'prefix': 've'})
+
+        self.client.post(self.API_URL, {'name': 'Velvet'})
+        response = self.client.get(self.API_URL, {'prefix': 've'})
+
+        self.assertEqual(
+            [tag['name'] for tag in response.data['results']],
+            ['Vegan', 'Velvet'],
+        )
+
+    def test_autocomplete_trie_kept_on_recipe_write(self):
+        """Test recipe writes do not rebuild the tag trie"""
+        tags = self.create_used_tags({'Vegan': 1})
+        trie = autocomplete.get_trie(Tag, self.user.pk)
+
+        recipe = Recipe.objects.create(
+            user=self.user,
+            name='Stew',
+            price=4.0,
+            time_minutes=30,
+        )
+        recipe.tags.add(tags['Vegan'])
+
+        self.assertIs(autocomplete.get_trie(Tag, self.user.pk), trie)
+
+        tags['Vegan'].name = 'Veggie'
+        tags['Vegan'].save()
+
+        self.assertIsNot(autocomplete.get_trie(Tag, self.user.pk), trie)
+
+    def test_autocomplete_tags_assigned_only(self):
+        """Test filtered completions only return matching tags"""
+        self.create_used_tags({'Vegan': 0, 'Vegetarian': 1})
+
+        response = self.client.get(
+            self.API_URL,
+            {'prefix': 'veg', 'assigned_only': 1},
+        )
+
+        self.assertEqual(
+            [tag['name'] for tag in response.data['results']],
+            ['Vegetarian'],
+        )
@@ -0,0 +1,110 @@
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadhandler import SkipFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.http import QueryDict
+from django.http.multipartparser import MultiPartParser as DjangoParser
+from django.http.multipartparser import MultiPartParserError
+from django.utils.datastructures import MultiValueDict
+from PIL import Image
+from rest_framework.exceptions import ParseError
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import DataAndFiles
+from rest_framework.parsers import MultiPartParser
+
+
+class ImageUploadHandler(TemporaryFileUploadHandler):
+    """Upload handler that validates images while they are received
+
+    Chunks go straight to a temporary file, so memory use is bounded by
+    the chunk size whatever the upload size. The image header is sniffed
+    from the first chunks, and uploads in an unsupported format, with
+    oversize dimensions or too many bytes are dropped as soon as that is
+    known, without keeping the rest of the file.
+    """
+    chunk_size = 64 * 2 ** 10
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.errors = []
+
+    def handle_raw_input(
+        self, input_data, META, content_length, boundary, encoding=None
+    ):
+        """Refuse a request whose declared length is already too large"""
+        if content_length > settings.IMAGE_UPLOAD_MAX_BYTES + 2 ** 16:
+            self.errors.append(
+                f'Image exceeds {settings.IMAGE_UPLOAD_MAX_BYTES} bytes.',
+            )
+            return QueryDict(encoding=encoding), MultiValueDict()
+        return None
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.header = b''
+        self.identified = False
+
+    def _reject(self, error):
+        self.errors.append(error)
+        self.file.close()
+        raise SkipFile()
+
+    def _sniff(self, raw_data):
+        """Check the image header once enough of it has been received"""
+        self.header += raw_data
+        try:
+            image = Image.open(BytesIO(self.header))
+        except Exception:
+            if len(self.header) >= settings.IMAGE_UPLOAD_SNIFF_BYTES:
+                self._reject('Upload a valid image.')
+            return
+        self.identified = True
+        self.header = b''
+
+        width, height = image.size
+        if image.format not in settings.IMAGE_UPLOAD_FORMATS:
+            self._reject(f'Unsupported image format {image.format}.')
+        if max(width, height) > settings.IMAGE_UPLOAD_MAX_DIMENSION:
+            self._reject(
+                f'Image dimensions {width}x{height} exceed '
+                f'{settings.IMAGE_UPLOAD_MAX_DIMENSION} pixels.',
+            )
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > settings.IMAGE_UPLOAD_MAX_BYTES:
+            self._reject(
+                f'Image exceeds {settings.IMAGE_UPLOAD_MAX_BYTES} bytes.',
+            )
+        if not self.identified:
+            self._sniff(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        if not self.identified:
+            self.errors.append('Upload a valid image.')
+            self.file.close()
+            return None
+        return super().file_complete(file_size)
+
+
+class ImageUploadParser(MultiPartParser):
+    """Multipart parser receiving files through an ImageUploadHandler"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        request = parser_context['request']
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        meta = request.META.copy()
+        meta['CONTENT_TYPE'] = media_type
+        handler = ImageUploadHandler(request)
+
+        try:
+            parser = DjangoParser(meta, stream, [handler], encoding)
+            data, files = parser.parse()
+        except MultiPartParserError as exc:
+            raise ParseError(f'Multipart form parse error - {exc}')
+
+        if handler.errors:
+            raise ValidationError({'image': handler.errors})
+        return DataAndFiles(data, files)
@@ -1,56 +1,159 @@
+from django.db.models import Prefetch
+from django.db.models import Q
+from django.http import Http404
+from django.http import StreamingHttpResponse
 from rest_framework import mixins
 from rest_framework import status
 from rest_framework import viewsets
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from core.models import Ingredient
 from core.models import Recipe
 from core.models import Tag
+from core.stats import get_user_stats
+from core.storage import recipe_image_storage
+from core.views import serve_media
+from recipe import autocomplete
+from recipe import bulk
+from recipe import cache
+from recipe import export
+from recipe import filters
+from recipe import images
+from recipe import pagination
+from recipe import replicas
+from recipe import search
 from recipe import serializers
+from recipe import similar
+from recipe import uploads
+from user.authentication import CachingTokenAuthentication
 
 
 class RecipeItemViewSet(
+    replicas.ReplicaReadMixin,
+    cache.CachedResponseMixin,
     viewsets.GenericViewSet,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
 ):
     """Manage items in the database"""
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachingTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = pagination.RecipeItemPagination
+    bulk_writer_class = bulk.BulkWriter
 
     def get_queryset(self):
         """Return objects for the current authenticated user only"""
         queryset = self.queryset
         if int(self.request.query_params.get('assigned_only', 0)):
-            queryset = queryset.filter(recipe__isnull=False).distinct()
-        return queryset.filter(user=self.request.user).order_by('-name')
+            queryset = filters.filter_assigned(queryset, self.recipe_field)
+
+        min_usage = filters.get_min_usage(self.request.query_params)
+        if min_usage is not None:
+            queryset = filters.filter_min_usage(queryset, min_usage)
+
+        return queryset.filter(
+            user=self.request.user,
+        ).order_by('-name', 'id')
 
     def perform_create(self, serializer):
         """Create a new object associated with the logged in user"""
         serializer.save(user=self.request.user)
 
+    def list(self, request, *args, **kwargs):
+        if autocomplete.get_prefix(request.query_params) is None:
+            return super().list(request, *args, **kwargs)
+        return self._cached(self.autocomplete, request, *args, **kwargs)
+
+    def autocomplete(self, request, *args, **kwargs):
+        """Return the most used items starting with the prefix parameter
+
+        Plain lookups are answered from the user's cached trie, filtered
+        ones from the database.
+        """
+        prefix = autocomplete.get_prefix(request.query_params)
+        params = request.query_params
+        if (
+            int(params.get('assigned_only', 0))
+            or filters.get_min_usage(params) is not None
+        ):
+            items = autocomplete.complete_queryset(
+                self.get_queryset(),
+                prefix,
+            )
+        else:
+            items = autocomplete.complete(
+                self.queryset.model,
+                request.user.pk,
+                prefix,
+            )
+        serializer = self.get_serializer(items, many=True)
+        return Response({
+            'next': None,
+            'previous': None,
+            'results': serializer.data,
+        })
+
+    @action(methods=['POST', 'PATCH', 'DELETE'], detail=False)
+    def bulk(self, request):
+        """Create, update or delete many objects in one request"""
+        writer = self.bulk_writer_class(
+            self.queryset.model,
+            self.serializer_class,
+            request.user,
+        )
+        return bulk.respond(writer, request)
+
 
 class TagViewSet(RecipeItemViewSet):
     """Manage tags in the database"""
     queryset = Tag.objects.all()
     serializer_class = serializers.TagSerializer
+    recipe_field = 'tags'
 
 
 class IngredientViewSet(RecipeItemViewSet):
     """Manage ingredients in the database"""
     queryset = Ingredient.objects.all()
     serializer_class = serializers.IngredientSerializer
+    recipe_field = 'ingredients'
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(
+    replicas.ReplicaReadMixin,
+    cache.CachedDetailResponseMixin,
+    viewsets.ModelViewSet,
+):
     """Manage ingredients in the database"""
     queryset = Recipe.objects.all()
     serializer_class = serializers.RecipeSerializer
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachingTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = pagination.RecipePagination
+
+    # Related objects fetched up front for each read action, so that
+    # serializing N recipes costs a fixed number of queries instead of
+    # 2N + 1. Writes are left alone: the update mixin drops the prefetch
+    # cache after saving and the create response only touches one row.
+    id_prefetch_plan = (
+        Prefetch('tags', queryset=Tag.objects.only('id')),
+        Prefetch('ingredients', queryset=Ingredient.objects.only('id')),
+    )
+    prefetch_plans = {
+        'list': id_prefetch_plan,
+        'cookable': id_prefetch_plan,
+        'similar': id_prefetch_plan,
+        'retrieve': (
+            Prefetch('tags', queryset=Tag.objects.only('id', 'name')),
+            Prefetch(
+                'ingredients',
+                queryset=Ingredient.objects.only('id', 'name'),
+            ),
+        ),
+    }
 
     def __params_to_ints(self, params):
         """Convert a CSV of string IDs to list of integers"""
@@ -59,18 +162,39 @@ class RecipeViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Return objects for the current authenticated user only"""
         queryset = self.queryset
+        match = filters.MATCH_ANY
+        if self.action == 'list':
+            match = filters.get_match_mode(self.request.query_params)
 
         tags_param = self.request.query_params.get('tags', '')
         if tags_param:
             tag_ids = self.__params_to_ints(tags_param)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+            queryset = filters.filter_by_related(
+                queryset, 'tags', tag_ids, match,
+            )
 
+        # Cookable ranks by its ingredients itself, filtering on them too
+        # would only repeat the join and drop the partial matches
         ingredients_param = self.request.query_params.get('ingredients', '')
-        if ingredients_param:
+        if ingredients_param and self.action != 'cookable':
             ingredient_ids = self.__params_to_ints(ingredients_param)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
+            queryset = filters.filter_by_related(
+                queryset, 'ingredients', ingredient_ids, match,
+            )
+
+        text = search.get_query(self.request.query_params)
+        if text and self.action == 'list':
+            queryset = search.search_recipes(
+                queryset,
+                self.request.user.pk,
+                text,
+            )
 
-        return queryset.filter(user=self.request.user)
+        prefetch_plan = self.prefetch_plans.get(self.action)
+        if prefetch_plan:
+            queryset = queryset.prefetch_related(*prefetch_plan)
+
+        return queryset.filter(user=self.request.user).defer('search_vector')
 
     def get_serializer_class(self):
         """Return appropriate serializer class"""
@@ -78,13 +202,87 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return serializers.RecipeDetailSerializer
         elif self.action == 'upload_image':
             return serializers.RecipeImageSerializer
+        elif self.action == 'cookable':
+            return serializers.RecipeCoverageSerializer
+        elif self.action == 'similar':
+            return serializers.RecipeSimilaritySerializer
         return self.serializer_class
 
     def perform_create(self, serializer):
         """Create a new recipe"""
         serializer.save(user=self.request.user)
 
-    @action(methods=['POST'], detail=True, url_path='upload-image')
+    @action(methods=['POST', 'PATCH', 'DELETE'], detail=False)
+    def bulk(self, request):
+        """Create, update or delete many recipes in one request"""
+        writer = bulk.RecipeBulkWriter(
+            Recipe,
+            serializers.RecipeBulkSerializer,
+            request.user,
+        )
+        return bulk.respond(writer, request)
+
+    @action(methods=['GET'], detail=False)
+    def cookable(self, request):
+        """Rank recipes by how well the given ingredients cover them"""
+        return self._cached(self._cookable, request)
+
+    def _cookable(self, request):
+        ingredients_param = request.query_params.get('ingredients', '')
+        if not ingredients_param:
+            raise ValidationError({
+                'ingredients': 'This query parameter is required.',
+            })
+        limit = filters.get_limit(
+            request.query_params,
+            pagination.RecipePagination.max_page_size,
+        )
+        queryset = filters.rank_by_coverage(
+            self.get_queryset(),
+            self.__params_to_ints(ingredients_param),
+        )
+        serializer = self.get_serializer(queryset[:limit], many=True)
+        return Response({'results': serializer.data})
+
+    @action(methods=['GET'], detail=True)
+    def similar(self, request, pk=None):
+        """List the recipes sharing the most tags and ingredients"""
+        return self._cached(self._similar, request, pk=pk)
+
+    def _similar(self, request, pk=None):
+        recipe = self.get_object()
+        limit = filters.get_limit(
+            request.query_params,
+            pagination.RecipePagination.max_page_size,
+        )
+        scores = dict(similar.similar_recipes(recipe, limit))
+        recipes = self.get_queryset().in_bulk(list(scores))
+        results = []
+        for recipe_id, score in scores.items():
+            if recipe_id in recipes:
+                recipes[recipe_id].similarity = score
+                results.append(recipes[recipe_id])
+        serializer = self.get_serializer(results, many=True)
+        return Response({'results': serializer.data})
+
+    @action(methods=['GET'], detail=False)
+    def export(self, request):
+        """Stream every recipe of the user as newline delimited JSON"""
+        response = StreamingHttpResponse(
+            export.export_recipes(request.user),
+            content_type='application/x-ndjson',
+        )
+        response['Content-Disposition'] = (
+            'attachment; filename="recipes.ndjson"'
+        )
+        return response
+
+    @action(
+        methods=['POST'],
+        detail=True,
+        url_path='upload-image',
+        parser_classes=[uploads.ImageUploadParser],
+    )
     def upload_image(self, request, pk=None):
         """Upload an image to a recipe"""
         recipe = self.get_object()
@@ -93,7 +291,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
             data=request.data,
         )
         if serializer.is_valid():
-            serializer.save()
+            recipe = serializer.save()
+            images.pipeline.submit(recipe.image.name)
             return Response(
                 serializer.data,
                 status=status.HTTP_200_OK,
@@ -102,3 +301,40 @@ class RecipeViewSet(viewsets.ModelViewSet):
             serializer.errors,
             status=status.HTTP_400_BAD_REQUEST,
         )
+
+
+class RecipeMediaView(APIView):
+    """Serve recipe images and their derivatives to the recipe owner"""
+    authentication_classes = (CachingTokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    def owns_image(self, name):
+        """Return whether a recipe of the user uses the image"""
+        owned = Q(image=name)
+        stem = images.original_stem(name)
+        if stem is not None:
+            owned |= Q(image__startswith=f'{stem}.')
+        return Recipe.objects.filter(owned, user=self.request.user).exists()
+
+    def perform_content_negotiation(self, request, force=False):
+        """Skip negotiation, files are served whatever the Accept header
+
+        The renderer only formats errors, so image requests like
+        Accept: image/webp are not answered with 406.
+        """
+        renderer = self.get_renderers()[0]
+        return renderer, renderer.media_type
+
+    def get(self, request, path):
+        if not self.owns_image(path):
+            raise Http404('File not found')
+        return serve_media(request, path, recipe_image_storage)
+
+
+class RecipeStatsView(replicas.ReplicaReadMixin, APIView):
+    """Show statistics about the recipes of the authenticated user"""
+    authentication_classes = (CachingTokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        return Response(get_user_stats(request.user))
@@ -0,0 +1,156 @@
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from core.cache import LRUCache
+
+
+def _row(instance):
+    """Return the column values of a model instance"""
+    return tuple(
+        getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+    )
+
+
+def _from_row(model, row):
+    """Return a new model instance loaded from column values"""
+    names = [field.attname for field in model._meta.concrete_fields]
+    return model.from_db(DEFAULT_DB_ALIAS, names, row)
+
+
+class TokenCache:
+    """Cache of token keys to the (user, token) pair they resolve to
+
+    Entries live in a per-process LRU unless TOKEN_CACHE_ALIAS names a
+    Django cache, which settings do whenever CACHE_LOCATION is set. The
+    shared backend makes an invalidation in one worker seen by all the
+    others, with the local LRU the other processes keep a changed or
+    deactivated user for up to the TTL.
+
+    Each key has a version, bumped when the key is invalidated, and an
+    entry records the version read before the database was queried. A
+    lookup racing with an invalidation can only store an entry of an old
+    version, which is never returned.
+
+    Only column values are stored, every lookup builds new instances, so
+    a request changing its user cannot leak into other requests.
+    """
+    key_prefix = 'auth-token:'
+    version_prefix = 'auth-token-version:'
+
+    def __init__(self, alias=None, max_size=10000, ttl=60):
+        self.alias = alias
+        self.ttl = ttl
+        self.local = LRUCache(max_size=max_size, ttl=ttl)
+        self.local_versions = LRUCache(max_size=max_size)
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        """Return the shared cache backend, if one is configured"""
+        return caches[self.alias] if self.alias else None
+
+    def _get_shared(self, key):
+        version_key = self.version_prefix + key
+        entries = self.shared.get_many([version_key, self.key_prefix + key])
+        version = entries.get(version_key)
+        if version is None:
+            self.shared.add(version_key, time.time_ns(), None)
+            version = self.shared.get(version_key)
+        return version, entries.get(self.key_prefix + key)
+
+    def _get_local(self, key):
+        with self._lock:
+            version = self.local_versions.get(key)
+            if version is None:
+                version = time.time_ns()
+                self.local_versions.set(key, version)
+            return version, self.local.get(key)
+
+    def lookup(self, key):
+        """Return the version of a key and its cached (user, token) pair
+
+        The pair is None when nothing is cached for the current version.
+        """
+        if self.shared is not None:
+            version, entry = self._get_shared(key)
+        else:
+            version, entry = self._get_local(key)
+        if entry is None or entry[0] != version:
+            return version, None
+        user_row, token_row = entry[1]
+        user = _from_row(get_user_model(), user_row)
+        token = _from_row(Token, token_row)
+        token.user = user
+        return version, (user, token)
+
+    def get(self, key):
+        """Return the cached (user, token) pair for a key, if any"""
+        return self.lookup(key)[1]
+
+    def add(self, key, credentials, version):
+        """Remember the (user, token) pair a key resolved to at a version
+
+        An entry of the same or a newer version is kept, only one left by
+        a lookup that raced with an invalidation is replaced.
+        """
+        user, token = credentials
+        entry = (version, (_row(user), _row(token)))
+        if self.shared is not None:
+            cache_key = self.key_prefix + key
+            if not self.shared.add(cache_key, entry, self.ttl):
+                existing = self.shared.get(cache_key)
+                if existing is None or existing[0] < version:
+                    self.shared.set(cache_key, entry, self.ttl)
+            return
+        with self._lock:
+            existing = self.local.get(key)
+            if existing is None or existing[0] < version:
+                self.local.set(key, entry)
+
+    def delete(self, key):
+        """Invalidate a key, including the lookups already under way"""
+        if self.shared is not None:
+            version_key = self.version_prefix + key
+            try:
+                self.shared.incr(version_key)
+            except ValueError:
+                self.shared.add(version_key, time.time_ns(), None)
+            self.shared.delete(self.key_prefix + key)
+            return
+        with self._lock:
+            version = self.local_versions.get(key)
+            self.local_versions.set(
+                key,
+                time.time_ns() if version is None else version + 1,
+            )
+            self.local.delete(key)
+
+
+token_cache = TokenCache(
+    alias=settings.TOKEN_CACHE_ALIAS,
+    max_size=settings.TOKEN_CACHE_SIZE,
+    ttl=settings.TOKEN_CACHE_TTL,
+)
+
+
+class CachingTokenAuthentication(TokenAuthentication):
+    """Token authentication that skips the token and user query when cached
+
+    Cached entries are dropped by user.signals when the token is deleted
+    or the user is saved, which covers deactivation and password changes.
+    """
+
+    def authenticate_credentials(self, key):
+        version, credentials = token_cache.lookup(key)
+        if credentials is None:
+            credentials = super().authenticate_credentials(key)
+            token_cache.add(key, credentials, version)
+        return credentials
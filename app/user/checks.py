@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.checks import Error
+from django.core.checks import Warning
+from django.core.checks import register
+
+from core.cache import is_process_local
+
+
+@register()
+def check_token_cache(app_configs, **kwargs):
+    """Reject token caches that only the current process invalidates
+
+    A deleted token or a deactivated user would keep authenticating in
+    the other worker processes until their entries expire.
+    """
+    alias = settings.TOKEN_CACHE_ALIAS
+    if alias and is_process_local(caches[alias]):
+        return [Error(
+            'TOKEN_CACHE_ALIAS needs a cache shared by every process.',
+            hint='Set CACHE_LOCATION or point TOKEN_CACHE_ALIAS at a '
+                 'memcached cache.',
+            id='user.E001',
+        )]
+    if not alias and not is_process_local(caches['default']):
+        return [Warning(
+            'Tokens are cached per process while a shared cache is set.',
+            hint='Leave TOKEN_CACHE_ALIAS unset to use the default cache.',
+            id='user.W001',
+        )]
+    return []
@@ -0,0 +1,28 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from user.authentication import token_cache
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    """Stop authenticating with a token once it is deleted"""
+    token_cache.delete(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def user_saved(sender, instance, created, **kwargs):
+    """Drop cached credentials of a user that changed
+
+    Covers deactivation and password changes, and also keeps the cached
+    user from going stale after profile updates.
+    """
+    if created:
+        return
+    for key in Token.objects.filter(user=instance).values_list(
+        'key', flat=True,
+    ):
+        token_cache.delete(key)
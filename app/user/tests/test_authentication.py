@@ -0,0 +1,122 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user import checks
+from user.authentication import CachingTokenAuthentication
+from user.authentication import TokenCache
+from user.authentication import token_cache
+
+
+class TestCachingTokenAuthentication(TestCase):
+    ME_URL = reverse('user:me')
+
+    def setUp(self):
+        token_cache.local.clear()
+        self.user = get_user_model().objects.create_user(
+            'nhpgeraldes@gmail.com',
+            'password123',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def count_queries(self):
+        """Return the number of queries made by a request to the me URL"""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.ME_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries)
+
+    def test_cached_token_skips_query(self):
+        """Test only the first request with a token queries the database"""
+        self.assertEqual(self.count_queries(), 1)
+        self.assertEqual(self.count_queries(), 0)
+        self.assertEqual(token_cache.local.hits, 1)
+
+    def test_stock_authentication_queries(self):
+        """Test the stock class queries every time, the cached one once"""
+        stock = TokenAuthentication()
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                stock.authenticate_credentials(self.token.key)
+
+        cached = CachingTokenAuthentication()
+        with self.assertNumQueries(1):
+            cached.authenticate_credentials(self.token.key)
+        with self.assertNumQueries(0):
+            cached.authenticate_credentials(self.token.key)
+
+    def test_cached_user_not_shared(self):
+        """Test each authentication gets its own user instance"""
+        authentication = CachingTokenAuthentication()
+        user, token = authentication.authenticate_credentials(self.token.key)
+        user.email = 'unsaved@gmail.com'
+
+        user, token = authentication.authenticate_credentials(self.token.key)
+
+        self.assertEqual(user.email, 'nhpgeraldes@gmail.com')
+        self.assertIs(token.user, user)
+        self.assertEqual(token.key, self.token.key)
+        self.assertFalse(user._state.adding)
+
+    def test_invalidation_during_lookup(self):
+        """Test a key invalidated while it is looked up is not cached"""
+        stock = TokenAuthentication()
+        for cache in (token_cache, TokenCache(alias='default')):
+            version, credentials = cache.lookup(self.token.key)
+            self.assertIsNone(credentials)
+            credentials = stock.authenticate_credentials(self.token.key)
+
+            cache.delete(self.token.key)
+            cache.add(self.token.key, credentials, version)
+
+            self.assertIsNone(cache.get(self.token.key))
+            version, _ = cache.lookup(self.token.key)
+            cache.add(self.token.key, credentials, version)
+            self.assertEqual(cache.get(self.token.key)[0], self.user)
+
+    def test_process_local_cache_rejected(self):
+        """Test the checks reject token caches other processes miss"""
+        self.assertEqual(checks.check_token_cache(None), [])
+
+        with override_settings(TOKEN_CACHE_ALIAS='default'):
+            errors = checks.check_token_cache(None)
+        self.assertEqual([error.id for error in errors], ['user.E001'])
+
+        dummy = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+        with override_settings(CACHES={'default': dummy}):
+            errors = checks.check_token_cache(None)
+        self.assertEqual([error.id for error in errors], ['user.W001'])
+
+    def test_deleted_token_rejected(self):
+        """Test a deleted token stops authenticating"""
+        self.count_queries()
+        self.token.delete()
+
+        response = self.client.get(self.ME_URL)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_inactive_user_rejected(self):
+        """Test a deactivated user stops authenticating"""
+        self.count_queries()
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get(self.ME_URL)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_invalidates(self):
+        """Test changing the password drops the cached credentials"""
+        self.count_queries()
+        response = self.client.patch(self.ME_URL, {'password': 'newpass123'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertIsNone(token_cache.get(self.token.key))
@@ -1,9 +1,9 @@
-from rest_framework import authentication
 from rest_framework import generics
 from rest_framework import permissions
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 
+from user.authentication import CachingTokenAuthentication
 from user.serializers import AuthTokenSerializer
 from user.serializers import UserSerializer
 
@@ -22,7 +22,7 @@ class CreateTokenView(ObtainAuthToken):
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated user"""
     serializer_class = UserSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachingTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):